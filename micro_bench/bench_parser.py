@@ -0,0 +1,55 @@
+"""Compare the grammar based MDX parser with the regex parser on big
+queries (like Excel queries with thousands of selected members).
+
+usage::
+
+    python -m micro_bench.bench_parser
+"""
+
+from timeit import Timer
+
+from prettytable import PrettyTable
+
+from olapy.core.mdx.parser.parse import parse_with_grammar, parse_with_regex
+
+MEMBERS_COUNTS = [100, 1000, 10000]
+
+
+def generate_query(members_count):
+    """Generate an Excel like query with members_count members on rows.
+
+    :param members_count: number of members
+    :return: MDX query
+    """
+    members = ",\n".join(
+        f"[Geography].[Geography].[Country].[Europe].[Country {idx}]"
+        for idx in range(members_count)
+    )
+    return f"""
+    SELECT NON EMPTY Hierarchize({{[Measures].[Amount], [Measures].[Count]}})
+    DIMENSION PROPERTIES PARENT_UNIQUE_NAME, HIERARCHY_UNIQUE_NAME ON COLUMNS,
+    NON EMPTY Hierarchize(AddCalculatedMembers({{{members}}}))
+    DIMENSION PROPERTIES PARENT_UNIQUE_NAME, HIERARCHY_UNIQUE_NAME ON ROWS
+    FROM [sales]
+    WHERE ([Time].[Time].[Year].[2010])
+    CELL PROPERTIES VALUE, FORMAT_STRING, LANGUAGE, BACK_COLOR, FORE_COLOR, FONT_FLAGS
+    """
+
+
+def main(number=5):
+    t = PrettyTable(["Members", "regex parser (s)", "grammar parser (s)"])
+    for members_count in MEMBERS_COUNTS:
+        query = generate_query(members_count)
+        assert parse_with_regex(query).all == parse_with_grammar(query).all
+        t.add_row(
+            [
+                members_count,
+                Timer(lambda: parse_with_regex(query)).timeit(number=number) / number,
+                Timer(lambda: parse_with_grammar(query)).timeit(number=number) / number,
+            ]
+        )
+    print(t)
+
+
+if __name__ == "__main__":
+    main()
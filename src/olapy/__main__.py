@@ -2,7 +2,7 @@ import sys
 
 import click
 
-from .cli import init
+from .cli import convert, init
 from .core.services.xmla import runserver
 
 
@@ -22,6 +22,7 @@ def cli():
 
 cli.add_command(runserver)
 cli.add_command(init)
+cli.add_command(convert)
 
 if __name__ == "__main__":
     main(sys.argv)
@@ -34,5 +34,29 @@ def init():
         print("Initializing config files")
 
 
+@click.command()
+@click.argument("cube_path", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--output",
+    "-o",
+    default=None,
+    help="Converted cube folder, Default: the csv cube folder itself.",
+)
+@click.option("--sep", "-s", default=";", help="Csv files separator.")
+@click.option(
+    "--file_format",
+    "-f",
+    type=click.Choice(["parquet", "feather"]),
+    default="parquet",
+    help="Tables files format.",
+)
+def convert(cube_path, output, sep, file_format):
+    """Convert a csv cube folder into a Parquet / Arrow cube."""
+    from .core.mdx.executor.cube_loader_columnar import convert_csv_cube
+
+    manifest = convert_csv_cube(cube_path, output, sep=sep, file_format=file_format)
+    print(f"{len(manifest['tables'])} tables converted to {file_format}")
+
+
 if __name__ == "__main__":
     init()
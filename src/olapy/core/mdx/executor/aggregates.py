@@ -0,0 +1,218 @@
+"""Pre-aggregated cuboids (materialized aggregates) of the star schema.
+
+A cuboid is the star schema DataFrame grouped by some levels columns, with
+all measures summed, for instance::
+
+    cuboid ['Year', 'Continent'] :
+
+    +------+-----------+---------+-------+
+    | Year | Continent | Amount  | Count |
+    +======+===========+=========+=======+
+    | 2010 | America   | 35150   | 160   |
+    +------+-----------+---------+-------+
+    | 2010 | Europe    | 41239   | 98    |
+    +------+-----------+---------+-------+
+
+Any query grouped and filtered by columns of a cuboid can be answered from
+the cuboid instead of the (much bigger) star schema, see
+:func:`MdxEngine._get_cuboid_dataframe`.
+"""
+
+import threading
+from collections import Counter
+from typing import Optional
+
+import pandas as pd
+from attrs import define, field
+
+
+def aggregate(star_schema, columns, measures):
+    """Group star schema rows by levels columns, and sum measures.
+
+    Rows with missing values are kept (dropna=False), so that filtering a
+    cuboid gives the same result as filtering the star schema.
+
+    :param star_schema: star schema DataFrame (or :class:`StarJoin`)
+    :param columns: levels columns names
+    :param measures: measures columns names
+    :return: cuboid DataFrame
+    """
+    if not isinstance(star_schema, pd.DataFrame):
+        # normalized star schema (see :class:`StarJoin`), join used columns only
+        star_schema = star_schema[columns + measures]
+    categorical_columns = [
+        column
+        for column in columns
+        if isinstance(star_schema[column].dtype, pd.CategoricalDtype)
+    ]
+    # categorical columns are grouped by codes, missing values of categorical
+    # columns are dropped by groupby even with dropna=False
+    keys = [
+        star_schema[column].cat.codes.rename(column)
+        if column in categorical_columns
+        else star_schema[column]
+        for column in columns
+    ]
+    cuboid = (
+        star_schema.groupby(keys, sort=False, dropna=False)[measures]
+        .sum()
+        .reset_index()
+    )
+    for column in categorical_columns:
+        cuboid[column] = pd.Categorical.from_codes(
+            cuboid[column], categories=star_schema[column].cat.categories
+        )
+    return cuboid
+
+
+@define
+class AggregateStore:
+    """Store of the cuboids of one cube.
+
+    Example::
+
+        executor = MdxEngine(
+            aggregates=AggregateStore(
+                cuboids=[['Year', 'Continent'], ['Year', 'Company']],
+                lazy_threshold=3,
+            )
+        )
+        executor.load_cube('sales')
+
+    :param cuboids: list of levels columns groups, cuboids precomputed when loading the cube
+    :param lazy_threshold: build a cuboid for a group of columns once this number of queries
+        needed it, None (Default) to disable lazy cuboids
+    :param materialized: dict with frozenset of columns as key and cuboid DataFrame as value
+    """
+
+    cuboids: list = field(factory=list)
+    lazy_threshold: Optional[int] = field(default=None)
+    materialized: dict = field(factory=dict)
+    requests_count: Counter = field(factory=Counter)
+    star_schema_dataframe = field(default=None, repr=False)
+    measures: list = field(factory=list)
+    # the store of a loaded cube is shared by concurrent requests (see
+    # MdxEngine.for_request), lazy cuboids are counted and added under this lock
+    _lock = field(factory=threading.Lock, init=False, eq=False, repr=False)
+
+    def build(self, star_schema_dataframe, measures):
+        """(Re)build all configured cuboids for a newly loaded star schema.
+
+        :param star_schema_dataframe: star schema DataFrame
+        :param measures: measures columns names
+        """
+        self.clear()
+        self.star_schema_dataframe = star_schema_dataframe
+        self.measures = list(measures or [])
+        for columns in self.cuboids:
+            self.add_cuboid(columns)
+
+    def rebuild(self, star_schema_dataframe, measures):
+        """Build a new store, with the same cuboids configuration, for a newly
+        loaded star schema.
+
+        This store is left unchanged, it may still be used by running queries.
+
+        :param star_schema_dataframe: star schema DataFrame
+        :param measures: measures columns names
+        :return: new AggregateStore
+        """
+        store = AggregateStore(cuboids=self.cuboids, lazy_threshold=self.lazy_threshold)
+        store.build(star_schema_dataframe, measures)
+        return store
+
+    def clear(self):
+        """Drop all materialized cuboids."""
+        self.materialized = {}
+        self.requests_count = Counter()
+        self.star_schema_dataframe = None
+
+    def add_cuboid(self, columns):
+        """Materialize one cuboid, see :func:`aggregate`.
+
+        :param columns: levels columns names
+        :return: cuboid DataFrame
+        """
+        columns = list(columns)
+        cuboid = aggregate(self.star_schema_dataframe, columns, self.measures)
+        with self._lock:
+            # materialized is replaced, not modified, so that running queries
+            # can look for cuboids without the lock
+            self.materialized = {**self.materialized, frozenset(columns): cuboid}
+        return cuboid
+
+    def append(self, star_schema_dataframe, new_rows):
+        """Build a new store for a star schema with appended rows (see
+        :func:`MdxEngine.refresh_cube`), materialized cuboids are updated with
+        new rows aggregates instead of being rebuilt from the star schema.
+
+        This store is left unchanged, it may still be used by running queries.
+
+        :param star_schema_dataframe: star schema DataFrame, with new rows
+        :param new_rows: new star schema rows DataFrame
+        :return: new AggregateStore
+        """
+        store = AggregateStore(
+            cuboids=self.cuboids,
+            lazy_threshold=self.lazy_threshold,
+            requests_count=Counter(self.requests_count),
+            star_schema_dataframe=star_schema_dataframe,
+            measures=self.measures,
+        )
+        for key, cuboid in self.materialized.items():
+            columns = [column for column in cuboid.columns if column in key]
+            store.materialized[key] = aggregate(
+                pd.concat(
+                    [cuboid, aggregate(new_rows, columns, self.measures)],
+                    ignore_index=True,
+                ),
+                columns,
+                self.measures,
+            )
+        return store
+
+    def find(self, columns, measures):
+        """Find the smallest cuboid which contains all columns and measures.
+
+        :param columns: levels columns needed (used in group by and filters)
+        :param measures: measures needed
+        :return: cuboid DataFrame, None if no cuboid can answer the query
+        """
+        if measures is None or not set(measures).issubset(self.measures):
+            return None
+
+        candidates = [
+            cuboid
+            for cuboid_columns, cuboid in self.materialized.items()
+            if cuboid_columns.issuperset(columns)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=len)
+
+    def record(self, columns):
+        """Count a query needing columns, and build the matching cuboid
+        lazily when lazy_threshold is reached.
+
+        The cuboid is built by the request reaching the threshold only, other
+        requests aren't blocked while it is built.
+
+        :param columns: levels columns needed (used in group by and filters)
+        """
+        if self.lazy_threshold is None or self.star_schema_dataframe is None:
+            return
+
+        key = frozenset(columns)
+        with self._lock:
+            self.requests_count[key] += 1
+            if self.requests_count[key] != self.lazy_threshold:
+                return
+        if self.find(key, []) is None:
+            self.add_cuboid(key)
+
+    def is_active(self):
+        # type: () -> bool
+        """Check if the store can answer (or lazily build) any cuboid."""
+        return bool(self.materialized) or (
+            self.lazy_threshold is not None and self.star_schema_dataframe is not None
+        )
@@ -0,0 +1,111 @@
+"""Bounded LRU cache, used to keep MDX execution results (see
+:func:`MdxEngine.execute_mdx`) and XMLA responses (see
+:func:`XmlaExecuteReqHandler.generate_response`) of the loaded cube.
+
+Excel (and other xmla clients) send the same MDX query many times per
+session (pivot table refresh, filter toggle, undo...), with a cache hit the
+query is neither parsed nor executed again.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from .star_join import StarJoin
+
+
+def normalize_query(mdx_query):
+    """Canonicalize an MDX query, so that queries which only differ by
+    whitespaces share the same cache key.
+
+    :param mdx_query: MDX query
+    :return: MDX query with all whitespaces sequences replaced by one space
+    """
+    try:
+        mdx_query = mdx_query.decode("utf-8")
+    except AttributeError:
+        pass
+    return " ".join(mdx_query.split())
+
+
+def get_size(value):
+    """Approximate size of a cached value in bytes.
+
+    :param value: DataFrame, string, dict, list...
+    :return: size in bytes
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, StarJoin):
+        return value.memory_usage()
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            get_size(key) + get_size(item) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(get_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Least recently used cache bounded by the size (in bytes) of its
+    values.
+
+    :param max_size: max size of all cached values in bytes, 0 disables the cache
+    """
+
+    def __init__(self, max_size=64 * 1024 * 1024):
+        self.max_size = max_size
+        self.current_size = 0
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Get a cached value, and mark it as the most recently used.
+
+        :param key: cache key
+        :param default: returned value if key is not cached
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def set(self, key, value):
+        """Cache a value, and evict the least recently used ones until the
+        cache fits max_size.
+
+        Values bigger than max_size are not cached.
+
+        :param key: cache key
+        :param value: value to cache
+        """
+        size = get_size(value)
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.current_size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_size += size
+            while self.current_size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_size -= evicted_size
+
+    def clear(self):
+        """Invalidate all cached values (when cube data is reloaded)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_size = 0
@@ -0,0 +1,85 @@
+"""Loaded cube data and per query execution state of :class:`MdxEngine`.
+
+A :class:`Cube` is built once the cube is loaded, and never modified
+afterwards (reloading a cube builds a new one), so it can be shared freely
+between concurrent requests. Everything a query modifies while executing
+lives in its own :class:`QueryContext`::
+
+    executor.load_cube('sales')
+    request_executor = executor.for_request(QueryContext())
+    request_executor.execute_mdx(mdx_query)
+"""
+
+from typing import Optional
+
+from attrs import define, field, frozen
+
+from olapy.core.mdx.parser import MdxParser
+
+
+@frozen
+class FactsSource:
+    """Facts rows read from the cube source, to read only appended facts rows
+    when refreshing the cube, see :func:`MdxEngine.refresh_cube`.
+
+    :param dimensions: dict of dimension table name and DataFrame (with id
+        columns), new facts rows are joined with them
+    :param files: facts table csv files read (files cubes)
+    :param high_water_mark: max value of the refresh column of facts rows read
+        (database cubes)
+    """
+
+    dimensions: dict = field(repr=False)
+    files: tuple = field(default=())
+    high_water_mark = field(default=None)
+
+
+@frozen
+class Cube:
+    """Read only data of a loaded cube.
+
+    DataFrames and dicts are shared, not copied, they must not be modified
+    once the cube is built.
+
+    :param name: cube name
+    :param facts: facts table name
+    :param tables_loaded: dict of table name and DataFrame
+    :param star_schema_dataframe: star schema DataFrame
+    :param measures: measures columns names
+    :param default_measures: measures selected by queries without measures
+    :param members_index: dimensions members index
+    :param level_codes: star schema levels codes
+    :param aggregates: cube :class:`AggregateStore`
+    :param sqla_engine: sql_alchemy engine of the cube database
+    :param rolap_schema: joins of the cube database tables, see :class:`RolapSchema`
+    :param facts_source: facts rows read, see :class:`FactsSource`
+    :param partitions: star schema partitions, see :class:`FactsPartitions`
+    """
+
+    name: str = field()
+    facts: str = field()
+    tables_loaded: dict = field(repr=False)
+    star_schema_dataframe = field(repr=False)
+    measures: list = field(factory=list)
+    default_measures: tuple = field(default=())
+    members_index: Optional[dict] = field(default=None, repr=False)
+    level_codes: Optional[dict] = field(default=None, repr=False)
+    aggregates = field(default=None, repr=False)
+    sqla_engine = field(default=None, repr=False)
+    rolap_schema = field(default=None, repr=False)
+    facts_source: Optional[FactsSource] = field(default=None, repr=False)
+    partitions = field(default=None, repr=False)
+
+
+@define
+class QueryContext:
+    """Mutable state of one query execution.
+
+    :param parser: parser of the executed query
+    :param selected_measures: measures used by the executed query (measures of
+        the query, else measures of the previous query of this context, else the
+        cube default measures)
+    """
+
+    parser: MdxParser = field(factory=MdxParser)
+    selected_measures: Optional[list] = None
@@ -1,28 +1,271 @@
 import os
 
 import pandas as pd
+from pandas.api.types import union_categoricals
 from pandas.errors import MergeError
 
+CHUNK_SIZE = 100000
+SAMPLE_SIZE = 10000
+CATEGORIES_RATIO = 0.5
+
+
+def infer_csv_schema(sample, clean_numbers=False, categories_ratio=None):
+    """Infer how to read the string columns of a csv file from a sample of its
+    rows.
+
+    :param sample: DataFrame of the first rows of the file
+    :param clean_numbers: detect numbers with spaces (like 1 349, see
+        :func:`MdxEngine.clean_data`)
+    :param categories_ratio: string columns with at most categories_ratio
+        distinct values per row are read as categories, Default None (no
+        categorical column)
+    :return: (dtypes dict for pd.read_csv, numbers columns to clean)
+    """
+    dtypes = {}
+    numbers_columns = []
+    for column in sample.columns:
+        values = sample[column].dropna()
+        if sample[column].dtype != object or values.empty:
+            continue
+        if clean_numbers:
+            numbers = pd.to_numeric(values.str.replace(" ", ""), errors="coerce")
+            if numbers.notnull().all():
+                numbers_columns.append(column)
+                continue
+        if categories_ratio is not None and (
+            values.nunique() <= categories_ratio * len(values)
+        ):
+            dtypes[column] = "category"
+    return dtypes, numbers_columns
+
+
+def to_numbers(values):
+    """Convert numbers with spaces (like 1 349) to floats.
+
+    :param values: Series
+    :return: float Series
+    :raise ValueError: if a value is not a number
+    """
+    if values.dtype == object:
+        values = pd.to_numeric(values.str.replace(" ", ""))
+    return values.astype(float)
+
+
+def concat_chunks(chunks):
+    """Concat DataFrames chunks of a table (chunks of a csv file, part files,
+    appended rows), categories of categorical columns are merged (and sorted)
+    instead of falling back to objects.
+
+    :param chunks: list of DataFrames with the same columns
+    :return: DataFrame
+    """
+    if len(chunks) == 1 and not any(
+        isinstance(dtype, pd.CategoricalDtype) for dtype in chunks[0].dtypes
+    ):
+        return chunks[0]
+
+    columns = {}
+    for column, dtype in chunks[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and any(
+            chunk[column].dtype != dtype for chunk in chunks
+        ):
+            columns[column] = union_categoricals(
+                [chunk[column].astype("category") for chunk in chunks],
+                sort_categories=True,
+            )
+        else:
+            columns[column] = pd.concat(
+                [chunk[column] for chunk in chunks], ignore_index=True
+            )
+    return pd.DataFrame(columns)
+
+
+def read_csv_file(
+    file_path,
+    sep=";",
+    clean_numbers=False,
+    chunksize=CHUNK_SIZE,
+    sample_size=SAMPLE_SIZE,
+    categories_ratio=None,
+):
+    """Read a csv file by chunks, with string columns dtypes inferred from a
+    sample: numbers with spaces are cleaned while reading, and low cardinality
+    columns may be read as categories.
+
+    :param file_path: csv file path
+    :param sep: csv file separator
+    :param clean_numbers: convert numbers with spaces (like 1 349) to floats,
+        like :func:`MdxEngine.clean_data` columns with values which are not
+        numbers are kept as they are
+    :param chunksize: rows read at once
+    :param sample_size: rows used to infer dtypes
+    :param categories_ratio: see :func:`infer_csv_schema`
+    :return: DataFrame
+    """
+    sample = pd.read_csv(file_path, sep=sep, nrows=sample_size)
+    dtypes, numbers_columns = infer_csv_schema(sample, clean_numbers, categories_ratio)
+    chunks = _read_csv_chunks(file_path, sep, dtypes, numbers_columns, chunksize)
+    if not chunks:
+        # only a header
+        return sample
+    return concat_chunks(chunks)
+
+
+def _read_csv_chunks(file_path, sep, dtypes, numbers_columns, chunksize):
+    """Read csv file chunks, and clean numbers columns.
+
+    Numbers columns are inferred from the first rows, if a value of a next
+    chunk is not a number, the file is read again without cleaning its column.
+
+    :return: list of DataFrames
+    """
+    chunks = []
+    with pd.read_csv(file_path, sep=sep, dtype=dtypes, chunksize=chunksize) as reader:
+        for chunk in reader:
+            for column in numbers_columns:
+                try:
+                    chunk[column] = to_numbers(chunk[column])
+                except ValueError:
+                    numbers_columns = [
+                        number_column
+                        for number_column in numbers_columns
+                        if number_column != column
+                    ]
+                    return _read_csv_chunks(
+                        file_path, sep, dtypes, numbers_columns, chunksize
+                    )
+            chunks.append(chunk)
+    return chunks
+
+
+def _get_table_name(file, tables_names):
+    """Get the table name of a csv file, ``{table}.{part}.csv`` files are
+    parts of the table if the part is a number or a date (like 2 or 2024-01)
+    and there is a ``{table}.csv`` file, other files are tables (dots
+    included, like my.table.csv).
+
+    :param file: csv file name
+    :param tables_names: names of csv files without extension
+    :return: table name
+    """
+    names = file.rsplit(".", 2)
+    if (
+        len(names) == 3
+        and names[0] in tables_names
+        and names[1].replace("-", "").replace("_", "").isdigit()
+    ):
+        return names[0]
+    return os.path.splitext(file)[0]
+
+
+def get_csv_files(cube_path):
+    """Get csv files of a cube folder by table name.
+
+    A table may be split in many files, ``{table}.csv`` and part files named
+    ``{table}.{part}.csv`` (for instance Facts.2024-01.csv, see
+    :func:`_get_table_name`) or stored in a
+    ``{table}`` folder (for instance Facts/2024-01.csv), read in this order,
+    so that rows can be appended to a table by adding a part file.
+
+    :param cube_path: cube folder path
+    :return: dict of table name and list of files paths (relative to the cube folder)
+    """
+    files = os.listdir(cube_path)
+    tables_names = {
+        os.path.splitext(file)[0] for file in files if file.lower().endswith(".csv")
+    }
+    tables_files = {}
+    for file in files:
+        if os.path.isdir(os.path.join(cube_path, file)):
+            parts = [
+                os.path.join(file, part)
+                for part in sorted(os.listdir(os.path.join(cube_path, file)))
+                if part.lower().endswith(".csv")
+            ]
+            if parts:
+                tables_files.setdefault(file, []).extend(parts)
+        elif file.lower().endswith(".csv"):
+            tables_files.setdefault(_get_table_name(file, tables_names), []).append(
+                file
+            )
+    return {
+        table_name: sorted(
+            files, key=lambda file: (file.lower() != f"{table_name.lower()}.csv", file)
+        )
+        for table_name, files in tables_files.items()
+    }
+
 
 class CubeLoader:
-    def __init__(self, cube_path=None, sep=";"):
+    def __init__(self, cube_path=None, sep=";", facts=None, categories_ratio=None):
         self.cube_path = cube_path
         self.sep = sep
+        self.facts = facts
+        # see infer_csv_schema
+        self.categories_ratio = categories_ratio
+        self.tables_files = {}
+        self._tables = None
+
+    def read_table_files(self, table_name, files):
+        """Read csv files of a table, facts table measures with spaces are
+        cleaned while reading (and string columns are read as categories if
+        categories_ratio is set), see :func:`read_csv_file`.
+
+        :param table_name: table name
+        :param files: files names, see :func:`get_csv_files`
+        :return: DataFrame (with id columns)
+        """
+        return concat_chunks(
+            [
+                read_csv_file(
+                    os.path.join(self.cube_path, file),
+                    sep=self.sep,
+                    clean_numbers=table_name == self.facts,
+                    categories_ratio=self.categories_ratio,
+                )
+                for file in files
+            ]
+        )
+
+    def read_tables(self) -> dict[str, pd.DataFrame]:
+        """Read all csv files of the cube, each file is read once and shared by
+        :func:`load_tables` and :func:`construct_star_schema`.
+
+        :return: tables dict with table name as key and dataframe (with id columns) as value
+        """
+        if self._tables is None:
+            self.tables_files = get_csv_files(self.cube_path)
+            self._tables = {
+                table_name: self.read_table_files(table_name, files)
+                for table_name, files in self.tables_files.items()
+            }
+        return self._tables
+
+    def read_new_files(self, table_name, files_read):
+        """Read files of a table added since the table was read.
+
+        :param table_name: table name
+        :param files_read: files already read
+        :return: (DataFrame of new rows (with id columns), None if there is no new
+            file, all table files)
+        """
+        files = get_csv_files(self.cube_path).get(table_name, [])
+        new_files = [file for file in files if file not in files_read]
+        if not new_files:
+            return None, files
+        return self.read_table_files(table_name, new_files), files
 
     def load_tables(self) -> dict[str, pd.DataFrame]:
         """Load tables from csv files.
 
         :return: tables dict with table name as key and dataframe as value
         """
-        tables = {}
-        for file in os.listdir(self.cube_path):
-            # to remove file extension ".csv"
-            table_name = os.path.splitext(file)[0]
-            value = pd.read_csv(os.path.join(self.cube_path, file), sep=self.sep)
-            tables[table_name] = value[
+        return {
+            table_name: value[
                 [col for col in value.columns if col.lower()[-3:] != "_id"]
             ]
-        return tables
+            for table_name, value in self.read_tables().items()
+        }
 
     def construct_star_schema(self, facts):
         """Construct star schema DataFrame from csv files.
@@ -30,13 +273,12 @@ class CubeLoader:
         :param facts: Facts table name
         :return: star schema DataFrame
         """
+        tables = self.read_tables()
         # loading facts table
-        df = pd.read_csv(os.path.join(self.cube_path, facts + ".csv"), sep=self.sep)
-        for file_name in os.listdir(self.cube_path):
+        df = tables[facts]
+        for table in tables.values():
             try:
-                df = df.merge(
-                    pd.read_csv(os.path.join(self.cube_path, file_name), sep=self.sep)
-                )
+                df = df.merge(table)
             except MergeError:
                 print("No common column")
 
@@ -0,0 +1,124 @@
+"""Columnar cube format: a cube folder with one Parquet (or Arrow IPC / Feather)
+file per table, plus a manifest::
+
+    ~/olapy-data/cubes/sales/
+        olapy-cube.json
+        Facts.parquet
+        Geography.parquet
+        ...
+
+with ``olapy-cube.json``::
+
+    {
+        "version": 1,
+        "format": "parquet",
+        "tables": {"Facts": "Facts.parquet", "Geography": "Geography.parquet", ...}
+    }
+
+Tables are stored with their ``_id`` columns and with the dtypes inferred from
+csv files, so a converted cube has the same star schema as the csv cube,
+without parsing any csv file when loading it.
+
+A csv cube is converted with :func:`convert_csv_cube`, or with the cli::
+
+    olapy convert ~/olapy-data/cubes/sales
+
+Needs pyarrow (``pip install olapy[columnar]``).
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from .cube_loader import CubeLoader
+
+MANIFEST_FILE_NAME = "olapy-cube.json"
+MANIFEST_VERSION = 1
+
+FILE_FORMATS = {
+    "parquet": (".parquet", pd.read_parquet),
+    "feather": (".feather", pd.read_feather),
+}
+
+
+def is_columnar_cube(cube_path):
+    """Check if a cube folder is in the columnar format.
+
+    :param cube_path: cube folder path
+    :return: True if the folder contains a cube manifest
+    """
+    return cube_path is not None and os.path.isfile(
+        os.path.join(cube_path, MANIFEST_FILE_NAME)
+    )
+
+
+def read_manifest(cube_path):
+    """Read the manifest of a columnar cube.
+
+    :param cube_path: cube folder path
+    :return: manifest dict
+    """
+    with open(os.path.join(cube_path, MANIFEST_FILE_NAME)) as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("format") not in FILE_FORMATS:
+        raise ValueError(
+            f"unsupported cube format {manifest.get('format')!r} in {cube_path}"
+        )
+    return manifest
+
+
+def convert_csv_cube(csv_cube_path, output_path=None, sep=";", file_format="parquet"):
+    """Convert a csv cube folder into the columnar format.
+
+    :param csv_cube_path: csv cube folder path
+    :param output_path: columnar cube folder path, Default csv_cube_path
+        (files are written next to csv files, the manifest takes over when
+        the cube is loaded)
+    :param sep: csv files separator
+    :param file_format: parquet (Default) or feather
+    :return: manifest dict
+    """
+    if is_columnar_cube(csv_cube_path):
+        raise ValueError(f"{csv_cube_path} is already a columnar cube")
+    extension, _ = FILE_FORMATS[file_format]
+    output_path = output_path or csv_cube_path
+    os.makedirs(output_path, exist_ok=True)
+
+    tables = {}
+    for table_name, df in CubeLoader(csv_cube_path, sep).read_tables().items():
+        file_name = table_name + extension
+        if file_format == "parquet":
+            df.to_parquet(os.path.join(output_path, file_name), index=False)
+        else:
+            df.to_feather(os.path.join(output_path, file_name))
+        tables[table_name] = file_name
+
+    manifest = {"version": MANIFEST_VERSION, "format": file_format, "tables": tables}
+    # manifest is written last, a partially converted folder is still a csv cube
+    # (csv loader only reads .csv files)
+    with open(os.path.join(output_path, MANIFEST_FILE_NAME), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    return manifest
+
+
+class CubeLoaderColumnar(CubeLoader):
+    """Load a cube stored in the columnar format, see :func:`convert_csv_cube`.
+
+    Tables order of the manifest is the csv files order, so that the star
+    schema columns are in the same order as the csv cube star schema.
+    """
+
+    def read_tables(self) -> dict[str, pd.DataFrame]:
+        """Read all tables files listed in the cube manifest, once.
+
+        :return: tables dict with table name as key and dataframe (with id columns) as value
+        """
+        if self._tables is None:
+            manifest = read_manifest(self.cube_path)
+            _, read_file = FILE_FORMATS[manifest["format"]]
+            self._tables = {
+                table_name: read_file(os.path.join(self.cube_path, file_name))
+                for table_name, file_name in manifest["tables"].items()
+            }
+        return self._tables
@@ -1,12 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Text
 
+import numpy as np
 import pandas as pd
-import pandas.io.sql as psql
 from pandas.errors import MergeError
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
 
 from ..tools.connection import get_dialect_name
-from . import CubeLoader
+from .cube_loader import CubeLoader  # pandas loader, even with pyspark
+
+MAX_WORKERS = 4
+FETCH_SIZE = 10000
 
 
 class CubeLoaderDB(CubeLoader):
@@ -15,37 +20,104 @@ class CubeLoaderDB(CubeLoader):
     <http://datawarehouse4u.info/Data-warehouse-schema-architecture-star-schema.html>`_.
     """
 
-    def __init__(self, sqla_engine):
+    def __init__(self, sqla_engine, max_workers=MAX_WORKERS):
         CubeLoader.__init__(self)
         self.sqla_engine = sqla_engine
+        self.max_workers = max_workers
 
-    def load_tables(self) -> dict[str, pd.DataFrame]:
-        """Load tables from database.
+    def get_tables_names(self):
+        """Get database tables names.
 
-        :return: tables dict with table name as key and dataframe as value
+        :return: list of tables names
         """
-
-        tables = {}
-        print("Connection string = " + str(self.sqla_engine))
-        inspector = inspect(self.sqla_engine)
+        tables_names = []
         dialect_name = get_dialect_name(str(self.sqla_engine))
-        for table_name in inspector.get_table_names():
+        for table_name in inspect(self.sqla_engine).get_table_names():
             if "oracle" in dialect_name and table_name.upper() == "FACTS":
                 table_name = table_name.title()
-            results = self.sqla_engine.execution_options(stream_results=True).execute(
+            tables_names.append(table_name)
+        return tables_names
+
+    def read_table(self, table_name):
+        """Read a table, rows are fetched by batches of FETCH_SIZE rows from a
+        streaming cursor, on a connection of the engine pool.
+
+        :param table_name: table name
+        :return: DataFrame (with id columns)
+        """
+        with self.sqla_engine.connect() as connection:
+            results = connection.execution_options(stream_results=True).execute(
                 f"SELECT * FROM {table_name}"
             )
-            # Fetch all the results of the query
-            df = pd.DataFrame(
-                iter(results), columns=results.keys()
-            )  # Pass results as an iterator
-            # with string_folding_wrapper we loose response time
-            # value = pd.DataFrame(string_folding_wrapper(results),columns=results.keys())
-            tables[table_name] = df[
-                [col for col in df.columns if col.lower()[-3:] != "_id"]
-            ]
-
-        return tables
+            columns = list(results.keys())
+            # one DataFrame per batch, rows of the whole table are never held
+            # as Python tuples (like pd.read_sql_query with chunksize)
+            chunks = []
+            batch = results.fetchmany(FETCH_SIZE)
+            while batch:
+                chunks.append(
+                    pd.DataFrame.from_records(batch, columns=columns, coerce_float=True)
+                )
+                batch = results.fetchmany(FETCH_SIZE)
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        if len(chunks) == 1:
+            return chunks[0]
+        return pd.concat(chunks, ignore_index=True)
+
+    def get_max_workers(self):
+        """Number of tables read concurrently: one if all connections of the
+        engine pool are the same connection (like sqlite in memory databases),
+        which can't be used by many threads at once.
+
+        :return: number of threads
+        """
+        if isinstance(self.sqla_engine.pool, (SingletonThreadPool, StaticPool)):
+            return 1
+        return self.max_workers
+
+    def read_tables(self) -> dict[str, pd.DataFrame]:
+        """Read all tables of the database (with id columns) concurrently,
+        each table is read once and shared by :func:`load_tables` and
+        :func:`construct_star_schema`.
+
+        :return: tables dict with table name as key and dataframe as value
+        """
+        if self._tables is None:
+            print("Connection string = " + str(self.sqla_engine))
+            tables_names = self.get_tables_names()
+            max_workers = min(self.get_max_workers(), len(tables_names))
+            if max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as thread_pool:
+                    tables = list(thread_pool.map(self.read_table, tables_names))
+            else:
+                tables = [self.read_table(table_name) for table_name in tables_names]
+            self._tables = dict(zip(tables_names, tables))
+        return self._tables
+
+    def read_new_rows(self, table_name, column, high_water_mark):
+        """Read rows added to a table since it was read, rows are new if their
+        column value is above the high water mark (an auto incremented id, an
+        insertion date...).
+
+        :param table_name: table name
+        :param column: column of the high water mark
+        :param high_water_mark: max column value of rows already read, None to
+            read all rows
+        :return: (DataFrame of new rows (with id columns), None if there is no new
+            row, new high water mark)
+        """
+        query = f"SELECT * FROM {table_name}"
+        params = None
+        if not pd.isnull(high_water_mark):
+            query += f" WHERE {column} > :high_water_mark"
+            if isinstance(high_water_mark, np.generic):
+                high_water_mark = high_water_mark.item()
+            params = {"high_water_mark": high_water_mark}
+        df = pd.read_sql_query(text(query), self.sqla_engine, params=params)
+        if df.empty:
+            return None, high_water_mark
+        return df, df[column].max()
 
     def construct_star_schema(self, facts):
         # type: (Text) -> pd.DataFrame
@@ -54,22 +126,11 @@ class CubeLoaderDB(CubeLoader):
         :param facts: Facts table name
         :return: star schema DataFrame
         """
-
-        df = psql.read_sql_query(f"SELECT * FROM {facts}", self.sqla_engine)
-        inspector = inspect(self.sqla_engine)
-
-        for db_table_name in inspector.get_table_names():
-            # try:
-            #     db_table_name = str(db_table_name)
-            # except Exception:
-            #     if isinstance(db_table_name, Iterable):
-            #         db_table_name = db_table_name[0]
+        tables = self.read_tables()
+        df = tables[facts]
+        for db_table_name, table in tables.items():
             try:
-                df = df.merge(
-                    psql.read_sql_query(
-                        f"SELECT * FROM {db_table_name}", self.sqla_engine
-                    )
-                )
+                df = df.merge(table)
             except MergeError:
                 print(f"No common column between {facts} and {db_table_name}")
 
@@ -10,32 +10,79 @@ Those two objects are constructed in three ways:
     - manually with a config file, see :mod:`cube_loader_custom`
     - automatically from csv files, if they respect olapy's
       `start schema model <http://datawarehouse4u.info/Data-warehouse-schema-architecture-star-schema.html>`_,
-      see :mod:`cube_loader`
+      see :mod:`cube_loader`, or from their Parquet / Arrow conversion, see :mod:`cube_loader_columnar`
     - automatically from database, also if they respect the start schema model, see :mod:`cube_loader_db`
 """
 
+import copy
 import itertools
+import logging
 import os
+import threading
 from collections import OrderedDict
+from contextlib import contextmanager
 from os.path import expanduser
-from typing import Any, List
+from typing import Any, List, Optional
 
 import numpy as np
 import pandas as pd
-from attrs import define, field
+from attrs import define, evolve, field
+from pandas.errors import MergeError
 
 from olapy.core.mdx.parser import MdxParser
 
+from .aggregates import AggregateStore
+from .cache import LRUCache, normalize_query
+from .context import Cube, FactsSource, QueryContext
+from .cube_loader import CATEGORIES_RATIO, CubeLoader, concat_chunks
+from .cube_loader_columnar import CubeLoaderColumnar, is_columnar_cube
+from .partitions import FactsPartitions
+from .registry import CubeRegistry
+from .snapshot import (
+    get_files_signature,
+    get_snapshot_source_key,
+    get_source_key,
+    get_tables_signature,
+    is_cube_snapshot,
+    load_cube_snapshot,
+    save_cube_snapshot,
+)
+from .star_join import StarJoin
+
 # Needed because SQLAlchemy doesn't work under pyiodide
 # FIXME: find another way
 try:
+    from sqlalchemy.exc import SQLAlchemyError
+
     from ..tools.connection import get_dialect, get_dialect_name
     from .cube_loader_custom import CubeLoaderCustom
     from .cube_loader_db import CubeLoaderDB
+    from .rolap import RolapSchema
 except ImportError:
     pass
 
 
+def _numbered_columns(columns):
+    """Number the occurrences of each column name, ``[a, b, a]`` gives
+    ``[(a, 0), (b, 0), (a, 1)]``.
+    """
+    occurrences = {}
+    numbered_columns = []
+    for column in columns:
+        occurrence = occurrences.get(column, 0)
+        occurrences[column] = occurrence + 1
+        numbered_columns.append((column, occurrence))
+    return numbered_columns
+
+
+def _downcast_codes(codes, members_count):
+    """Store levels codes (-1 for missing values) in the smallest signed
+    integer dtype for members_count members.
+    """
+    # codes are in [-1, members_count - 1]
+    return codes.astype(np.min_scalar_type(-max(members_count, 1)), copy=False)
+
+
 @define
 class MdxEngine:
     """The main class for executing a query.
@@ -47,17 +94,53 @@ class MdxEngine:
 
     :param cubes_folder: which is under olapy-data, and contains all csv cubes by default * ~/olapy-data/cubes/...
     :param olapy_data_location: olapy-data path
+    :param snapshots_folder: which is under olapy-data, and contains cubes snapshots,
+        see :func:`save_snapshot`
+    :param snapshot_cache: cache loaded cubes (star schema and tables) as snapshots
+        under olapy-data, reloading a cube whose source didn't change maps its
+        snapshot, see :func:`find_snapshot`, Default False
     :param cube_config: cube-config.yml parsing file result (dict for creating customized cube)
     :param sql_engine: sql_alchemy engine if you don't want to use any database config file
     :param source_type: source data input, Default csv
-    :param parser: mdx query parser
+    :param context: state of the executed query (parser, selected measures),
+        see :class:`QueryContext`
     :param facts:  facts table name, Default **Facts**
+    :param members_index: dimensions members index, see :func:`build_members_index`
+    :param factorize_levels: factorize star schema levels columns into integer codes
+        when loading the cube, used to filter the star schema (unless queries are
+        executed in the database, see rolap), Default True
+    :param categorical_levels: dictionary encode star schema and dimensions tables
+        levels columns as Categorical columns when loading the cube, see
+        :func:`encode_levels`, Default False
+    :param normalized_star_schema: keep the facts table and dimensions tables instead of
+        the denormalized star schema DataFrame, dimensions columns are joined when
+        a query uses them, see :class:`StarJoin`, Default False
+    :param rolap: execute queries on database cubes in the database (one SQL query
+        per MDX query) instead of the star schema DataFrame, see :mod:`rolap`,
+        Default False
+    :param rolap_schema: joins of the cube database tables, see :func:`get_rolap_schema`
+    :param refresh_column: facts table column of database cubes used as high water
+        mark to find facts rows appended since the cube was loaded (an auto
+        incremented id, an insertion date...), see :func:`refresh_cube`
+    :param facts_source: facts rows read from the cube source, see :func:`get_facts_source`
+    :param partition_level: partition star schema rows on this level (like 'year'),
+        tuples filtering the level are executed on the matching partition rows only,
+        see :class:`FactsPartitions`
+    :param partitions: star schema partitions, see :func:`build_partitions`
+    :param level_codes: star schema levels codes, see :func:`build_level_codes`
+    :param aggregates: pre-aggregated cuboids of the star schema, see :class:`AggregateStore`
+    :param result_cache: LRU cache of execute_mdx results and xmla responses,
+        cleared when the cube is (re)loaded, see :class:`LRUCache`
+    :param load_lock: lock held while (re)loading a cube shared between concurrent
+        requests, see :func:`for_request`
+    :param loaded_cube: read only snapshot of the loaded cube, see :func:`publish_cube`
+    :param registry: loaded cubes kept in memory, see :class:`CubeRegistry`
     """
 
     cube = field(default=None)
     facts: str = field(default="Facts")
     source_type: str = field(default="csv")
-    parser: MdxParser = field(factory=MdxParser)
+    context: QueryContext = field(factory=QueryContext)
     csv_files_cubes: list = field(factory=list)
     db_cubes: list = field(factory=list)
     sqla_engine = field(default=None)
@@ -70,8 +153,26 @@ class MdxEngine:
     tables_loaded = field(default=None)
     star_schema_dataframe = field(default=None)
     measures = field(default=None)
-    selected_measures = field(default=None)
     cubes_folder: str = field(default="cubes")
+    snapshots_folder: str = field(default="snapshots")
+    snapshot_cache: bool = field(default=False)
+    members_index = field(default=None)
+    factorize_levels: bool = field(default=True)
+    categorical_levels: bool = field(default=False)
+    normalized_star_schema: bool = field(default=False)
+    rolap: bool = field(default=False)
+    rolap_schema = field(default=None)
+    refresh_column: Optional[str] = field(default=None)
+    facts_source: Optional[FactsSource] = field(default=None)
+    partition_level: Optional[str] = field(default=None)
+    partitions: Optional[FactsPartitions] = field(default=None)
+    level_codes = field(default=None)
+    aggregates: AggregateStore = field(factory=AggregateStore)
+    result_cache: LRUCache = field(factory=LRUCache)
+    load_lock = field(factory=threading.RLock, eq=False, repr=False)
+    loaded_cube: Optional[Cube] = field(default=None, repr=False)
+    registry: CubeRegistry = field(factory=CubeRegistry, repr=False)
+    _cube_loader = field(default=None, init=False, repr=False)
 
     # @olapy_data_location.default
     # def get_default_cubes_directory(self):
@@ -82,6 +183,150 @@ class MdxEngine:
     #
     #     return home_directory
 
+    @property
+    def parser(self) -> MdxParser:
+        return self.context.parser
+
+    @parser.setter
+    def parser(self, parser):
+        self.context.parser = parser
+
+    @property
+    def selected_measures(self):
+        return self.context.selected_measures
+
+    @selected_measures.setter
+    def selected_measures(self, selected_measures):
+        self.context.selected_measures = selected_measures
+
+    def publish_cube(self):
+        """Snapshot the loaded cube into a read only :class:`Cube`, used by
+        the engines returned by :func:`for_request`, and keep it in the cubes
+        registry.
+
+        Called once the cube is completely loaded, so that concurrent requests
+        never see a partially (re)loaded cube.
+        """
+        self.loaded_cube = Cube(
+            name=self.cube,
+            facts=self.facts,
+            tables_loaded=self.tables_loaded,
+            star_schema_dataframe=self.star_schema_dataframe,
+            measures=self.measures,
+            default_measures=tuple(self.selected_measures or ()),
+            members_index=self.members_index,
+            level_codes=self.level_codes,
+            aggregates=self.aggregates,
+            sqla_engine=self.sqla_engine,
+            rolap_schema=self.rolap_schema,
+            facts_source=self.facts_source,
+            partitions=self.partitions,
+        )
+        self.registry.add(self.loaded_cube)
+
+    def _use_cube(self, cube):
+        """Set cube data from a published :class:`Cube`."""
+        self.cube = cube.name
+        self.facts = cube.facts
+        self.tables_loaded = cube.tables_loaded
+        self.star_schema_dataframe = cube.star_schema_dataframe
+        self.measures = cube.measures
+        self.members_index = cube.members_index
+        self.level_codes = cube.level_codes
+        self.aggregates = cube.aggregates
+        self.rolap_schema = cube.rolap_schema
+        self.facts_source = cube.facts_source
+        self.partitions = cube.partitions
+        if cube.sqla_engine is not None:
+            self.sqla_engine = cube.sqla_engine
+
+    def select_cube(self, cube_name):
+        """Switch to a cube of the registry, without loading it again.
+
+        :param cube_name: cube name
+        :return: True if the cube was in the registry, else False (the cube
+            must be loaded with :func:`load_cube`)
+        """
+        cube = self.registry.get(cube_name)
+        if cube is None:
+            return False
+        self._use_cube(cube)
+        self.selected_measures = list(cube.default_measures) or None
+        self.loaded_cube = cube
+        return True
+
+    def for_request(self, context=None, cube_name=None):
+        """Get an engine executing one request on a loaded cube.
+
+        The returned engine shares the published cube (see :func:`publish_cube`)
+        and caches, but has its own :class:`QueryContext`, so that concurrent
+        requests can be executed on the same loaded cube without locks.
+
+        :param context: query context, Default a new context selecting the
+            cube default measures
+        :param cube_name: execute the request on this cube, loaded (without
+            changing the current cube) if it isn't in the registry yet,
+            Default the current cube
+        :return: MdxEngine instance
+        :raises ValueError: if cube_name isn't a cube of the cubes folder,
+            databases or cube config
+        """
+        request_engine = copy.copy(self)
+        if hasattr(self, "__dict__"):
+            # attributes of subclasses which are not attrs classes (MdxEngineLite)
+            request_engine.__dict__.update(self.__dict__)
+        # loading the cube must not change the selected measures of self
+        request_engine.context = QueryContext()
+        cube = self.loaded_cube
+        if cube_name and (cube is None or cube.name != cube_name):
+            cube = self.registry.get(cube_name)
+            if cube is None:
+                cube = request_engine._load_request_cube(cube_name)
+        if cube is not None:
+            request_engine._use_cube(cube)
+            request_engine.loaded_cube = cube
+            default_measures = cube.default_measures
+        else:
+            default_measures = self.selected_measures
+        if context is None:
+            context = QueryContext(
+                selected_measures=list(default_measures) if default_measures else None
+            )
+        request_engine.context = context
+        return request_engine
+
+    def get_facts_table_name(self, cube_name):
+        """Get the facts table name of a cube: the cube config one, else
+        **Facts**.
+
+        :param cube_name: cube name
+        """
+        if self.cube_config and cube_name == self.cube_config["name"]:
+            return self.cube_config["facts"]["table_name"]
+        return "Facts"
+
+    def _load_request_cube(self, cube_name):
+        """Load a cube requested by :func:`for_request` in this request engine
+        (if another request didn't load it in the meantime), the cube is kept
+        in the registry.
+
+        :param cube_name: cube name
+        :return: :class:`Cube`
+        :raises ValueError: if the cube doesn't exist
+        """
+        with self.load_lock:
+            cube = self.registry.get(cube_name)
+            if cube is not None:
+                return cube
+            if cube_name not in self.get_cubes_names() and not (
+                self.cube_config and cube_name == self.cube_config["name"]
+            ):
+                raise ValueError(f"{cube_name} cube not found")
+            self.load_cube(
+                cube_name, fact_table_name=self.get_facts_table_name(cube_name)
+            )
+            return self.loaded_cube
+
     def _get_db_cubes_names(self):
         """Get databases cubes names."""
         # get databases names first , and them instantiate MdxEngine with this database, thus \
@@ -140,8 +385,153 @@ class MdxEngine:
         """
         self.cube = cube_name
         self.facts = fact_table_name
+        self.result_cache.clear()
+        self._cube_loader = None
         # load cubes names
         self.get_cubes_names()  # necessary, it fills csv_files_cubes and db_cubes
+        snapshot_path, source_key = self.find_snapshot(sep, measures)
+        if snapshot_path:
+            self.load_snapshot(snapshot_path, measures)
+        else:
+            self.load_cube_source(sep, measures)
+        self.rolap_schema = self.get_rolap_schema()
+        if self.tables_loaded:
+            self.members_index = self.build_members_index()
+            self.level_codes = self.build_level_codes()
+            self.partitions = self.build_partitions()
+            self.aggregates = self.aggregates.rebuild(
+                self.star_schema_dataframe, self.measures
+            )
+        self.publish_cube()
+        if source_key and self.tables_loaded:
+            self.save_snapshot_cache(source_key)
+
+    def find_snapshot(self, sep, measures=None):
+        """Find the snapshot to load the cube from: the cube snapshot (see
+        :func:`save_snapshot`), else the snapshot cache if it was built from
+        the current cube source.
+
+        :param sep: separator used in csv files
+        :param measures: measures passed to :func:`load_cube`
+        :return: (snapshot path, None) if a snapshot can be loaded,
+            (None, source key) if the snapshot cache must be (re)built,
+            (None, None) if snapshot_cache is disabled
+        """
+        if is_cube_snapshot(self.get_snapshot_path()):
+            return self.get_snapshot_path(), None
+        if not self.snapshot_cache:
+            return None, None
+
+        try:
+            source_key = self.get_source_key(sep, measures)
+        except SQLAlchemyError as error:
+            # the cube is loaded from its source, without snapshot cache
+            logging.warning("%s snapshot cache skipped: %s", self.cube, error)
+            return None, None
+        if get_snapshot_source_key(self.get_snapshot_cache_path()) == source_key:
+            return self.get_snapshot_cache_path(), None
+        return None, source_key
+
+    def get_source_key(self, sep, measures=None):
+        """Key of the current cube source, changes when cube files (names,
+        sizes, modification times) or database tables (names, rows counts)
+        change, see :mod:`snapshot`.
+
+        :param sep: separator used in csv files
+        :param measures: measures passed to :func:`load_cube`
+        :return: source key
+        """
+        signature = {
+            "cube": self.cube,
+            "facts": self.facts,
+            "sep": sep,
+            "measures": measures,
+            "cube_config": self.cube_config,
+        }
+        cube_path = self.get_cube_path()
+        if cube_path and os.path.isdir(cube_path):
+            signature["files"] = get_files_signature(cube_path)
+        if self.sqla_engine is not None and (
+            self.cube in self.db_cubes
+            or (self.cube_config and self.cube_config.get("source") == "db")
+        ):
+            signature["database"] = str(self.sqla_engine.url)
+            signature["tables"] = get_tables_signature(
+                self.sqla_engine, self.get_cube_tables_names()
+            )
+        return get_source_key(signature)
+
+    def get_cube_tables_names(self):
+        """Get the database tables of the cube: the cube config tables, else
+        all tables (database cubes are built with all tables of the database).
+
+        :return: list of tables names, None for all tables
+        """
+        if self.cube_config and self.cube == self.cube_config["name"]:
+            tables_names = [self.cube_config["facts"]["table_name"]] + [
+                dimension["name"] for dimension in self.cube_config["dimensions"]
+            ]
+            return list(OrderedDict.fromkeys(tables_names))
+        return None
+
+    def get_rolap_schema(self):
+        """Reflect the joins of the cube database tables, used to execute
+        queries in the database, see :class:`RolapSchema`.
+
+        :return: RolapSchema instance, None if rolap is disabled or if the cube
+            isn't loaded from a database
+        """
+        if not self.rolap or self.sqla_engine is None:
+            return None
+        cube_config = None
+        if (
+            self.cube_config
+            and self.cube_config["facts"]
+            and self.cube == self.cube_config["name"]
+        ):
+            if self.cube_config["source"].upper() == "CSV":
+                return None
+            cube_config = self.cube_config
+        elif self.cube not in self.db_cubes:
+            return None
+
+        try:
+            return RolapSchema.reflect(self.sqla_engine, self.facts, cube_config)
+        except SQLAlchemyError as error:
+            logging.warning(
+                "%s queries are not executed in database: %s", self.cube, error
+            )
+            return None
+
+    def get_snapshot_cache_path(self):
+        """Get path to the cube snapshot cache ( ~/olapy-data/cache/snapshots/{cube_name} ).
+
+        :return: path to the cube snapshot cache
+        """
+        return os.path.join(self.olapy_data_location, "cache", "snapshots", self.cube)
+
+    def save_snapshot_cache(self, source_key):
+        """Save the loaded cube as the snapshot cache, errors are only logged
+        (the cube is loaded anyway).
+
+        :param source_key: key of the cube source, see :func:`get_source_key`
+        """
+        try:
+            save_cube_snapshot(
+                self.loaded_cube, self.get_snapshot_cache_path(), source_key
+            )
+        except (OSError, TypeError, ValueError):
+            # concurrent saves of the same cube, read only olapy-data, columns
+            # values which can't be saved...
+            logging.exception("unable to save %s snapshot cache", self.cube)
+
+    def load_cube_source(self, sep, measures=None):
+        """Load tables, measures and star schema from the cube source (csv /
+        columnar files, database).
+
+        :param sep: separator used in csv files
+        :param measures: if you want to explicitly specify measures
+        """
         # load tables
         self.tables_loaded = self.load_tables(sep=sep)
         if measures:
@@ -154,6 +544,223 @@ class MdxEngine:
         # construct star_schema
         if self.tables_loaded:
             self.star_schema_dataframe = self.get_star_schema_dataframe(sep=sep)
+            if self.categorical_levels:
+                self.encode_levels()
+        self.facts_source = self.get_facts_source(self._cube_loader)
+        # release files / tables read by the loader
+        self._cube_loader = None
+
+    def get_facts_source(self, cube_loader):
+        """Get facts rows read from the cube source, see :class:`FactsSource`.
+
+        :param cube_loader: loader of the cube files / database tables
+        :return: FactsSource instance, None if the cube can't be refreshed
+            incrementally (custom, columnar and normalized cubes, database cubes
+            without refresh_column)
+        """
+        if cube_loader is None or not isinstance(
+            self.star_schema_dataframe, pd.DataFrame
+        ):
+            return None
+        tables = cube_loader.read_tables()
+        if self.facts not in tables:
+            return None
+
+        dimensions = {
+            table_name: df
+            for table_name, df in tables.items()
+            if table_name != self.facts
+        }
+        if hasattr(cube_loader, "read_new_rows"):
+            if self.refresh_column not in tables[self.facts].columns:
+                return None
+            return FactsSource(
+                dimensions=dimensions,
+                high_water_mark=tables[self.facts][self.refresh_column].max(),
+            )
+        if not cube_loader.tables_files.get(self.facts):
+            return None
+        return FactsSource(
+            dimensions=dimensions, files=tuple(cube_loader.tables_files[self.facts])
+        )
+
+    def refresh_cube(self, sep=";"):
+        """Append facts rows added to the cube source since the cube was loaded:
+        rows of new facts part files (see :func:`get_csv_files`), or facts table
+        rows above the refresh_column high water mark.
+
+        Only new facts rows are joined with dimensions tables (read when the cube
+        was loaded), and appended to the star schema, levels codes and cuboids.
+        Cubes which can't be refreshed incrementally (see :func:`get_facts_source`)
+        are reloaded.
+
+        example::
+
+            executor = MdxEngine(sqla_engine=engine, refresh_column='facts_id')
+            executor.load_cube('sales')
+            # ... rows are inserted in the facts table
+            executor.refresh_cube()
+
+        :param sep: separator used in csv files
+        :return: number of appended facts rows, None if the cube was reloaded
+        """
+        with self.load_lock:
+            if self.facts_source is None:
+                self.load_cube(
+                    self.cube,
+                    fact_table_name=self.facts,
+                    sep=sep,
+                    measures=self.measures,
+                )
+                return None
+
+            new_facts, facts_source = self.read_new_facts(sep)
+            if new_facts is None:
+                return 0
+
+            new_rows = self.join_new_facts(new_facts)
+            facts_df = self.tables_loaded[self.facts]
+            self.tables_loaded = {
+                **self.tables_loaded,
+                self.facts: concat_chunks(
+                    [facts_df, new_facts[list(facts_df.columns)]]
+                ),
+            }
+            rows_count = len(self.star_schema_dataframe)
+            self.star_schema_dataframe = concat_chunks(
+                [self.star_schema_dataframe, new_rows]
+            )
+            self.level_codes = self.append_level_codes(new_rows)
+            if self.partitions is not None:
+                self.partitions = self.partitions.append(new_rows, rows_count)
+            self.aggregates = self.aggregates.append(
+                self.star_schema_dataframe, new_rows
+            )
+            self.facts_source = facts_source
+            self.result_cache.clear()
+            self.publish_cube()
+            return len(new_facts)
+
+    def read_new_facts(self, sep):
+        """Read facts rows added to the cube source since they were read, see
+        :func:`refresh_cube`.
+
+        :param sep: separator used in csv files
+        :return: (new facts rows DataFrame (with id columns), None if there is no
+            new row, updated FactsSource)
+        """
+        if self.facts_source.files:
+            cube_loader = CubeLoader(
+                self.get_cube_path(),
+                sep,
+                facts=self.facts,
+                categories_ratio=self.get_csv_categories_ratio(),
+            )
+            new_facts, files = cube_loader.read_new_files(
+                self.facts, self.facts_source.files
+            )
+            return new_facts, evolve(self.facts_source, files=tuple(files))
+
+        new_facts, high_water_mark = CubeLoaderDB(self.sqla_engine).read_new_rows(
+            self.facts, self.refresh_column, self.facts_source.high_water_mark
+        )
+        return new_facts, evolve(self.facts_source, high_water_mark=high_water_mark)
+
+    def join_new_facts(self, new_facts):
+        """Join new facts rows with dimensions tables, like the star schema
+        (see :func:`CubeLoader.construct_star_schema`).
+
+        :param new_facts: new facts rows DataFrame (with id columns)
+        :return: new star schema rows DataFrame
+        """
+        df = new_facts
+        for table in self.facts_source.dimensions.values():
+            try:
+                df = df.merge(table)
+            except MergeError:
+                # no common column
+                pass
+        df = self.clean_data(df, self.measures)
+        return df[list(self.star_schema_dataframe.columns)]
+
+    def append_level_codes(self, new_rows):
+        """Levels codes of the star schema with appended rows (see
+        :func:`build_level_codes`), codes of new rows are appended to the star
+        schema codes, and new members get new codes.
+
+        :param new_rows: new star schema rows DataFrame, appended to the star schema
+        :return: dict with column name as key and (codes array, { member : code }) as value
+        """
+        if self.level_codes is None:
+            return None
+
+        level_codes = {}
+        for column, (codes, members) in self.level_codes.items():
+            values = self.star_schema_dataframe[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # categories of appended rows may change codes
+                level_codes[column] = (
+                    values.cat.codes.to_numpy(),
+                    {member: code for code, member in enumerate(values.cat.categories)},
+                )
+                continue
+
+            members = dict(members)
+            new_values = new_rows[column]
+            new_codes = pd.Index(list(members)).get_indexer(new_values)
+            unknown = (new_codes == -1) & new_values.notnull().to_numpy()
+            if unknown.any():
+                unknown_codes, unknown_members = pd.factorize(new_values[unknown])
+                first_code = len(members)
+                new_codes[unknown] = unknown_codes + first_code
+                for code, member in enumerate(unknown_members, first_code):
+                    members[member] = code
+            level_codes[column] = (
+                _downcast_codes(np.concatenate([codes, new_codes]), len(members)),
+                members,
+            )
+        return level_codes
+
+    def load_snapshot(self, snapshot_path, measures=None):
+        """Load tables, measures and star schema from a cube snapshot, see
+        :mod:`snapshot`.
+
+        :param snapshot_path: snapshot folder path
+        :param measures: if you want to explicitly specify measures
+        """
+        cube = load_cube_snapshot(snapshot_path)
+        self.facts_source = None
+        self.facts = cube.facts
+        self.tables_loaded = cube.tables_loaded
+        self.star_schema_dataframe = cube.star_schema_dataframe
+        if measures:
+            self.measures = measures
+            self.selected_measures = [measures[0]]
+        else:
+            self.measures = cube.measures
+            self.selected_measures = list(cube.default_measures) or None
+
+    def get_snapshot_path(self):
+        """Get path to the cube snapshot ( ~/olapy-data/snapshots/{cube_name} ).
+
+        :return: path to the cube snapshot
+        """
+        return os.path.join(self.olapy_data_location, self.snapshots_folder, self.cube)
+
+    def save_snapshot(self, snapshot_path=None):
+        """Save the loaded cube as a snapshot, next :func:`load_cube` calls
+        (in this process or others) will map it instead of reading the cube
+        source.
+
+        example::
+
+            executor = MdxEngine()
+            executor.load_cube('sales')
+            executor.save_snapshot()
+
+        :param snapshot_path: snapshot folder path, Default :func:`get_snapshot_path`
+        """
+        save_cube_snapshot(self.loaded_cube, snapshot_path or self.get_snapshot_path())
 
     def load_tables(self, sep: str) -> dict[str, pd.DataFrame]:
         """
@@ -182,7 +789,7 @@ class MdxEngine:
             dialect_name = get_dialect_name(str(self.sqla_engine))
             if "postgres" in dialect_name:
                 self.facts = self.facts.lower()
-            cube_loader = CubeLoaderDB(self.sqla_engine)
+            cube_loader = self.get_db_cube_loader()
         # if not tables:
         #     raise Exception(
         #         'unable to load tables, check that the database is not empty',
@@ -190,13 +797,64 @@ class MdxEngine:
         # elif self.cube in self.csv_files_cubes:
 
         else:
-            # force reimport CubeLoader every instance call (MdxEngine or SparkMdxEngine)
-            from . import CubeLoader
-
-            cube_loader = CubeLoader(cubes_folder_path, sep)
+            cube_loader = self.get_files_cube_loader(cubes_folder_path, sep)
 
         return cube_loader.load_tables()
 
+    def get_files_cube_loader(self, cube_path, sep):
+        """Get the loader of a cube stored in files (csv files, or columnar
+        files if the cube folder has a manifest, see :mod:`cube_loader_columnar`).
+
+        The same loader is returned until the end of :func:`load_cube`, so that
+        :func:`load_tables` and :func:`get_star_schema_dataframe` don't read
+        files twice.
+
+        :param cube_path: cube folder path
+        :param sep: csv files separator
+        :return: CubeLoader instance
+        """
+        cube_loader = self._cube_loader
+        if cube_loader is None or cube_loader.cube_path != cube_path:
+            if is_columnar_cube(cube_path):
+                cube_loader = CubeLoaderColumnar(cube_path)
+            else:
+                # force reimport CubeLoader every instance call (MdxEngine or SparkMdxEngine)
+                from . import CubeLoader
+
+                cube_loader = CubeLoader(
+                    cube_path,
+                    sep,
+                    facts=self.facts,
+                    categories_ratio=self.get_csv_categories_ratio(),
+                )
+            self._cube_loader = cube_loader
+        return cube_loader
+
+    def get_csv_categories_ratio(self):
+        """Csv files string columns are read as categories only if levels are
+        dictionary encoded (see :func:`encode_levels`).
+
+        :return: categories_ratio of :func:`read_csv_file`, None to read
+            string columns as objects
+        """
+        return CATEGORIES_RATIO if self.categorical_levels else None
+
+    def get_db_cube_loader(self):
+        """Get the loader of a database cube, like :func:`get_files_cube_loader`
+        the same loader is returned until the end of :func:`load_cube`, so that
+        tables are read once.
+
+        :return: CubeLoaderDB instance
+        """
+        cube_loader = self._cube_loader
+        if (
+            not isinstance(cube_loader, CubeLoaderDB)
+            or cube_loader.sqla_engine is not self.sqla_engine
+        ):
+            cube_loader = CubeLoaderDB(self.sqla_engine)
+            self._cube_loader = cube_loader
+        return cube_loader
+
     def get_measures(self):
         """:return: all numerical columns in Facts table."""
 
@@ -248,14 +906,12 @@ class MdxEngine:
         :param with_id_columns: start schema dataFrame contains id columns or not
         :return: star schema DataFrame
         """
-        # force reimport CubeLoader every instance call (MdxEngine or SparkMdxEngine)
-        from ..executor import CubeLoader
-
-        if (
+        custom_cube = (
             self.cube_config
             and self.cube_config["facts"]
             and self.cube == self.cube_config["name"]
-        ):
+        )
+        if custom_cube:
             self.facts = self.cube_config["facts"]["table_name"]
             # measures in config-file only
             if self.cube_config["facts"]["measures"]:
@@ -270,12 +926,16 @@ class MdxEngine:
             )
 
         elif self.cube in self.db_cubes:
-            cube_loader = CubeLoaderDB(self.sqla_engine)
+            cube_loader = self.get_db_cube_loader()
 
         # elif self.cube in self.csv_files_cubes:
         else:
-            cube_path = self.get_cube_path()
-            cube_loader = CubeLoader(cube_path)
+            cube_loader = self.get_files_cube_loader(self.get_cube_path(), sep)
+
+        if self.normalized_star_schema and not custom_cube:
+            star_join = self.get_star_join(cube_loader)
+            if star_join is not None:
+                return star_join
 
         fusion = cube_loader.construct_star_schema(self.facts)
         star_schema_df = self.clean_data(fusion, self.measures)
@@ -287,6 +947,170 @@ class MdxEngine:
             [col for col in fusion.columns if col.lower()[-3:] != "_id"]
         ]
 
+    def get_star_join(self, cube_loader):
+        """Build a normalized star schema, see :class:`StarJoin`.
+
+        :param cube_loader: CubeLoader instance, with tables read by its read_tables method
+        :return: StarJoin instance, None if the star schema can't be normalized
+        """
+        try:
+            star_join = StarJoin.build(cube_loader.read_tables(), self.facts)
+        except (KeyError, ValueError) as error:
+            logging.warning("%s star schema is not normalized: %s", self.cube, error)
+            return None
+        star_join.facts = self.clean_data(star_join.facts, self.measures)
+        return star_join
+
+    def build_members_index(self):
+        """Index all dimensions members, so that finding the column (level) of
+        a member is a dict lookup instead of a scan over all dimension columns.
+
+        Facts table is not indexed.
+
+        :return: dict with dimension name as key and { member : columns tuple } as value
+
+        example::
+
+            {
+            'Geography': {
+                'Europe': ('Continent',),
+                'France': ('Country',),
+                ...
+                },
+            ...
+            }
+        """
+        members_index = {}
+        for table_name, df in self.tables_loaded.items():
+            if table_name == self.facts or not isinstance(df, pd.DataFrame):
+                continue
+            dimension_index = {}  # type: dict
+            # columns order, first column is the highest level
+            for column in df.columns:
+                for member in df[column].dropna().unique():
+                    columns = dimension_index.get(member, ())
+                    dimension_index[member] = columns + (column,)
+            members_index[table_name] = dimension_index
+        return members_index
+
+    def get_levels_columns(self):
+        """:return: set of all dimensions columns (levels) names."""
+        return {
+            column
+            for table_name, df in self.tables_loaded.items()
+            if table_name != self.facts
+            for column in df.columns
+        }
+
+    def encode_levels(self):
+        """Dictionary encode all levels columns of the star schema DataFrame and
+        of dimensions tables as Categorical columns, with the same (sorted)
+        categories for a level in the star schema and in its table.
+
+        Each star schema row holds integer codes instead of references to
+        Python objects, and filters / group by on levels work on codes.
+        """
+        if not isinstance(self.star_schema_dataframe, pd.DataFrame):
+            return
+
+        star_schema_df = self.star_schema_dataframe
+        tables = {
+            table_name: df
+            for table_name, df in self.tables_loaded.items()
+            if table_name != self.facts
+        }
+        levels_dtypes = {}
+        for column in self.get_levels_columns():
+            if column not in star_schema_df.columns:
+                continue
+            categories = pd.Index(
+                pd.concat(
+                    [star_schema_df[column]]
+                    + [df[column] for df in tables.values() if column in df.columns]
+                ).unique()
+            ).dropna()
+            try:
+                categories = categories.sort_values()
+            except TypeError:
+                # mixed types, categories are in order of appearance
+                pass
+            levels_dtypes[column] = pd.CategoricalDtype(categories)
+
+        self.star_schema_dataframe = star_schema_df.astype(levels_dtypes)
+        for table_name, df in tables.items():
+            self.tables_loaded[table_name] = df.astype(
+                {
+                    column: dtype
+                    for column, dtype in levels_dtypes.items()
+                    if column in df.columns
+                }
+            )
+
+    def build_level_codes(self):
+        """Factorize all dimensions columns (levels) of the star schema
+        DataFrame into integer codes, so that filtering the star schema is a
+        NumPy comparison on codes instead of a comparison on objects.
+
+        Codes are stored in the smallest integer dtype, and they aren't built
+        when queries are executed in the cube database (see :func:`get_rolap_schema`).
+
+        :return: dict with column name as key and (codes array, { member : code }) as value,
+            None if factorize_levels is disabled
+        """
+        if (
+            not self.factorize_levels
+            or self.rolap_schema is not None
+            or not isinstance(self.star_schema_dataframe, pd.DataFrame)
+        ):
+            return None
+
+        levels = self.get_levels_columns()
+        level_codes = {}
+        for column in self.star_schema_dataframe.columns:
+            if column in levels:
+                values = self.star_schema_dataframe[column]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    # categorical codes are already levels codes (and they may be
+                    # memory mapped, see :mod:`snapshot`)
+                    codes = values.cat.codes.to_numpy()
+                    members = values.cat.categories
+                else:
+                    # missing values get -1 code
+                    codes, members = pd.factorize(values)
+                    codes = _downcast_codes(codes, len(members))
+                level_codes[column] = (
+                    codes,
+                    {member: code for code, member in enumerate(members)},
+                )
+        return level_codes
+
+    def build_partitions(self):
+        """Partition star schema rows on partition_level members, see
+        :class:`FactsPartitions`.
+
+        :return: FactsPartitions instance, None if partition_level is not set (or
+            isn't a star schema column)
+        """
+        if not self.partition_level or not isinstance(
+            self.star_schema_dataframe, pd.DataFrame
+        ):
+            return None
+        if self.partition_level not in self.star_schema_dataframe.columns:
+            logging.warning(
+                "%s star schema is not partitioned, no %s column",
+                self.cube,
+                self.partition_level,
+            )
+            return None
+        return FactsPartitions.build(self.star_schema_dataframe, self.partition_level)
+
+    def _get_dimension_index(self, dimension):
+        """Get members index of one dimension, None if the dimension is not
+        indexed."""
+        if self.members_index is None:
+            return None
+        return self.members_index.get(dimension)
+
     def get_all_tables_names(self, ignore_fact=False):
         """Get list of tables names.
 
@@ -327,14 +1151,14 @@ class MdxEngine:
 
         return list_measures
 
-    @staticmethod
-    def _df_column_values_exist(tupl, df):
+    def _df_column_values_exist(self, tupl, df):
         """for [Geography].[Geography].[Continent].[America].[Los Angeles]
         check if America exist in Country column and check if Los Angeles exist
         in City column ...
 
         :return:
         """
+        dimension_index = self._get_dimension_index(tupl[0])
         for idx, column_value in enumerate(tupl[2:]):
             # for numeric column values, pandas convert them to unicode, so try to convert to int
             # ( exple Time dimension, with Year column value 2010 -> 2010 unicode)
@@ -343,7 +1167,10 @@ class MdxEngine:
             except ValueError:
                 pass
 
-            if column_value not in df[df.columns[idx]].unique():
+            if dimension_index is None:
+                if column_value not in df[df.columns[idx]].unique():
+                    return False
+            elif df.columns[idx] not in dimension_index.get(column_value, ()):
                 return False
         return True
 
@@ -402,10 +1229,25 @@ class MdxEngine:
             column_from_value = self.tables_loaded[tupl[0]].columns[len(tupl[3:])]
             return df[(df[column_from_value] == tupl[-1])]
 
-    def _get_column_name_from_value(self, df, column_value):
-        for column in df.columns:
-            if column_value in df[column].unique():
-                return column
+    def _get_column_name_from_value(self, dimension, column_value):
+        """Get the first column (level) of a dimension which contains a member.
+
+        :param dimension: dimension name
+        :param column_value: member
+        :return: column name, None if the member doesn't exist
+        """
+        dimension_index = self._get_dimension_index(dimension)
+        if dimension_index is None:
+            df = self.tables_loaded[dimension]
+            for column in df.columns:
+                if column_value in df[column].unique():
+                    return column
+            return None
+
+        columns = dimension_index.get(column_value)
+        if columns:
+            return columns[0]
+        return None
 
     def execute_one_tuple(self, tuple_as_list, dataframe_in, columns_to_keep):
         """Filter a DataFrame (Dataframe_in) with one tuple.
@@ -444,31 +1286,78 @@ class MdxEngine:
         df = dataframe_in
         #  tuple_as_list like ['Geography','Geography','Continent']
         #  return df with Continent column non empty
-        # if len(tuple_as_list) == 3:
-        #     df = self._get_df_subset_from_tuple(df, tuple_as_list)
 
         # tuple_as_list like['Geography', 'Geography', 'Continent' , 'America','US']
         # execute : df[(df['Continent'] == 'America')] and
         #           df[(df['Country'] == 'US')]
-        # elif len(tuple_as_list) > 3:
-        for tup_att in tuple_as_list[2:]:
+        # all filters are combined into one mask, and applied once
+        mask = None
+        for column, member in self._get_tuple_filters(tuple_as_list, df.columns):
+            column_mask = self._get_filter_mask(df, column, member)
+            mask = column_mask if mask is None else mask & column_mask
+
+        if mask is not None:
+            df = df.take(np.flatnonzero(mask))
+
+        cols = list(itertools.chain.from_iterable(columns_to_keep))
+        return df[cols + self.selected_measures]
+
+    def _get_tuple_filters(self, tuple_as_list, columns):
+        """Convert a tuple to filters on DataFrame columns.
+
+        Example::
+
+            tuple = ['Geography','Geography','Continent','Europe','France']
 
+            out : [('Continent', None), ('Continent', 'Europe'), ('Country', 'France')]
+
+        :param tuple_as_list: tuple as list
+        :param columns: columns of the DataFrame to filter
+        :return: list of (column, member), member is None if the column must be not null
+        """
+        filters = []
+        for tup_att in tuple_as_list[2:]:
             # df[(df['Year'] == 2010)]
             # 2010 must be as int, otherwise , pandas generate exception
             if tup_att.isdigit():
                 tup_att = int(tup_att)
 
-            if tup_att in df.columns:
-                df = df[(df[tup_att].notnull())]
+            if tup_att in columns:
+                filters.append((tup_att, None))
             else:
                 # todo check ex time
                 column_from_value = self._get_column_name_from_value(
-                    self.tables_loaded[tuple_as_list[0]], tup_att
+                    tuple_as_list[0], tup_att
                 )
-                df = df[(df[column_from_value] == tup_att)]
+                filters.append((column_from_value, tup_att))
+        return filters
 
-        cols = list(itertools.chain.from_iterable(columns_to_keep))
-        return df[cols + self.selected_measures]
+    def _get_filter_mask(self, df, column, member):
+        """Boolean mask of df rows where column is equal to member (or not null
+        if member is None).
+
+        If df is the star schema DataFrame, the mask is computed with the
+        column integer codes (see :func:`build_level_codes`), and if it is a
+        normalized star schema, on dimension rows (see :class:`StarJoin`).
+        """
+        if isinstance(df, StarJoin):
+            return df.get_filter_mask(column, member)
+        if (
+            df is self.star_schema_dataframe
+            and self.level_codes
+            and column in self.level_codes
+        ):
+            codes, members = self.level_codes[column]
+            if member is None:
+                return codes != -1
+            code = members.get(member)
+            if code is None:
+                return np.zeros(len(codes), dtype=bool)
+            return codes == code
+
+        if member is None:
+            return df[column].notnull().to_numpy()
+        return (df[column] == member).to_numpy()
 
     @staticmethod
     def add_missed_column(dataframe1, dataframe2):
@@ -551,6 +1440,51 @@ class MdxEngine:
 
         return [df_with_less_columns, df_with_more_columns]
 
+    @staticmethod
+    def concat_dataframes(dataframes):
+        # type: (List[pd.DataFrame]) -> pd.DataFrame
+        """Concat many DataFrames with different columns in one step.
+
+        Like :func:`add_missed_column`, columns missing in a DataFrame are
+        filled with -1, but input DataFrames are not modified and all of
+        them are concatenated at once.
+
+        Columns of the result are the union of all columns, in order of
+        appearance. A column name repeated in a DataFrame is kept as many
+        times, its occurrences are aligned by position.
+
+        :param dataframes: List of Pandas DataFrame.
+        :return: a Pandas DataFrame.
+        """
+        if len(dataframes) == 1:
+            return dataframes[0]
+
+        # union of all (column, occurrence) pairs, in order of appearance
+        all_columns = list(
+            OrderedDict.fromkeys(
+                itertools.chain.from_iterable(
+                    _numbered_columns(df.columns) for df in dataframes
+                )
+            )
+        )
+        columns_names = [column for column, _ in all_columns]
+
+        chunks = []
+        for df in dataframes:
+            if list(df.columns) != columns_names:
+                positions = {
+                    column: position
+                    for position, column in enumerate(_numbered_columns(df.columns))
+                }
+                # the last column of the chunk holds the -1 fill value
+                df = pd.concat([df, pd.Series(-1, index=df.index)], axis=1)
+                df = df.iloc[
+                    :, [positions.get(column, -1) for column in all_columns]
+                ].set_axis(columns_names, axis=1)
+            chunks.append(df)
+
+        return pd.concat(chunks, sort=False)
+
     def update_columns_to_keep(self, tuple_as_list, columns_to_keep):
         """If we have multiple dimensions, with many columns like::
 
@@ -663,9 +1597,7 @@ class MdxEngine:
                 # if we change dimension , we have to work on the
                 # exection's result on previous DataFrames
 
-                df = df_to_fusion[0]
-                for next_df in df_to_fusion[1:]:
-                    df = pd.concat(self.add_missed_column(df, next_df))
+                df = self.concat_dataframes(df_to_fusion)
 
                 table_name = tupl[0]
                 df_to_fusion = []
@@ -685,9 +1617,92 @@ class MdxEngine:
         :return: a Pandas DataFrame.
         """
 
-        df = df_to_fusion[0]
-        for next_df in df_to_fusion[1:]:
-            df = pd.concat(self.add_missed_column(df, next_df), sort=False)
+        return self.concat_dataframes(df_to_fusion)
+
+    def _get_cuboid_dataframe(self, tuples_on_mdx_query, columns_to_keep):
+        """Execute tuples on a pre-aggregated cuboid instead of the star
+        schema, see :class:`AggregateStore`.
+
+        Only queries where each dimension is used by one tuple are answered
+        from cuboids (tuples of the same dimension are concatenated, not
+        intersected).
+
+        :param tuples_on_mdx_query: list of string of tuples.
+        :param columns_to_keep: (useful for executing many tuples, for instance execute_mdx).
+        :return: filtered cuboid DataFrame, None if no cuboid can answer the query
+        """
+        if not self.aggregates.is_active():
+            return None
+
+        dimensions = [tupl[0] for tupl in tuples_on_mdx_query]
+        if len(set(dimensions)) != len(dimensions):
+            return None
+
+        # columns_to_keep is updated only if the query is answered from a cuboid
+        cuboid_columns_to_keep = OrderedDict(columns_to_keep)
+        filters = []
+        for tupl in tuples_on_mdx_query:
+            self.update_columns_to_keep(tupl, cuboid_columns_to_keep)
+            filters += self._get_tuple_filters(tupl, self.star_schema_dataframe.columns)
+        if any(column is None for column, _ in filters):
+            return None
+
+        cols = list(itertools.chain.from_iterable(cuboid_columns_to_keep.values()))
+        used_columns = set(cols).union(column for column, _ in filters)
+        self.aggregates.record(used_columns)
+        cuboid = self.aggregates.find(used_columns, self.selected_measures)
+        if cuboid is None:
+            return None
+        columns_to_keep.update(cuboid_columns_to_keep)
+
+        mask = None
+        for column, member in filters:
+            column_mask = self._get_filter_mask(cuboid, column, member)
+            mask = column_mask if mask is None else mask & column_mask
+        if mask is not None:
+            cuboid = cuboid.take(np.flatnonzero(mask))
+
+        return cuboid[cols + self.selected_measures]
+
+    def _get_rolap_dataframe(self, tuples_on_mdx_query, columns_to_keep):
+        """Execute tuples in the cube database, see :mod:`rolap`.
+
+        Like cuboids, only queries where each dimension is used by one tuple
+        are executed in the database.
+
+        :param tuples_on_mdx_query: list of string of tuples.
+        :param columns_to_keep: (useful for executing many tuples, for instance execute_mdx).
+        :return: DataFrame grouped by columns to keep, None if the query can't
+            be executed in the database
+        """
+        if self.rolap_schema is None:
+            return None
+
+        dimensions = [tupl[0] for tupl in tuples_on_mdx_query]
+        if len(set(dimensions)) != len(dimensions):
+            return None
+
+        # columns_to_keep is updated only if the query is executed in the database
+        rolap_columns_to_keep = OrderedDict(columns_to_keep)
+        filters = []
+        for tupl in tuples_on_mdx_query:
+            self.update_columns_to_keep(tupl, rolap_columns_to_keep)
+            filters += self._get_tuple_filters(tupl, self.star_schema_dataframe.columns)
+        cols = list(itertools.chain.from_iterable(rolap_columns_to_keep.values()))
+        hierarchized = self.parser.hierarchized_tuples()
+        try:
+            df = self.rolap_schema.execute(
+                cols, filters, self.selected_measures, order=hierarchized
+            )
+        except (KeyError, SQLAlchemyError) as error:
+            # unknown members, columns which aren't in database tables...
+            logging.warning("query not executed in database: %s", error)
+            return None
+        if cols and not hierarchized:
+            # same groups order as the star schema groupby(sort=False): order of
+            # appearance in the star schema
+            df = self.star_schema_dataframe[cols].drop_duplicates().merge(df, on=cols)
+        columns_to_keep.update(rolap_columns_to_keep)
         return df
 
     def check_nested_select(self):
@@ -707,6 +1722,19 @@ class MdxEngine:
         :return: a list of Pandas DataFrame.
         """
         dfs = []
+        for transformed_tuple_groups in self._get_nested_tuples_groups():
+            dfs.append(
+                self.tuples_to_dataframes(transformed_tuple_groups, columns_to_keep)[0]
+            )
+
+        return dfs
+
+    def _get_nested_tuples_groups(self):
+        """Get tuples groups of a nested select query (without measures).
+
+        :return: list of groups, each group is a list of tuples as lists
+        """
+        groups = []
         grouped_tuples = self.parser.get_nested_select()
         for tuple_groupe in grouped_tuples:
             transformed_tuple_groups = []
@@ -716,12 +1744,80 @@ class MdxEngine:
                 tuple[-1] = tuple[-1].replace("]", "")
                 if tuple[0].upper() != "MEASURES":
                     transformed_tuple_groups.append(tuple)
+            groups.append(transformed_tuple_groups)
+        return groups
+
+    def get_partitions_rows(self, tuples_on_mdx_query):
+        """Get rows of the partitions which can match the query, see
+        :class:`FactsPartitions`.
+
+        Tuples of the same dimension are concatenated, and tuples of different
+        dimensions are intersected (see :func:`tuples_to_dataframes`), so if all
+        tuples of a dimension filter the partition level, only rows of their
+        partitions can match. Tuples groups of nested selects are concatenated
+        (see :func:`nested_tuples_to_dataframes`), so each group must filter the
+        partition level.
+
+        :param tuples_on_mdx_query: list of tuples, sorted by dimension
+        :return: sorted array of rows positions, None if any row can match
+        """
+        if self.partitions is None:
+            return None
+
+        columns = self.star_schema_dataframe.columns
+        if self.check_nested_select():
+            return self.partitions.get_union_rows(
+                [
+                    [
+                        tuple_filter
+                        for tupl in tuples_group
+                        for tuple_filter in self._get_tuple_filters(tupl, columns)
+                    ]
+                    for tuples_group in self._get_nested_tuples_groups()
+                ]
+            )
 
-            dfs.append(
-                self.tuples_to_dataframes(transformed_tuple_groups, columns_to_keep)[0]
+        for _, tuples in itertools.groupby(tuples_on_mdx_query, key=lambda x: x[0]):
+            rows = self.partitions.get_union_rows(
+                [self._get_tuple_filters(tupl, columns) for tupl in tuples]
             )
+            if rows is not None:
+                return rows
+        return None
 
-        return dfs
+    @contextmanager
+    def select_partitions(self, rows):
+        """Execute tuples on some rows of the star schema only (rows of the
+        partitions matching the query, see :func:`get_partitions_rows`).
+
+        Rows order is kept, so results are the same as with the whole star schema.
+
+        example::
+
+            with self.select_partitions(self.get_partitions_rows(tuples)):
+                dfs = self.tuples_to_dataframes(tuples, columns_to_keep)
+
+        :param rows: sorted array of rows positions, None for all rows
+        """
+        if rows is None:
+            yield
+            return
+
+        star_schema_dataframe, level_codes = (
+            self.star_schema_dataframe,
+            self.level_codes,
+        )
+        self.star_schema_dataframe = star_schema_dataframe.take(rows)
+        if level_codes:
+            self.level_codes = {
+                column: (codes[rows], members)
+                for column, (codes, members) in level_codes.items()
+            }
+        try:
+            yield
+        finally:
+            self.star_schema_dataframe = star_schema_dataframe
+            self.level_codes = level_codes
 
     def clean_mdx_query(self, mdx_query):
         try:
@@ -756,6 +1852,18 @@ class MdxEngine:
             }
         """
         query = self.clean_mdx_query(mdx_query)
+        # without measures in the query, the result depends on previous selected measures
+        cache_key = (
+            "execute_mdx",
+            self.cube,
+            normalize_query(query),
+            tuple(self.selected_measures or ()),
+        )
+        cached_result = self.result_cache.get(cache_key)
+        if cached_result is not None:
+            execution_result, self.selected_measures = cached_result
+            return dict(execution_result)
+
         # use measures that exists on where or insides axes
         query_axes = self.parser.decorticate_query(query)
         if self.change_measures(query_axes["all"]):
@@ -782,21 +1890,49 @@ class MdxEngine:
         if tuples_on_mdx_query:
 
             if self.check_nested_select():
-                df_to_fusion = self.nested_tuples_to_dataframes(columns_to_keep)
+                with self.select_partitions(
+                    self.get_partitions_rows(tuples_on_mdx_query)
+                ):
+                    df = self.fusion_dataframes(
+                        self.nested_tuples_to_dataframes(columns_to_keep)
+                    )
             else:
-                df_to_fusion = self.tuples_to_dataframes(
-                    tuples_on_mdx_query, columns_to_keep
-                )
-            df = self.fusion_dataframes(df_to_fusion)
+                df = self._get_rolap_dataframe(tuples_on_mdx_query, columns_to_keep)
+                if df is None:
+                    df = self._get_cuboid_dataframe(
+                        tuples_on_mdx_query, columns_to_keep
+                    )
+                if df is None:
+                    with self.select_partitions(
+                        self.get_partitions_rows(tuples_on_mdx_query)
+                    ):
+                        df = self.fusion_dataframes(
+                            self.tuples_to_dataframes(
+                                tuples_on_mdx_query, columns_to_keep
+                            )
+                        )
 
             cols = list(itertools.chain.from_iterable(columns_to_keep.values()))
             sort = self.parser.hierarchized_tuples()
             # margins=True for columns total !!!!!
-            result = df.groupby(cols, sort=sort).sum()[self.selected_measures]
+            result = df.groupby(cols, sort=sort, observed=True).sum()[
+                self.selected_measures
+            ]
+            if sort and not result.index.is_monotonic_increasing:
+                # with observed=True, categorical keys (see :mod:`snapshot`) are
+                # not sorted by groupby
+                result = result.sort_index()
 
         else:
-            result = (
-                self.star_schema_dataframe[self.selected_measures].sum().to_frame().T
-            )
+            result = self._get_rolap_dataframe([], OrderedDict())
+            if result is None:
+                result = (
+                    self.star_schema_dataframe[self.selected_measures]
+                    .sum()
+                    .to_frame()
+                    .T
+                )
 
-        return {"result": result, "columns_desc": tables_n_columns}
+        execution_result = {"result": result, "columns_desc": tables_n_columns}
+        self.result_cache.set(cache_key, (execution_result, self.selected_measures))
+        return dict(execution_result)
@@ -48,6 +48,7 @@ class MdxEngineLite(MdxEngine):
             if sql_alchemy_uri provided
         """
         self.cube = table_or_file
+        self.result_cache.clear()
         if self.sqla_engine:
             self.tables_loaded = self.load_tables_from_db()
         else:
@@ -60,6 +61,9 @@ class MdxEngineLite(MdxEngine):
         self.tables_loaded[table_name] = self.tables_loaded[table_name].drop(
             self.measures, axis=1
         )
+        self.members_index = self.build_members_index()
+        self.level_codes = self.build_level_codes()
+        self.publish_cube()
 
     def get_measures(self):
         """
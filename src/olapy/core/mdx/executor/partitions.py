@@ -0,0 +1,102 @@
+"""Star schema facts partitions, keyed on a dimension level.
+
+Facts rows are partitioned on the members of one level (the year, the month,
+the country...), each partition is the positions of its rows in the star
+schema DataFrame::
+
+    executor = MdxEngine(partition_level='year')
+    executor.load_cube('sales')
+
+    executor.partitions.rows :
+
+        {2022: array([0, 1, 2, ...]), 2023: array([58, 59, ...])}
+
+If each result row of a query must match a tuple filtering the partition
+level (on axes or in the WHERE slicer, like ``[time].[time].[year].[2023]``),
+the query is executed only on the rows of the matching partitions, instead of
+the whole star schema, see :func:`MdxEngine.select_partitions`.
+
+Partitions are built when the cube is loaded, whatever the cube format, a csv
+cube facts table may be stored as a folder of files (one file per month for
+instance), see :func:`get_csv_files`.
+"""
+
+import numpy as np
+import pandas as pd
+from attrs import frozen
+
+NO_ROWS = np.array([], dtype=np.intp)
+
+
+@frozen
+class FactsPartitions:
+    """Star schema rows positions by member of the partition level.
+
+    :param level: partition level column name
+    :param rows: dict of member and sorted array of rows positions
+    """
+
+    level: str
+    rows: dict
+
+    @classmethod
+    def build(cls, star_schema_dataframe, level):
+        """Partition star schema rows.
+
+        :param star_schema_dataframe: star schema DataFrame
+        :param level: partition level column name
+        :return: FactsPartitions instance (rows with missing level values are
+            in no partition)
+        """
+        codes, members = pd.factorize(star_schema_dataframe[level])
+        order = np.argsort(codes, kind="stable")
+        # bounds of each member rows in codes order (missing values are -1, first)
+        bounds = np.searchsorted(codes[order], np.arange(len(members) + 1))
+        return cls(
+            level=level,
+            rows={
+                member: order[bounds[code] : bounds[code + 1]]
+                for code, member in enumerate(members)
+            },
+        )
+
+    def get_rows(self, filters):
+        """Get rows of the partition matching filters.
+
+        :param filters: list of (column, member), see :func:`MdxEngine._get_tuple_filters`
+        :return: sorted array of rows positions, None if filters don't filter
+            the partition level
+        """
+        for column, member in filters:
+            if column == self.level and member is not None:
+                return self.rows.get(member, NO_ROWS)
+        return None
+
+    def get_union_rows(self, filters_list):
+        """Get rows of the partitions matching any of filters_list.
+
+        :param filters_list: list of filters, see :func:`get_rows`
+        :return: sorted array of rows positions, None if one of the filters
+            doesn't filter the partition level
+        """
+        rows = [self.get_rows(filters) for filters in filters_list]
+        if not rows or any(positions is None for positions in rows):
+            return None
+        if len(rows) == 1:
+            return rows[0]
+        return np.unique(np.concatenate(rows))
+
+    def append(self, new_rows, offset):
+        """Build partitions of the star schema with appended rows.
+
+        :param new_rows: new star schema rows DataFrame
+        :param offset: position of the first new row in the star schema
+        :return: new FactsPartitions instance
+        """
+        rows = dict(self.rows)
+        new_partitions = FactsPartitions.build(new_rows, self.level)
+        for member, positions in new_partitions.rows.items():
+            rows[member] = np.concatenate(
+                [rows.get(member, NO_ROWS), positions + offset]
+            )
+        return FactsPartitions(level=self.level, rows=rows)
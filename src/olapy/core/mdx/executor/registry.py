@@ -0,0 +1,104 @@
+"""Loaded cubes kept in memory, shared by all sessions of an
+:class:`MdxEngine`.
+
+Switching to a cube already in the registry (see :func:`MdxEngine.select_cube`)
+doesn't read csv files / database tables, nor rebuild the star schema.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from attrs import define, field
+
+from .cache import get_size
+from .context import Cube
+
+
+def get_cube_size(cube):
+    """Approximate memory used by a cube in bytes (tables, star schema and
+    cuboids).
+
+    :param cube: :class:`Cube` instance
+    :return: size in bytes
+    """
+    materialized = cube.aggregates.materialized if cube.aggregates else {}
+    return get_size(
+        [cube.tables_loaded or {}, cube.star_schema_dataframe, materialized]
+    )
+
+
+@define
+class CubeRegistry:
+    """Loaded cubes by name, least recently used cubes are evicted once
+    max_size is reached.
+
+    Example::
+
+        executor = MdxEngine(registry=CubeRegistry(max_size=2 * 1024**3))
+
+    :param max_size: max memory (bytes) used by all cubes, None (Default) for no limit,
+        the last added cube is never evicted
+    :param cubes: dict of cube name and :class:`Cube`
+    :param sizes: dict of cube name and cube size
+    """
+
+    max_size: Optional[int] = field(default=None)
+    cubes: OrderedDict = field(factory=OrderedDict)
+    sizes: dict = field(factory=dict)
+    lock = field(factory=threading.Lock, eq=False, repr=False)
+
+    def __contains__(self, cube_name):
+        return cube_name in self.cubes
+
+    def __len__(self):
+        return len(self.cubes)
+
+    @property
+    def current_size(self):
+        return sum(self.sizes.values())
+
+    def get(self, cube_name):
+        # type: (str) -> Optional[Cube]
+        """Get a loaded cube, and mark it as the most recently used.
+
+        :param cube_name: cube name
+        :return: :class:`Cube`, None if the cube is not loaded
+        """
+        with self.lock:
+            cube = self.cubes.get(cube_name)
+            if cube is not None:
+                self.cubes.move_to_end(cube_name)
+            return cube
+
+    def add(self, cube):
+        """Add (or replace) a loaded cube, and evict the least recently used
+        cubes until all cubes fit max_size.
+
+        :param cube: :class:`Cube` instance
+        """
+        size = get_cube_size(cube) if self.max_size is not None else 0
+        with self.lock:
+            self.cubes[cube.name] = cube
+            self.cubes.move_to_end(cube.name)
+            self.sizes[cube.name] = size
+            while self.max_size is not None and len(self.cubes) > 1:
+                if sum(self.sizes.values()) <= self.max_size:
+                    break
+                evicted_name, _ = self.cubes.popitem(last=False)
+                del self.sizes[evicted_name]
+
+    def remove(self, cube_name):
+        """Remove a cube (to reload it for instance).
+
+        :param cube_name: cube name
+        """
+        with self.lock:
+            self.cubes.pop(cube_name, None)
+            self.sizes.pop(cube_name, None)
+
+    def clear(self):
+        """Remove all cubes."""
+        with self.lock:
+            self.cubes.clear()
+            self.sizes.clear()
@@ -0,0 +1,147 @@
+"""ROLAP execution of MDX queries on database cubes.
+
+Instead of filtering and grouping the star schema DataFrame, a query is
+translated to one SQL query, executed by the cube database::
+
+    SELECT geography.country AS country, coalesce(sum(facts.amount), 0) AS amount
+    FROM facts JOIN geography ON geography.geography_id = facts.geography_id
+    WHERE geography.continent = 'Europe' AND geography.country IS NOT NULL
+    GROUP BY geography.country
+    ORDER BY geography.country
+
+Joins are reflected from the database once the cube is loaded (see
+:func:`RolapSchema.reflect`), the same way the star schema DataFrame is built:
+
+    - like :class:`CubeLoaderDB`, each table is inner joined to the facts table
+      (and previously joined tables) on their common columns
+    - like :class:`CubeLoaderCustom`, dimensions tables are left joined on the
+      facts keys of the cube config, with renamed columns
+
+Rows of hierarchized queries are ordered by levels columns, and like the
+star schema DataFrame groupby, rows with null levels are ignored.
+"""
+
+import pandas as pd
+from attrs import define, field
+from sqlalchemy import MetaData, Table, and_, func, inspect, select
+
+
+def _add_table_columns(columns, table, names=None):
+    """Add columns of a joined table to star schema columns, columns
+    already in the star schema get a _y suffix (like DataFrame.merge).
+
+    :param columns: dict of star schema column name and table column
+    :param table: sqlalchemy Table
+    :param names: dict of table column name and star schema column name
+    """
+    for column in table.columns:
+        name = (names or {}).get(column.name) or column.name
+        if name in columns:
+            name += "_y"
+        columns.setdefault(name, column)
+
+
+@define
+class RolapSchema:
+    """Star schema of a database cube, as SQL joins.
+
+    :param sqla_engine: sql_alchemy engine of the cube database
+    :param from_clause: facts table joined with dimensions tables
+    :param columns: dict of star schema column name and table column
+    """
+
+    sqla_engine = field(repr=False)
+    from_clause = field(repr=False)
+    columns: dict = field(factory=dict, repr=False)
+
+    @classmethod
+    def reflect(cls, sqla_engine, facts, cube_config=None):
+        """Reflect database tables and their joins.
+
+        :param sqla_engine: sql_alchemy engine
+        :param facts: facts table name
+        :param cube_config: cube-config.yml parsing file result, to join tables
+            like :class:`CubeLoaderCustom`, Default join all tables on their
+            common columns like :class:`CubeLoaderDB`
+        :return: RolapSchema instance
+        """
+        metadata = MetaData()
+        facts_table = Table(facts, metadata, autoload_with=sqla_engine)
+        from_clause = facts_table
+        columns = {}
+        _add_table_columns(columns, facts_table)
+
+        if cube_config:
+            renames = {
+                dimension["name"]: dimension["columns"]
+                for dimension in cube_config["dimensions"]
+            }
+            for fact_key, dimension_and_key in cube_config["facts"]["keys"].items():
+                table_name, key = dimension_and_key.split(".")
+                table = Table(table_name, metadata, autoload_with=sqla_engine)
+                from_clause = from_clause.outerjoin(
+                    table, facts_table.c[fact_key] == table.c[key]
+                )
+                _add_table_columns(columns, table, renames.get(table_name))
+        else:
+            for table_name in inspect(sqla_engine).get_table_names():
+                if table_name == facts:
+                    continue
+                table = Table(table_name, metadata, autoload_with=sqla_engine)
+                keys = [column for column in table.columns if column.name in columns]
+                if not keys:
+                    # no common column, the table is not joined
+                    continue
+                from_clause = from_clause.join(
+                    table, and_(*[columns[key.name] == key for key in keys])
+                )
+                _add_table_columns(columns, table)
+
+        return cls(sqla_engine=sqla_engine, from_clause=from_clause, columns=columns)
+
+    def get_query(self, levels, filters, measures, order=True):
+        """Build the SQL query of an MDX query.
+
+        :param levels: levels columns to group by
+        :param filters: list of (column, member), member is None if the column
+            must be not null, see :func:`MdxEngine._get_tuple_filters`
+        :param measures: measures columns to sum
+        :param order: order rows by levels columns, Default True
+        :return: sqlalchemy Select
+        :raise KeyError: if a column isn't in the star schema
+        """
+        levels_columns = [self.columns[level] for level in levels]
+        conditions = [column.isnot(None) for column in levels_columns]
+        for column, member in filters:
+            if member is None:
+                conditions.append(self.columns[column].isnot(None))
+            else:
+                conditions.append(self.columns[column] == member)
+
+        query = select(
+            *[column.label(level) for level, column in zip(levels, levels_columns)],
+            *[
+                func.coalesce(func.sum(self.columns[measure]), 0).label(measure)
+                for measure in measures
+            ],
+        ).select_from(self.from_clause)
+        if conditions:
+            query = query.where(and_(*conditions))
+        if levels_columns:
+            query = query.group_by(*levels_columns)
+            if order:
+                query = query.order_by(*levels_columns)
+        return query
+
+    def execute(self, levels, filters, measures, order=True):
+        """Execute an MDX query in the database.
+
+        :param levels: levels columns to group by
+        :param filters: list of (column, member), see :func:`get_query`
+        :param measures: measures columns to sum
+        :param order: order rows by levels columns, Default True
+        :return: DataFrame with levels and measures columns, one row per group
+        """
+        return pd.read_sql_query(
+            self.get_query(levels, filters, measures, order), self.sqla_engine
+        )
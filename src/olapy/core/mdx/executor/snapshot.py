@@ -0,0 +1,334 @@
+"""Loaded cube snapshot, stored as memory mapped column files.
+
+A snapshot is a folder with one NumPy ``.npy`` file per column of the star
+schema and of the cube tables, plus a manifest::
+
+    ~/olapy-data/snapshots/sales/
+        olapy-snapshot.json
+        star_schema/0.npy
+        star_schema/1.npy
+        star_schema/1.categories.json
+        star_schema/2.npy
+        star_schema/2.categories.npy
+        ...
+        tables/0/0.npy
+        ...
+
+Numeric and datetime columns are saved as they are (tz-aware datetimes in
+UTC), other columns as categorical codes, and their categories in a json file
+(strings) or a ``.npy`` file (numbers, dates).
+
+Loading a snapshot opens column files with ``mmap_mode='r'`` and builds
+DataFrames on top of them without copying, so:
+
+    - loading a cube doesn't parse / merge / clean anything, whatever the
+      cube size
+    - all processes (see runserver ``--server_mode processes``) loading the
+      same snapshot share the same page cache copy of the data, instead of
+      each one holding its own copy of the star schema
+
+Columns are read only, the cube must not be modified once loaded (as any
+:class:`Cube`).
+
+A snapshot saved with :func:`MdxEngine.save_snapshot` isn't updated when the
+cube source changes, save it again after changing csv files / database tables.
+
+Snapshots are also used as a star schema cache (see ``MdxEngine.snapshot_cache``),
+the cache snapshot has the key of the cube source it was built from (see
+:func:`get_source_key`), and is rebuilt when the source key changes.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .context import Cube
+
+SNAPSHOT_MANIFEST_NAME = "olapy-snapshot.json"
+SNAPSHOT_VERSION = 1
+
+
+def is_cube_snapshot(snapshot_path):
+    """Check if a folder contains a cube snapshot.
+
+    :param snapshot_path: snapshot folder path
+    :return: True if the folder has a snapshot manifest
+    """
+    return snapshot_path is not None and os.path.isfile(
+        os.path.join(snapshot_path, SNAPSHOT_MANIFEST_NAME)
+    )
+
+
+def get_files_signature(folder):
+    """Name, size and modification time of all files of a folder (cube csv /
+    columnar files).
+
+    :param folder: folder path
+    :return: list of [file name, size, mtime]
+    """
+    signature = []
+    for file_name in sorted(os.listdir(folder)):
+        stat = os.stat(os.path.join(folder, file_name))
+        signature.append([file_name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def get_tables_signature(sqla_engine, tables_names=None):
+    """Name and rows count of the tables of a cube database.
+
+    Rows counts don't see updated rows, clear the snapshot cache (or
+    :func:`MdxEngine.save_snapshot`) after updating existing rows.
+
+    :param sqla_engine: sql_alchemy engine
+    :param tables_names: cube tables names, Default all tables of the database
+    :return: list of [table name, rows count]
+    """
+    from sqlalchemy import func, inspect, select, table
+
+    if tables_names is None:
+        tables_names = inspect(sqla_engine).get_table_names()
+    signature = []
+    for table_name in sorted(tables_names):
+        rows_count = sqla_engine.execute(
+            select(func.count()).select_from(table(table_name))
+        ).scalar()
+        signature.append([table_name, rows_count])
+    return signature
+
+
+def get_source_key(signature):
+    """Hash a cube source signature (files / tables signatures, load_cube
+    parameters).
+
+    :param signature: json serializable signature
+    :return: hex digest
+    """
+    return hashlib.sha1(
+        json.dumps(signature, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def get_snapshot_source_key(snapshot_path):
+    """Get the source key of a cached snapshot.
+
+    :param snapshot_path: snapshot folder path
+    :return: source key, None if there is no snapshot
+    """
+    if not is_cube_snapshot(snapshot_path):
+        return None
+    with open(os.path.join(snapshot_path, SNAPSHOT_MANIFEST_NAME)) as f:
+        return json.load(f).get("source_key")
+
+
+def _get_datetime_array(values):
+    """Get the datetime64[ns] array of datetime values, tz-aware values are
+    converted to UTC (datetime64 arrays can't hold a tz).
+
+    :param values: datetime Series or Index
+    :return: (datetime64[ns] array, tz name or None)
+    """
+    values = pd.DatetimeIndex(values)
+    if values.tz is None:
+        return values.to_numpy(), None
+    return values.tz_convert("UTC").tz_localize(None).to_numpy(), str(values.tz)
+
+
+def _save_categories(categories, folder, idx):
+    """Save the categories of a categorical column.
+
+    Strings (and other json values) are saved as a json file, numeric and
+    datetime categories as a .npy file, datetime.date categories as a
+    datetime64[D] .npy file, so that loaded categories have the same type.
+
+    :param categories: categories Index
+    :param folder: columns files folder
+    :param idx: column position
+    :return: categories description of the column manifest
+    :raise TypeError: if categories can't be saved (mixed types...)
+    """
+    categories_desc = {"categories_type": None, "tz": None}
+    if categories.dtype.kind == "M":
+        values, categories_desc["tz"] = _get_datetime_array(categories)
+    elif categories.dtype.kind in "biufcm":
+        values = categories.to_numpy()
+    elif len(categories) and all(type(value) is date for value in categories):
+        values = np.array(list(categories), dtype="datetime64[D]")
+        categories_desc["categories_type"] = "date"
+    else:
+        categories_desc["categories"] = f"{idx}.categories.json"
+        with open(os.path.join(folder, categories_desc["categories"]), "w") as f:
+            json.dump(categories.tolist(), f)
+        return categories_desc
+
+    categories_desc["categories"] = f"{idx}.categories.npy"
+    np.save(os.path.join(folder, categories_desc["categories"]), values)
+    return categories_desc
+
+
+def _load_categories(folder, column_desc):
+    """Load the categories of a categorical column, see :func:`_save_categories`.
+
+    :param folder: columns files folder
+    :param column_desc: column manifest
+    :return: categories list or Index
+    """
+    categories_file = os.path.join(folder, column_desc["categories"])
+    if categories_file.endswith(".json"):
+        with open(categories_file) as f:
+            return json.load(f)
+    values = np.load(categories_file)
+    if column_desc.get("categories_type") == "date":
+        return pd.Index(values.astype(object), dtype=object)
+    if column_desc.get("tz"):
+        return pd.DatetimeIndex(values).tz_localize("UTC").tz_convert(column_desc["tz"])
+    return pd.Index(values)
+
+
+def _save_dataframe(df, folder):
+    """Save each column of df as a .npy file.
+
+    Datetime columns (and object columns of datetime values) are saved as
+    datetime64[ns] arrays, in UTC with their tz in the manifest if they are
+    tz-aware, so they are memory mapped like numeric columns.
+
+    :param df: DataFrame
+    :param folder: columns files folder
+    :return: DataFrame manifest, with columns names and files
+    :raise TypeError: if a column can't be saved
+    """
+    os.makedirs(folder, exist_ok=True)
+    columns = []
+    for idx, column in enumerate(df.columns):
+        values = df[column]
+        column_desc = {"name": column, "file": f"{idx}.npy", "categories": None}
+        if values.dtype.kind == "O" and pd.api.types.infer_dtype(
+            values, skipna=True
+        ) in ("datetime", "datetime64"):
+            values = pd.to_datetime(values)
+        if values.dtype.kind == "M":
+            array, column_desc["tz"] = _get_datetime_array(values)
+        else:
+            if values.dtype.kind not in "biufcm":
+                values = values.astype("category")
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                column_desc.update(_save_categories(values.cat.categories, folder, idx))
+                values = values.cat.codes
+            array = values.to_numpy()
+        np.save(os.path.join(folder, column_desc["file"]), array, allow_pickle=False)
+        columns.append(column_desc)
+    return {"columns": columns}
+
+
+def _load_dataframe(folder, manifest, mmap_mode):
+    """Build a DataFrame on top of columns files, without copying them.
+
+    :param folder: columns files folder
+    :param manifest: DataFrame manifest (see :func:`_save_dataframe`)
+    :param mmap_mode: np.load mmap_mode
+    :return: DataFrame
+    """
+    columns = {}
+    for column_desc in manifest["columns"]:
+        values = np.load(os.path.join(folder, column_desc["file"]), mmap_mode=mmap_mode)
+        if column_desc["categories"]:
+            values = pd.Categorical.from_codes(
+                values, categories=_load_categories(folder, column_desc)
+            )
+        elif column_desc.get("tz"):
+            values = pd.arrays.DatetimeArray(
+                values, dtype=pd.DatetimeTZDtype(tz=column_desc["tz"])
+            )
+        columns[column_desc["name"]] = values
+    # copy=False keeps one block per column, views on memory mapped files
+    return pd.DataFrame(columns, copy=False)
+
+
+def save_cube_snapshot(cube, snapshot_path, source_key=None):
+    """Save a loaded cube as a snapshot.
+
+    The snapshot is written in a temporary folder which then replaces the
+    previous snapshot, files of the previous snapshot still memory mapped by
+    running processes are not overwritten.
+
+    :param cube: :class:`Cube` instance
+    :param snapshot_path: snapshot folder path
+    :param source_key: key of the cube source, see :func:`get_source_key`
+    """
+    tmp_path = f"{snapshot_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    try:
+        _write_snapshot(cube, tmp_path, source_key)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    old_path = f"{snapshot_path}.old-{os.getpid()}"
+    if os.path.exists(snapshot_path):
+        os.rename(snapshot_path, old_path)
+    os.rename(tmp_path, snapshot_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def _write_snapshot(cube, snapshot_path, source_key):
+    """Write star schema, tables columns files and the manifest."""
+    tables = {}
+    for idx, (table_name, df) in enumerate(cube.tables_loaded.items()):
+        tables[table_name] = _save_dataframe(
+            df, os.path.join(snapshot_path, "tables", str(idx))
+        )
+        tables[table_name]["folder"] = os.path.join("tables", str(idx))
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "source_key": source_key,
+        "name": cube.name,
+        "facts": cube.facts,
+        "measures": list(cube.measures or []),
+        "default_measures": list(cube.default_measures),
+        "star_schema": _save_dataframe(
+            cube.star_schema_dataframe, os.path.join(snapshot_path, "star_schema")
+        ),
+        "tables": tables,
+    }
+    with open(os.path.join(snapshot_path, SNAPSHOT_MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f)
+
+
+def load_cube_snapshot(snapshot_path, mmap_mode="r"):
+    """Load a cube snapshot.
+
+    :param snapshot_path: snapshot folder path
+    :param mmap_mode: np.load mmap_mode, 'r' (Default) to memory map columns
+        files, None to read them in memory
+    :return: :class:`Cube` instance (without members index, levels codes and cuboids)
+    """
+    with open(os.path.join(snapshot_path, SNAPSHOT_MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"unsupported snapshot version {manifest.get('version')!r} in {snapshot_path}"
+        )
+
+    return Cube(
+        name=manifest["name"],
+        facts=manifest["facts"],
+        tables_loaded={
+            table_name: _load_dataframe(
+                os.path.join(snapshot_path, table_manifest["folder"]),
+                table_manifest,
+                mmap_mode,
+            )
+            for table_name, table_manifest in manifest["tables"].items()
+        },
+        star_schema_dataframe=_load_dataframe(
+            os.path.join(snapshot_path, "star_schema"),
+            manifest["star_schema"],
+            mmap_mode,
+        ),
+        measures=manifest["measures"],
+        default_measures=tuple(manifest["default_measures"]),
+    )
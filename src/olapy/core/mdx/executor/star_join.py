@@ -0,0 +1,197 @@
+"""Normalized (lazily joined) star schema.
+
+The denormalized star schema DataFrame (see
+:func:`MdxEngine.get_star_schema_dataframe`) repeats all dimensions columns on
+each facts row, its width grows with every level of every dimension.
+
+A :class:`StarJoin` keeps instead the facts columns, the (small) dimensions
+tables, and for each dimension the position of the dimension row of each
+facts row::
+
+    facts :                 Geography :             Geography positions :
+
+    +--------+--------+     +-----------+---------+     +---+
+    | Amount | Count  |     | Continent | Country |     | 1 |
+    +========+========+     +===========+=========+     +---+
+    | 35150  | 160    |     | America   | US      |     | 0 |
+    +--------+--------+     +-----------+---------+     +---+
+    | 41239  | 98     |     | Europe    | France  |
+    +--------+--------+     +-----------+---------+
+
+Filters on levels are computed on dimensions rows, then mapped to facts rows
+through positions (see :func:`StarJoin.get_filter_mask`), and only the
+columns used by a query are joined (see :func:`StarJoin.__getitem__`).
+
+Only star schemas where each dimension table is joined to the facts table
+(inner join on their common columns, like :func:`CubeLoader.construct_star_schema`)
+with unique keys are supported.
+"""
+
+import numpy as np
+import pandas as pd
+from attrs import define, field
+
+
+def _get_keys_index(keys_df):
+    """Index of join keys values (MultiIndex if there are many keys)."""
+    if len(keys_df.columns) > 1:
+        return pd.MultiIndex.from_frame(keys_df)
+    return pd.Index(keys_df.iloc[:, 0])
+
+
+@define
+class StarJoin:
+    """Star schema with dimensions joined on demand.
+
+    :param facts: facts DataFrame (without keys and id columns)
+    :param dimensions: dict of dimension name and dimension DataFrame (without keys)
+    :param positions: dict of dimension name and positions of dimensions rows
+        for each facts row
+    :param columns_dimensions: dict of level column name and dimension name
+    """
+
+    facts: pd.DataFrame = field()
+    dimensions: dict = field(factory=dict)
+    positions: dict = field(factory=dict)
+    columns_dimensions: dict = field(factory=dict)
+
+    @classmethod
+    def build(cls, tables, facts):
+        """Build a StarJoin from tables with their keys columns.
+
+        :param tables: dict of table name and DataFrame (with id columns)
+        :param facts: facts table name
+        :return: StarJoin instance
+        :raise ValueError: if the star schema can't be joined lazily
+            (snowflake schema, duplicated dimensions keys)
+        """
+        facts_df = tables[facts]
+        joined_columns = set(facts_df.columns)
+        dimensions, positions, columns_dimensions = {}, {}, {}
+        # facts rows of the star schema, in the star schema order
+        rows = np.arange(len(facts_df))
+        for table_name, df in tables.items():
+            if table_name == facts:
+                continue
+            keys = [column for column in df.columns if column in joined_columns]
+            if not keys:
+                # no common column, the table is not joined
+                continue
+            if any(key not in facts_df.columns for key in keys):
+                raise ValueError(f"{table_name} is not joined to {facts} table")
+            dimension_index = _get_keys_index(df[keys])
+            if not dimension_index.is_unique:
+                raise ValueError(f"{table_name} keys are not unique")
+            facts_keys = _get_keys_index(facts_df[keys].take(rows))
+            table_positions = dimension_index.get_indexer(facts_keys)
+            # like DataFrame.merge (inner join), facts rows without dimension
+            # row are dropped, and rows are grouped by keys in order of appearance
+            matched = np.flatnonzero(table_positions != -1)
+            codes, _ = facts_keys.take(matched).factorize()
+            order = matched[np.argsort(codes, kind="stable")]
+            rows = rows[order]
+            positions = {name: pos[order] for name, pos in positions.items()}
+            positions[table_name] = table_positions[order]
+
+            dimension_columns = [
+                column
+                for column in df.columns
+                if column not in keys and column.lower()[-3:] != "_id"
+            ]
+            dimensions[table_name] = df[dimension_columns].reset_index(drop=True)
+            joined_columns.update(df.columns)
+            for column in dimension_columns:
+                columns_dimensions[column] = table_name
+
+        facts_df = facts_df[
+            [column for column in facts_df.columns if column.lower()[-3:] != "_id"]
+        ].take(rows)
+        return cls(
+            facts=facts_df.reset_index(drop=True),
+            dimensions=dimensions,
+            positions=positions,
+            columns_dimensions=columns_dimensions,
+        )
+
+    @property
+    def columns(self):
+        return self.facts.columns.append(
+            pd.Index(
+                [
+                    column
+                    for column in self.columns_dimensions
+                    if column not in self.facts.columns
+                ]
+            )
+        )
+
+    def __len__(self):
+        return len(self.facts)
+
+    def get_column(self, column):
+        """Get one column, joined from its dimension if it is a level.
+
+        :param column: column name
+        :return: Series
+        """
+        if column in self.facts.columns:
+            return self.facts[column]
+        dimension = self.columns_dimensions[column]
+        values = self.dimensions[dimension][column].take(self.positions[dimension])
+        return values.set_axis(self.facts.index)
+
+    def __getitem__(self, columns):
+        """Get a column as Series, or a list of columns as DataFrame (only
+        these columns are joined)."""
+        if isinstance(columns, list):
+            return pd.DataFrame(
+                {column: self.get_column(column) for column in columns},
+                index=self.facts.index,
+                columns=columns,
+            )
+        return self.get_column(columns)
+
+    def take(self, rows):
+        """Select facts rows.
+
+        :param rows: rows positions
+        :return: StarJoin instance
+        """
+        return StarJoin(
+            facts=self.facts.take(rows),
+            dimensions=self.dimensions,
+            positions={name: pos[rows] for name, pos in self.positions.items()},
+            columns_dimensions=self.columns_dimensions,
+        )
+
+    def get_filter_mask(self, column, member):
+        """Boolean mask of facts rows where column is equal to member (or not
+        null if member is None), computed on the dimension rows.
+
+        :param column: column name
+        :param member: member, None to keep not null values
+        :return: boolean array
+        """
+        if column in self.facts.columns:
+            values = self.facts[column]
+            positions = None
+        else:
+            dimension = self.columns_dimensions[column]
+            values = self.dimensions[dimension][column]
+            positions = self.positions[dimension]
+
+        if member is None:
+            mask = values.notnull().to_numpy()
+        else:
+            mask = (values == member).to_numpy()
+        if positions is None:
+            return mask
+        return mask[positions]
+
+    def memory_usage(self):
+        """:return: memory used in bytes."""
+        return int(
+            self.facts.memory_usage(deep=True).sum()
+            + sum(df.memory_usage(deep=True).sum() for df in self.dimensions.values())
+            + sum(pos.nbytes for pos in self.positions.values())
+        )
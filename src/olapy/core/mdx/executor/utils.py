@@ -77,6 +77,7 @@ def inject_dataframes(
     mdx_engine, dataframes, facts_table_name="Facts", cube_name="sales"
 ):
     mdx_engine.csv_files_cubes.append(cube_name)
+    mdx_engine.result_cache.clear()
 
     mdx_engine.cube = cube_name
     mdx_engine.facts = facts_table_name
@@ -96,3 +97,9 @@ def inject_dataframes(
         mdx_engine.star_schema_dataframe = _get_star_schema_dataframe(
             dataframes, mdx_engine
         )
+        mdx_engine.members_index = mdx_engine.build_members_index()
+        mdx_engine.level_codes = mdx_engine.build_level_codes()
+        mdx_engine.aggregates = mdx_engine.aggregates.rebuild(
+            mdx_engine.star_schema_dataframe, mdx_engine.measures
+        )
+    mdx_engine.publish_cube()
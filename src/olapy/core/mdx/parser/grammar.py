@@ -0,0 +1,697 @@
+"""Tokenizer and recursive descent parser for MDX queries.
+
+The query is scanned once by :func:`tokenize` (every token pattern is a
+simple, non backtracking regex), then :class:`GrammarParser` builds an
+abstract syntax tree from the tokens::
+
+    WITH MEMBER [Measures].[Double] AS '[Measures].[Amount] * 2'
+    SELECT NON EMPTY {[Geography].[Geography].[Continent].Members} ON COLUMNS,
+           {[Measures].[Double]} ON ROWS
+    FROM [sales]
+    WHERE ([Time].[Time].[Year].[2010])
+
+gives::
+
+    Query(
+        with_members=(WithMember(kind='MEMBER', name=MemberPath(...), ...),),
+        axes=(Axis(number=0, non_empty=True, expression=SetExpression(...)),
+              Axis(number=1, ...)),
+        cube=MemberPath(names=('sales',)),
+        where=TupleExpression(items=(MemberPath(...),)),
+        cell_properties=(),
+    )
+"""
+
+import re
+from typing import NamedTuple, Optional, Tuple, Union
+
+from attrs import frozen
+
+# flake8: noqa W605
+
+# [name] or &[key], "]]" escapes "]" (unrolled, so that a name is matched by
+# one character class loop instead of one alternation per character)
+NAME_PATTERN = r"&?\[[^\]]*(?:\]\][^\]]*)*\]"
+NAME_REGEX = re.compile(r"&?\[([^\]]*(?:\]\][^\]]*)*)\]")
+
+TOKEN_SPECIFICATION = [
+    ("COMMENT", r"--[^\n]*|//[^\n]*|/\*.*?\*/"),
+    # a whole member path ([a].[b].&[c]) is one token
+    ("MEMBER", rf"{NAME_PATTERN}(?:\s*\.\s*{NAME_PATTERN})*"),
+    ("STRING", r"'[^']*(?:''[^']*)*'|\"[^\"]*(?:\"\"[^\"]*)*\""),
+    ("NUMBER", r"\d+(?:\.\d*)?(?:[eE][+-]?\d+)?"),
+    ("IDENTIFIER", r"[^\W\d]\w*"),
+    ("OPERATOR", r"<>|<=|>=|[-+*/^<>=:]"),
+    ("PUNCTUATION", r"[(){},.]"),
+    ("MISMATCH", r"."),
+]
+
+# leading whitespaces are skipped by each match
+TOKEN_REGEX = re.compile(
+    r"\s*(?:"
+    + "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPECIFICATION)
+    + r")",
+    re.DOTALL,
+)
+
+# words which end an axis / slicer expression
+CLAUSE_KEYWORDS = {
+    "ON",
+    "FROM",
+    "WHERE",
+    "CELL",
+    "DIMENSION",
+    "PROPERTIES",
+    "SELECT",
+    "WITH",
+    "MEMBER",
+    "SET",
+    "AS",
+}
+
+AXIS_NAMES = {"COLUMNS": 0, "ROWS": 1, "PAGES": 2, "SECTIONS": 3, "CHAPTERS": 4}
+
+BINARY_OPERATORS = {
+    ":": 1,
+    "OR": 2,
+    "XOR": 2,
+    "AND": 3,
+    "=": 4,
+    "<>": 4,
+    "<": 4,
+    ">": 4,
+    "<=": 4,
+    ">=": 4,
+    "+": 5,
+    "-": 5,
+    "*": 6,
+    "/": 6,
+    "^": 7,
+}
+
+
+class Token(NamedTuple):
+    """MDX query token.
+
+    :param kind: token kind (MEMBER, STRING, NUMBER, IDENTIFIER, OPERATOR, PUNCTUATION)
+    :param value: token text
+    :param position: token offset in the query
+    """
+
+    kind: str
+    value: str
+    position: int
+
+
+def tokenize(query):
+    """Split an MDX query into tokens, in one pass.
+
+    example::
+
+        input : 'SELECT {[Measures].[Amount]} ON 0'
+
+        output : [Token('IDENTIFIER', 'SELECT', 0), Token('PUNCTUATION', '{', 7),
+                  Token('MEMBER', '[Measures].[Amount]', 8), ...]
+
+    :param query: MDX query
+    :return: list of :class:`Token` (comments and whitespaces are skipped)
+    """
+    tokens = []
+    append = tokens.append
+    for match in TOKEN_REGEX.finditer(query.rstrip()):
+        kind = match.lastgroup
+        if kind == "COMMENT":
+            continue
+        # the token group (groups are looked up faster by index than by name)
+        group = match.lastindex
+        if kind == "MISMATCH":
+            raise SyntaxError(
+                f"Unexpected character {match.group(group)!r} at position {match.start(group)}"
+            )
+        append(Token(kind, match.group(group), match.start(group)))
+    return tokens
+
+
+@frozen
+class MemberPath:
+    """Dotted member / level / hierarchy name, like
+    ``[Geography].[Geography].[Continent].[Europe]``.
+
+    :param names: path items without brackets (``&[key]`` items are kept as plain names)
+    """
+
+    names: Tuple[str, ...]
+
+
+@frozen
+class Identifier:
+    """Bare word, like ``PARENT_UNIQUE_NAME`` or ``INCLUDE_CALC_MEMBERS``.
+
+    :param name: identifier
+    """
+
+    name: str
+
+
+@frozen
+class Literal:
+    """String or number.
+
+    :param value: literal value (unquoted string, int or float)
+    """
+
+    value: Union[str, int, float]
+
+
+@frozen
+class FunctionCall:
+    """Function call, like ``Hierarchize({...})``, or method call, like
+    ``[Geography].[Geography].[Continent].Members``.
+
+    :param name: function name
+    :param args: function arguments (None for empty arguments), the object is
+        the first argument of a method call
+    :param method: True for method calls (``object.Name`` or ``object.Name(args)``)
+    """
+
+    name: str
+    args: tuple
+    method: bool = False
+
+
+@frozen
+class SetExpression:
+    """``{item, item...}``
+
+    :param items: set items
+    """
+
+    items: tuple
+
+
+@frozen
+class TupleExpression:
+    """``(item, item...)``
+
+    :param items: tuple items
+    """
+
+    items: tuple
+
+
+@frozen
+class UnaryOperation:
+    """``-x``, ``NOT x`` or ``NON EMPTY x``.
+
+    :param operator: operator
+    :param operand: operand
+    """
+
+    operator: str
+    operand: object
+
+
+@frozen
+class BinaryOperation:
+    """``x + y``, ``x : y``, ``x AND y``...
+
+    :param operator: operator
+    :param left: left operand
+    :param right: right operand
+    """
+
+    operator: str
+    left: object
+    right: object
+
+
+@frozen
+class WithMember:
+    """Calculated member or named set, defined in the WITH clause.
+
+    :param kind: MEMBER or SET
+    :param name: calculated member / set name
+    :param expression: calculation (quoted calculations are parsed too)
+    :param properties: tuple of (property name, expression), like SOLVE_ORDER = 1
+    """
+
+    kind: str
+    name: MemberPath
+    expression: object
+    properties: tuple = ()
+
+
+@frozen
+class Axis:
+    """Query axis, like ``NON EMPTY {...} DIMENSION PROPERTIES ... ON COLUMNS``.
+
+    :param number: axis number (COLUMNS = 0, ROWS = 1...)
+    :param expression: axis set expression
+    :param non_empty: True if NON EMPTY is used
+    :param properties: dimension properties
+    """
+
+    number: int
+    expression: object
+    non_empty: bool = False
+    properties: tuple = ()
+
+
+@frozen
+class Query:
+    """MDX SELECT statement.
+
+    :param with_members: WITH clause calculated members / sets
+    :param axes: query axes
+    :param cube: cube name, or sub select :class:`Query`
+    :param where: slicer expression, None without WHERE clause
+    :param cell_properties: cell properties names
+    """
+
+    with_members: Tuple[WithMember, ...]
+    axes: Tuple[Axis, ...]
+    cube: Union[MemberPath, "Query"]
+    where: Optional[object] = None
+    cell_properties: tuple = ()
+
+    def get_axis(self, number):
+        """Get query axis by number.
+
+        :param number: axis number (COLUMNS = 0, ROWS = 1...)
+        :return: :class:`Axis`, None if the query has not this axis
+        """
+        for axis in self.axes:
+            if axis.number == number:
+                return axis
+        return None
+
+
+def iter_member_paths(node):
+    """Iterate (depth first, in source order) over all member paths of an
+    AST node.
+
+    :param node: AST node (or tuple of nodes)
+    :return: generator of :class:`MemberPath`
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, MemberPath):
+            yield node
+        elif isinstance(node, tuple):
+            stack.extend(reversed(node))
+        elif node is not None and hasattr(node, "__attrs_attrs__"):
+            stack.extend(
+                reversed(
+                    [
+                        getattr(node, attribute.name)
+                        for attribute in node.__attrs_attrs__
+                    ]
+                )
+            )
+
+
+def _unquote(token):
+    quote = token.value[0]
+    return token.value[1:-1].replace(quote * 2, quote)
+
+
+def _split_member(token):
+    value = token.value
+    names = value[1:-1].split("].[")
+    # names can't contain "]", else there are escaped brackets, keys or spaces
+    # around dots ([a] . &[b]])
+    if "]" in "".join(names) or "&" in value:
+        return tuple(name.replace("]]", "]") for name in NAME_REGEX.findall(value))
+    return tuple(names)
+
+
+class GrammarParser:
+    """Recursive descent parser, build a :class:`Query` from an MDX query.
+
+    Example::
+
+        query = GrammarParser('SELECT {[Measures].[Amount]} ON 0 FROM [sales]').parse()
+
+    :param query: MDX query
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.tokens = tokenize(query)
+        self.position = 0
+
+    # tokens helpers
+
+    def _peek(self, offset=0):
+        index = self.position + offset
+        if index < len(self.tokens):
+            return self.tokens[index]
+        return None
+
+    def _error(self, expected):
+        token = self._peek()
+        if token is None:
+            raise SyntaxError(f"Expected {expected} but the MDX query ended")
+        raise SyntaxError(
+            f"Expected {expected} but got {token.value!r} at position {token.position}"
+        )
+
+    def _is_keyword(self, *keywords, offset=0):
+        token = self._peek(offset)
+        return (
+            token is not None
+            and token.kind == "IDENTIFIER"
+            and token.value.upper() in keywords
+        )
+
+    def _is_punctuation(self, value):
+        token = self._peek()
+        return (
+            token is not None
+            and token.kind in ("PUNCTUATION", "OPERATOR")
+            and token.value == value
+        )
+
+    def _advance(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _expect_keyword(self, keyword):
+        if not self._is_keyword(keyword):
+            self._error(keyword)
+        return self._advance()
+
+    def _expect_punctuation(self, value):
+        if not self._is_punctuation(value):
+            self._error(repr(value))
+        return self._advance()
+
+    # grammar
+
+    def parse(self):
+        """Parse the whole query.
+
+        :return: :class:`Query`
+        """
+        query = self._parse_select()
+        if self._peek() is not None:
+            self._error("end of query")
+        return query
+
+    def parse_expression(self):
+        """Parse the whole query as a single expression (used for quoted
+        WITH MEMBER calculations).
+
+        :return: AST node
+        """
+        expression = self._parse_expression()
+        if self._peek() is not None:
+            self._error("end of expression")
+        return expression
+
+    def _parse_select(self):
+        with_members = []
+        if self._is_keyword("WITH"):
+            self._advance()
+            while self._is_keyword("MEMBER", "SET"):
+                with_members.append(self._parse_with_member())
+
+        self._expect_keyword("SELECT")
+        axes = []
+        if not self._is_keyword("FROM"):
+            axes.append(self._parse_axis())
+            while self._is_punctuation(","):
+                self._advance()
+                axes.append(self._parse_axis())
+
+        self._expect_keyword("FROM")
+        if self._is_punctuation("("):
+            self._advance()
+            cube = self._parse_select()
+            self._expect_punctuation(")")
+        else:
+            cube = self._parse_member_path()
+
+        where = None
+        if self._is_keyword("WHERE"):
+            self._advance()
+            where = self._parse_expression()
+
+        cell_properties = ()
+        if self._is_keyword("CELL"):
+            self._advance()
+            self._expect_keyword("PROPERTIES")
+            cell_properties = self._parse_names()
+
+        return Query(
+            with_members=tuple(with_members),
+            axes=tuple(axes),
+            cube=cube,
+            where=where,
+            cell_properties=cell_properties,
+        )
+
+    def _parse_with_member(self):
+        kind = self._advance().value.upper()
+        name = self._parse_member_path()
+        self._expect_keyword("AS")
+        token = self._peek()
+        if token is not None and token.kind == "STRING":
+            self._advance()
+            try:
+                expression = GrammarParser(_unquote(token)).parse_expression()
+            except SyntaxError:
+                expression = Literal(_unquote(token))
+        else:
+            expression = self._parse_expression()
+
+        properties = []
+        while self._is_punctuation(","):
+            self._advance()
+            property_name = self._advance()
+            if property_name is None or property_name.kind != "IDENTIFIER":
+                self._error("calculated member property")
+            self._expect_punctuation("=")
+            properties.append((property_name.value, self._parse_expression()))
+
+        return WithMember(
+            kind=kind, name=name, expression=expression, properties=tuple(properties)
+        )
+
+    def _parse_axis(self):
+        non_empty = False
+        if self._is_keyword("NON") and self._is_keyword("EMPTY", offset=1):
+            self.position += 2
+            non_empty = True
+        expression = self._parse_expression()
+
+        properties = ()
+        if self._is_keyword("DIMENSION") or self._is_keyword("PROPERTIES"):
+            if self._is_keyword("DIMENSION"):
+                self._advance()
+            self._expect_keyword("PROPERTIES")
+            properties = self._parse_names()
+
+        self._expect_keyword("ON")
+        return Axis(
+            number=self._parse_axis_number(),
+            expression=expression,
+            non_empty=non_empty,
+            properties=properties,
+        )
+
+    def _parse_axis_number(self):
+        token = self._peek()
+        if token is not None and token.kind == "NUMBER":
+            self._advance()
+            return int(token.value)
+        if self._is_keyword(*AXIS_NAMES):
+            return AXIS_NAMES[self._advance().value.upper()]
+        if self._is_keyword("AXIS"):
+            self._advance()
+            self._expect_punctuation("(")
+            number = self._advance()
+            if number is None or number.kind != "NUMBER":
+                self._error("axis number")
+            self._expect_punctuation(")")
+            return int(number.value)
+        return self._error("axis (COLUMNS, ROWS, 0, 1...)")
+
+    def _parse_names(self):
+        # DIMENSION PROPERTIES / CELL PROPERTIES list
+        names = [self._parse_name()]
+        while self._is_punctuation(","):
+            self._advance()
+            names.append(self._parse_name())
+        return tuple(names)
+
+    def _parse_name(self):
+        token = self._peek()
+        if token is not None and token.kind == "MEMBER":
+            return self._parse_member_path()
+        if token is None or token.kind != "IDENTIFIER":
+            self._error("property name")
+        self._advance()
+        return Identifier(token.value)
+
+    def _parse_member_path(self):
+        token = self._peek()
+        if token is None or token.kind not in ("MEMBER", "IDENTIFIER"):
+            self._error("member name")
+        self._advance()
+        if token.kind == "MEMBER":
+            return MemberPath(_split_member(token))
+        # Measures.[Amount]
+        names = (token.value,)
+        next_token = self._peek(1)
+        if (
+            self._is_punctuation(".")
+            and next_token is not None
+            and next_token.kind == "MEMBER"
+        ):
+            self.position += 2
+            names += _split_member(next_token)
+        return MemberPath(names)
+
+    def _parse_expression(self, min_precedence=1):
+        # precedence climbing, binary operators are left associative
+        left = self._parse_unary()
+        while True:
+            token = self._peek()
+            if token is None:
+                return left
+            operator = token.value.upper()
+            if token.kind not in ("OPERATOR", "IDENTIFIER"):
+                return left
+            precedence = BINARY_OPERATORS.get(operator)
+            if precedence is None or precedence < min_precedence:
+                return left
+            self._advance()
+            right = self._parse_expression(precedence + 1)
+            left = BinaryOperation(operator, left, right)
+
+    def _parse_unary(self):
+        if self._is_punctuation("-") or self._is_punctuation("+"):
+            operator = self._advance().value
+            return UnaryOperation(operator, self._parse_unary())
+        if self._is_keyword("NOT"):
+            self._advance()
+            return UnaryOperation("NOT", self._parse_unary())
+        if self._is_keyword("NON") and self._is_keyword("EMPTY", offset=1):
+            self.position += 2
+            return UnaryOperation("NON EMPTY", self._parse_unary())
+        return self._parse_postfix(self._parse_primary())
+
+    def _parse_primary(self):
+        token = self._peek()
+        if token is None:
+            return self._error("expression")
+
+        if token.kind == "MEMBER":
+            self.position += 1
+            return MemberPath(_split_member(token))
+
+        if token.kind == "STRING":
+            self._advance()
+            return Literal(_unquote(token))
+
+        if token.kind == "NUMBER":
+            self._advance()
+            value = token.value
+            return Literal(
+                float(value) if "." in value or "e" in value.lower() else int(value)
+            )
+
+        if token.kind == "IDENTIFIER":
+            if token.value.upper() in CLAUSE_KEYWORDS:
+                return self._error("expression")
+            next_token = self._peek(1)
+            if next_token is not None and next_token.value == "(":
+                self.position += 2
+                return FunctionCall(token.value, self._parse_arguments(")"))
+            if next_token is not None and next_token.value == ".":
+                return self._parse_member_path()
+            self._advance()
+            return Identifier(token.value)
+
+        if token.value == "{":
+            self._advance()
+            return SetExpression(self._parse_set_items())
+
+        if token.value == "(":
+            self._advance()
+            return TupleExpression(self._parse_arguments(")", allow_empty=False))
+
+        return self._error("expression")
+
+    def _parse_postfix(self, node):
+        # .Members, .Children, .Item(0)...
+        while self._is_punctuation("."):
+            token = self._peek(1)
+            if token is None or token.kind != "IDENTIFIER":
+                self._error("member function")
+            self.position += 2
+            if self._is_punctuation("("):
+                self._advance()
+                args = (node,) + self._parse_arguments(")")
+            else:
+                args = (node,)
+            node = FunctionCall(token.value, args, method=True)
+        return node
+
+    def _parse_set_items(self):
+        # fast path for long lists of members, like {[a].[b], [a].[c]...}
+        tokens = self.tokens
+        items = []
+        while True:
+            index = self.position
+            if (
+                index + 1 < len(tokens)
+                and tokens[index].kind == "MEMBER"
+                and tokens[index + 1].value in (",", "}")
+            ):
+                items.append(MemberPath(_split_member(tokens[index])))
+                self.position += 2
+                if tokens[index + 1].value == "}":
+                    return tuple(items)
+                continue
+            if not items and self._is_punctuation("}"):
+                self._advance()
+                return ()
+            items.append(self._parse_expression())
+            if self._is_punctuation(","):
+                self._advance()
+                continue
+            self._expect_punctuation("}")
+            return tuple(items)
+
+    def _parse_arguments(self, closing, allow_empty=True):
+        # comma separated expressions, "f(a,,b)" gives (a, None, b)
+        args = []
+        if self._is_punctuation(closing):
+            self._advance()
+            return ()
+        while True:
+            if allow_empty and (
+                self._is_punctuation(",") or self._is_punctuation(closing)
+            ):
+                args.append(None)
+            else:
+                args.append(self._parse_expression())
+            if self._is_punctuation(","):
+                self._advance()
+                continue
+            self._expect_punctuation(closing)
+            return tuple(args)
+
+
+def parse_mdx(query):
+    """Parse an MDX query into an AST.
+
+    :param query: MDX query
+    :return: :class:`Query`
+    :raise SyntaxError: if the query is not valid MDX (for this grammar)
+    """
+    return GrammarParser(query).parse()
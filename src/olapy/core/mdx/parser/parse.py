@@ -1,7 +1,13 @@
 """Parser for MDX queries, and Break it in parts."""
 
 
+from functools import lru_cache
+from typing import Optional, Tuple
+
 import regex
+from attrs import frozen
+
+from .grammar import Query, iter_member_paths, parse_mdx
 
 # flake8: noqa W605
 
@@ -13,6 +19,192 @@ REGEX = regex.compile(
 )
 
 
+NESTED_SELECT_REGEX = regex.compile(r"\(([^()]+)\)")
+
+
+def _clean_tuple(tupl):
+    """Split a tuple matched by :data:`REGEX` into its (cleaned) items.
+
+    example::
+
+        input : '[Geography].[Geography].[All Continent].Members'
+
+        output : ('Geography', 'Geography', 'Continent')
+
+    :param tupl: MDX tuple as string
+    :return: tuple items
+    """
+    return tuple(
+        tup_att.replace("All ", "").replace("[", "").replace("]", "")
+        for tup_att in tupl.replace(".Members", "").replace(".MEMBERS", "").split("].[")
+        if tup_att
+    )
+
+
+def _get_ast_tuples(node):
+    """Get (cleaned) tuples of all member paths in an AST node, like
+    :func:`_clean_tuple` (names without 'All ', hierarchies names alone are
+    skipped).
+
+    :param node: AST node
+    :return: tuples items
+    """
+    tuples = []
+    for member_path in iter_member_paths(node):
+        tupl = member_path.names
+        if len(tupl) > 1:
+            if "" in tupl or "All " in "]".join(tupl):
+                tupl = tuple(name.replace("All ", "") for name in tupl if name)
+            tuples.append(tupl)
+    return tuple(tuples)
+
+
+@frozen
+class ParsedQuery:
+    """Immutable result of parsing an MDX query once, see :func:`parse_query`.
+
+    :param query: parsed MDX query
+    :param all: all tuples in the query
+    :param columns: tuples ON COLUMNS (or ON 0)
+    :param rows: tuples ON ROWS
+    :param where: tuples in the WHERE clause
+    :param nested_select: tuples groups (as strings) between parentheses,
+        see :func:`Parser.get_nested_select`
+    :param hierarchized: True if the query uses Hierarchize
+    :param ast: query syntax tree (see :mod:`olapy.core.mdx.parser.grammar`),
+        None if the query was parsed with :data:`REGEX`
+    """
+
+    query: str
+    all: Tuple[Tuple[str, ...], ...]
+    columns: Tuple[Tuple[str, ...], ...]
+    rows: Tuple[Tuple[str, ...], ...]
+    where: Tuple[Tuple[str, ...], ...]
+    nested_select: Tuple[str, ...]
+    hierarchized: bool
+    ast: Optional[Query] = None
+
+    def to_dict(self):
+        """Tuples by axis, as returned by :func:`Parser.decorticate_query`.
+
+        :return: dict of axis as key and (new) lists of tuples as value
+        """
+        return {
+            axis: [list(tupl) for tupl in getattr(self, axis)]
+            for axis in ("all", "columns", "rows", "where")
+        }
+
+
+@lru_cache(maxsize=256)
+def parse_query(query):
+    """Parse an MDX query, memoized by query text.
+
+    The query is parsed with the MDX grammar (see :func:`parse_with_grammar`),
+    queries not supported by the grammar are parsed with :data:`REGEX` (see
+    :func:`parse_with_regex`).
+
+    :param query: MDX query
+    :return: :class:`ParsedQuery` instance
+    """
+    try:
+        return parse_with_grammar(query)
+    except SyntaxError:
+        return parse_with_regex(query)
+
+
+def parse_with_grammar(query):
+    """Parse an MDX query with the tokenizer and recursive descent parser
+    of :mod:`olapy.core.mdx.parser.grammar`.
+
+    Axis 0 (ON COLUMNS, ON 0) gives the columns tuples, axis 1 (ON ROWS, ON 1)
+    the rows tuples. Like sub selects, the WHERE clause filters the whole
+    query so the where tuples include sub selects tuples.
+
+    :param query: MDX query
+    :return: :class:`ParsedQuery` instance
+    :raise SyntaxError: if the query is not supported by the grammar
+    """
+    ast = parse_mdx(query)
+    # each node is walked once, all tuples are the tuples of the query parts
+    # in source order (see iter_member_paths)
+    all_tuples = _get_ast_tuples(ast.with_members)
+    axes_tuples = {}  # type: dict
+    for axis in ast.axes:
+        axis_tuples = _get_ast_tuples(axis)
+        all_tuples += axis_tuples
+        # like Query.get_axis, the first axis with a number
+        axes_tuples.setdefault(axis.number, axis_tuples)
+    slicer_tuples = _get_ast_tuples((ast.cube, ast.where, ast.cell_properties))
+    return ParsedQuery(
+        query=query,
+        all=all_tuples + slicer_tuples,
+        columns=axes_tuples.get(0, ()),
+        rows=axes_tuples.get(1, ()),
+        where=slicer_tuples if ast.where is not None else (),
+        nested_select=tuple(NESTED_SELECT_REGEX.findall(query)),
+        hierarchized="Hierarchize" in query,
+        ast=ast,
+    )
+
+
+def parse_with_regex(query):
+    """Parse an MDX query with :data:`REGEX`.
+
+    :data:`REGEX` runs only once over the query, then each tuple is dispatched
+    to its axis according to its position relative to the axes keywords.
+
+    :param query: MDX query
+    :return: :class:`ParsedQuery` instance
+    """
+    # (start, end, tuple) of all tuples in the query
+    matches = [
+        (match.start(), match.end(), _clean_tuple(match.group(0)))
+        for match in REGEX.finditer(query)
+        if len(match.group(0).split("].[")) > 1
+    ]
+
+    def tuples_between(start=None, stop=None):
+        start = 0 if start is None else query.index(start)
+        stop = len(query) if stop is None else query.index(stop)
+        return tuple(
+            tupl
+            for match_start, match_end, tupl in matches
+            if match_start >= start and match_end <= stop
+        )
+
+    on_rows = ()
+    on_columns = ()
+    on_where = ()
+    try:
+        # Hierarchize -> ON COLUMNS , ON ROWS ...
+        # without Hierarchize -> ON 0
+        if "ON ROWS" in query:
+            start = "ON COLUMNS" if "ON COLUMNS" in query else "SELECT"
+            on_rows = tuples_between(start, "ON ROWS")
+
+        if "ON COLUMNS" in query:
+            on_columns = tuples_between("SELECT", "ON COLUMNS")
+
+        if "ON 0" in query:
+            on_columns = tuples_between("SELECT", "ON 0")
+
+        if "WHERE" in query:
+            on_where = tuples_between("FROM")
+
+    except BaseException:  # pragma: no cover
+        raise SyntaxError("Please check your MDX Query")
+
+    return ParsedQuery(
+        query=query,
+        all=tuple(tupl for _, _, tupl in matches),
+        columns=on_columns,
+        rows=on_rows,
+        where=on_where,
+        nested_select=tuple(NESTED_SELECT_REGEX.findall(query)),
+        hierarchized="Hierarchize" in query,
+    )
+
+
 class Parser:
     """Class for Parsing a MDX query."""
 
@@ -121,54 +313,21 @@ class Parser:
         :return: dict of axis as key and tuples as value
         """
 
-        # Hierarchize -> ON COLUMNS , ON ROWS ...
-        # without Hierarchize -> ON 0
+        return self.parse(query).to_dict()
+
+    def parse(self, query=None):
+        """Parse an MDX query (memoized by query text, see :func:`parse_query`).
+
+        :param query: MDX Query, the current query (mdx_query) if None
+        :return: :class:`ParsedQuery` instance
+        """
+        if query is None:
+            query = self.mdx_query
         try:
             query = query.decode("utf-8")
         except AttributeError:
             pass
-
-        tuples_on_mdx_query = self.get_tuples(query)
-        on_rows = []
-        on_columns = []
-        on_where = []
-
-        try:
-            # ON ROWS
-            if "ON ROWS" in query:
-                stop = "ON ROWS"
-                if "ON COLUMNS" in query:
-                    start = "ON COLUMNS"
-                else:
-                    start = "SELECT"
-                on_rows = self.get_tuples(query, start, stop)
-
-            # ON COLUMNS
-            if "ON COLUMNS" in query:
-                start = "SELECT"
-                stop = "ON COLUMNS"
-                on_columns = self.get_tuples(query, start, stop)
-
-            # ON COLUMNS (AS 0)
-            if "ON 0" in query:
-                start = "SELECT"
-                stop = "ON 0"
-                on_columns = self.get_tuples(query, start, stop)
-
-            # WHERE
-            if "WHERE" in query:
-                start = "FROM"
-                on_where = self.get_tuples(query, start)
-
-        except BaseException:  # pragma: no cover
-            raise SyntaxError("Please check your MDX Query")
-
-        return {
-            "all": tuples_on_mdx_query,
-            "columns": on_columns,
-            "rows": on_rows,
-            "where": on_where,
-        }
+        return parse_query(query)
 
     @staticmethod
     def add_tuple_brackets(tupl):
@@ -223,7 +382,7 @@ class Parser:
 
         :return: All groups as list of strings.
         """
-        return regex.findall(r"\(([^()]+)\)", self.mdx_query)
+        return list(self.parse().nested_select)
 
     def hierarchized_tuples(self) -> bool:
         """Check if `hierarchized <https://docs.microsoft.com/en-
@@ -231,4 +390,4 @@ class Parser:
 
         :return: True | False
         """
-        return "Hierarchize" in self.mdx_query
+        return self.parse().hierarchized
@@ -4,6 +4,7 @@ requests and responses.
 """
 
 
+import copy
 import os
 import uuid
 
@@ -49,18 +50,70 @@ class DictDiscoverReqHandler:
         :param new_cube: cube name
         :return: new instance of MdxEngine with new star_schema_DataFrame and other variables
         """
-        if self.selected_cube != new_cube:
-            if (
-                self.executor.cube_config
-                and new_cube == self.executor.cube_config["name"]
-            ):
-                facts = self.executor.cube_config["facts"]["table_name"]
-            else:
-                facts = "Facts"
+        # cubes are loaded once, even by concurrent requests
+        with self.executor.load_lock:
+            if self.selected_cube != new_cube:
+                self.selected_cube = new_cube
+                # cubes already loaded (by any session) are kept in the registry
+                if self.executor.cube != new_cube and not self.executor.select_cube(
+                    new_cube
+                ):
+                    self.executor.load_cube(
+                        new_cube,
+                        fact_table_name=self.executor.get_facts_table_name(new_cube),
+                    )
+
+    def for_request(self, cube_name=None):
+        """Get a handler generating the response of one request.
+
+        The returned handler has its own executor (see
+        :func:`MdxEngine.for_request`), requests changing the cube (see
+        :func:`change_cube`) don't change the cube of this handler, nor of
+        concurrent requests.
+
+        :param cube_name: select this cube, Default the selected cube
+        :return: handler instance
+        """
+        request_handler = copy.copy(self)
+        request_handler.executor = self.executor.for_request()
+        if cube_name:
+            request_handler.change_cube(cube_name)
+        return request_handler
+
+    @staticmethod
+    def get_request_catalog(request):
+        """Get the catalog (cube name) of a Discover request properties.
+
+        :param request: :class:`DiscoverRequest` object
+        :return: cube name, None if the request has no catalog
+        """
+        property_list = request.Properties and request.Properties.PropertyList
+        return getattr(property_list, "Catalog", None)
+
+    def generate_response(self, request):
+        """Generate the response of a Discover request, on a per request
+        handler (see :func:`for_request`) selecting the request catalog.
+
+        :param request: :class:`DiscoverRequest` object
+        :return: Discover response
+        """
+        request_handler = self.for_request(cube_name=self.get_request_catalog(request))
+        return request_handler.get_response(request)
+
+    def get_response(self, request):
+        """Get the response of a Discover request, with the method of its
+        request type (``mdschema_cubes_response`` for MDSCHEMA_CUBES...).
+
+        :param request: :class:`DiscoverRequest` object
+        :return: Discover response
+        """
+        method_name = request.RequestType.lower() + "_response"
+        method = getattr(self, method_name)
+
+        if request.RequestType == "DISCOVER_DATASOURCES":
+            return method()
 
-            self.selected_cube = new_cube
-            if self.executor.cube != new_cube:
-                self.executor.load_cube(new_cube, fact_table_name=facts)
+        return method(request)
 
     @staticmethod
     def discover_datasources_response():
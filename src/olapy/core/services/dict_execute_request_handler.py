@@ -6,6 +6,8 @@ import itertools
 import re
 from collections import OrderedDict
 
+import pandas as pd
+
 from ..mdx.parser.parse import REGEX
 
 
@@ -45,6 +47,8 @@ class DictExecuteReqHandler:
             self.columns_desc = self.mdx_execution_result.get("columns_desc")
         else:
             self.columns_desc = None
+        # split_dataframe() result, for this query result
+        self._splitted_df = None
 
     def _execute_convert_formulas_query(self, mdx_query):
         """convert Mdx Query to `excel formulas <https://exceljet.net/excel-
@@ -780,12 +784,48 @@ class DictExecuteReqHandler:
                 +----------+---------+---------+
 
 
+        DataFrames are split once per query result, without copying it: index
+        levels are converted to arrays once, and each DataFrame is a view of
+        these arrays and of the result columns (like the result reset_index()
+        columns).
+
         :return: dict with multiple DataFrame
         """
-        return OrderedDict(
-            (key, self.mdx_execution_result["result"].reset_index()[list(value)])
-            for key, value in self.columns_desc["all"].items()
-        )
+        if self._splitted_df is None:
+            result = self.mdx_execution_result["result"]
+            columns = self._get_result_columns(result)
+            splitted_df = OrderedDict()
+            for key, value in self.columns_desc["all"].items():
+                df = pd.DataFrame(
+                    {
+                        position: columns[column]
+                        for position, column in enumerate(value)
+                    },
+                    index=pd.RangeIndex(len(result)),
+                    copy=False,
+                )
+                df.columns = list(value)
+                splitted_df[key] = df
+            self._splitted_df = splitted_df
+        return self._splitted_df
+
+    @staticmethod
+    def _get_result_columns(result):
+        """Get columns of the result with its index levels, without copying
+        the result (columns names are the result.reset_index() ones).
+
+        :param result: execute_mdx result DataFrame
+        :return: dict of column name and array
+        """
+        columns = {}
+        index = result.index
+        for level, name in enumerate(index.names):
+            if name is None:
+                name = "index" if index.nlevels == 1 else f"level_{level}"
+            columns[name] = index.get_level_values(level).array
+        for column in result.columns:
+            columns[column] = result[column].array
+        return columns
 
     def _generate_tuples_xs0(self, splitted_df, mdx_query_axis):
         """generate elements representing axis 0 data contained by a root
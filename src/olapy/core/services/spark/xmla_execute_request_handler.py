@@ -275,6 +275,14 @@ class SparkXmlaExecuteReqHandler(XmlaExecuteReqHandler):
 
         return str(xml)
 
+    def iter_cell_data(self):
+        """Spark results are collected at once, cells are generated in one
+        chunk, see :func:`generate_cell_data`.
+
+        :return: generator of CellData strings
+        """
+        yield self.generate_cell_data()
+
     def generate_slicer_axis(self):
         """Generate SlicerAxis which contains elements (dimensions) that are
         not used in the request.
@@ -5,13 +5,19 @@ requests and responses, and the Spyne SOAP server.
 """
 
 import imp
+import io
+import itertools
 import logging
 import os
+import socketserver
 import sys
+import threading
+import time
 from os.path import expanduser, isfile
-from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIServer, make_server
 
 import click
+from lxml import etree
 from spyne import AnyXml, Application, Fault, ServiceBase, rpc
 from spyne.const.http import HTTP_200
 from spyne.error import InvalidCredentialsError
@@ -22,12 +28,16 @@ from sqlalchemy import create_engine
 
 from ..mdx.executor import MdxEngine
 from ..mdx.executor.lite_execute import MdxEngineLite
+from ..mdx.executor.registry import CubeRegistry
 from ..mdx.tools.config_file_parser import ConfigParser
 from ..mdx.tools.olapy_config_file_parser import DbConfigParser
 from ..services.models import DiscoverRequest, ExecuteRequest, Session
 from . import XmlaDiscoverReqHandler, XmlaExecuteReqHandler
 from .xmla_lib import XmlaProviderLib
 
+SOAP_ENV_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+XMLA_NS = "urn:schemas-microsoft-com:xml-analysis"
+
 # unicode_literals This is heavily discouraged with click
 
 
@@ -90,13 +100,7 @@ class XmlaProviderService(ServiceBase, XmlaProviderLib):
                 fault_string="You do not have permission to access this resource"
             )
 
-        method_name = request.RequestType.lower() + "_response"
-        method = getattr(discover_request_hanlder, method_name)
-
-        if request.RequestType == "DISCOVER_DATASOURCES":
-            return method()
-
-        return method(request)
+        return discover_request_hanlder.generate_response(request)
 
     # Execute function must take 2 arguments (JUST 2!): Command and Properties.
     # We encapsulate them in ExecuteRequest object.
@@ -115,32 +119,164 @@ class XmlaProviderService(ServiceBase, XmlaProviderLib):
         ctx.out_header = Session(
             SessionId=str(ctx.app.config["discover_request_hanlder"].session_id)
         )
-        # same executor instance as the discovery (not reloading the cube another time)
         mdx_query = request.Command.Statement.encode().decode("utf8")
-        execute_request_hanlder = ctx.app.config["execute_request_hanlder"]
+        catalog = request.Properties and request.Properties.PropertyList.Catalog
+        execute_request_hanlder = execute_mdx_query(ctx.app.config, mdx_query, catalog)
+        return execute_request_hanlder.generate_response()
 
-        # Hierarchize
-        if all(
-            key in mdx_query
-            for key in ["WITH MEMBER", "strtomember", "[Measures].[XL_SD0]"]
-        ):
-            convert2formulas = True
-        else:
-            convert2formulas = False
 
-        # change (or load cube) if direct execute handler without discover
-        # handler (which normally load the cube first)
-        if (
-            request.Properties
-            and request.Properties.PropertyList.Catalog
-            and not execute_request_hanlder.executor.cube
-        ):
-            execute_request_hanlder.executor.load_cube(
-                request.Properties.PropertyList.Catalog
+def execute_mdx_query(config, mdx_query, catalog=None):
+    """Execute an mdx query of an Execute request, on the catalog cube.
+
+    :param config: spyne application config, with the shared discover and
+        execute request handlers
+    :param mdx_query: the mdx query
+    :param catalog: cube of the request properties
+    :return: execute request handler (with the query result) to generate the
+        response
+    """
+    # same executor instance as the discovery (not reloading the cube another time)
+    shared_execute_request_hanlder = config["execute_request_hanlder"]
+    executor = shared_execute_request_hanlder.executor
+
+    # Hierarchize
+    if all(
+        key in mdx_query
+        for key in ["WITH MEMBER", "strtomember", "[Measures].[XL_SD0]"]
+    ):
+        convert2formulas = True
+    else:
+        convert2formulas = False
+
+    # change (or load cube) if direct execute handler without discover
+    # handler (which normally load the cube first)
+    if catalog and not executor.cube:
+        with executor.load_lock:
+            if not executor.cube:
+                executor.load_cube(catalog)
+
+    # per request handler and executor view (own parser and selected
+    # measures) on the catalog cube, requests may be executed concurrently,
+    # the catalog cube is selected (or loaded) like Discover requests do,
+    # without changing the cube of the shared handlers
+    request_executor = (
+        config["discover_request_hanlder"].for_request(cube_name=catalog).executor
+    )
+    execute_request_hanlder = shared_execute_request_hanlder.__class__(request_executor)
+    execute_request_hanlder.execute_mdx_query(mdx_query, convert2formulas)
+    return execute_request_hanlder
+
+
+class XmlaStreamingMiddleware:
+    """WSGI middleware streaming Execute responses.
+
+    Spyne builds the whole SOAP response (the MDDataSet string returned by
+    Execute is parsed, then serialized again in the SOAP envelope), so Execute
+    requests are answered here instead: the response is written chunk by chunk
+    to the WSGI iterable (see :func:`XmlaExecuteReqHandler.iter_response`), and
+    the client receives OlapInfo and Axes while cells are generated.
+
+    Other requests (Discover, OPTIONS...) are passed to the spyne application,
+    Execute requests which can't be executed are answered with the SOAP fault
+    of the spyne application (see :func:`fault_response`), without executing
+    them again.
+
+    :param wsgi_application: spyne WsgiApplication
+    """
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+        self.app = wsgi_application.app
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") != "POST" or not environ.get("CONTENT_LENGTH"):
+            return self.wsgi_application(environ, start_response)
+
+        body = environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"]))
+        # the spyne application reads the request again
+        environ["wsgi.input"] = io.BytesIO(body)
+
+        execute_request = self.parse_execute_request(body)
+        if execute_request is None:
+            return self.wsgi_application(environ, start_response)
+        try:
+            execute_request_hanlder = execute_mdx_query(
+                self.app.config, *execute_request
             )
+            response = execute_request_hanlder.iter_response()
+            # OlapInfo and Axes are generated before the response is started
+            first_chunk = next(response)
+        except Exception:
+            logging.exception("unable to execute %s", execute_request[0])
+            return self.fault_response(start_response)
+
+        start_response("200 OK", [("Content-Type", "text/xml; charset=utf-8")])
+        return self.iter_soap_response(itertools.chain([first_chunk], response))
+
+    @staticmethod
+    def parse_execute_request(body):
+        """Parse an Execute SOAP request.
+
+        :param body: SOAP request
+        :return: (mdx query, catalog), None if it isn't an Execute request
+            with a statement
+        """
+        # no entities nor DTD loaded from files or the network
+        parser = etree.XMLParser(resolve_entities=False, no_network=True)
+        try:
+            envelope = etree.fromstring(body, parser)
+        except etree.XMLSyntaxError:
+            return None
+        execute = envelope.find(f"{{{SOAP_ENV_NS}}}Body/{{{XMLA_NS}}}Execute")
+        if execute is None:
+            return None
+        mdx_query = execute.findtext("{*}Command/{*}Statement")
+        if not mdx_query:
+            return None
+        catalog = execute.findtext("{*}Properties/{*}PropertyList/{*}Catalog")
+        return mdx_query, catalog or None
+
+    @staticmethod
+    def fault_response(start_response):
+        """Answer an Execute request which can't be executed with a SOAP
+        fault, the same way as the spyne application.
+
+        :param start_response: WSGI start_response
+        :return: SOAP fault bytes
+        """
+        body = (
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            f'<soap11env:Envelope xmlns:soap11env="{SOAP_ENV_NS}"><soap11env:Body>'
+            "<soap11env:Fault><faultcode>soap11env:Server</faultcode>"
+            "<faultstring>Internal Error</faultstring><faultactor></faultactor>"
+            "</soap11env:Fault></soap11env:Body></soap11env:Envelope>"
+        ).encode("utf-8")
+        start_response(
+            "500 Internal Server Error",
+            [
+                ("Content-Type", "text/xml; charset=utf-8"),
+                ("Content-Length", str(len(body))),
+            ],
+        )
+        return [body]
 
-        execute_request_hanlder.execute_mdx_query(mdx_query, convert2formulas)
-        return execute_request_hanlder.generate_response()
+    def iter_soap_response(self, response):
+        """Generate the Execute SOAP response chunk by chunk.
+
+        :param response: Execute response chunks, see
+            :func:`XmlaExecuteReqHandler.iter_response`
+        :return: generator of SOAP response bytes
+        """
+        session_id = self.app.config["discover_request_hanlder"].session_id
+        yield (
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            f'<soap11env:Envelope xmlns:soap11env="{SOAP_ENV_NS}" xmlns:tns="{XMLA_NS}">'
+            f'<soap11env:Header><tns:Session SessionId="{session_id}"/></soap11env:Header>'
+            "<soap11env:Body><tns:ExecuteResponse>"
+        ).encode("utf-8")
+        for chunk in response:
+            yield chunk.encode("utf-8")
+        yield b"</tns:ExecuteResponse></soap11env:Body></soap11env:Envelope>"
 
 
 home_directory = expanduser("~")
@@ -155,6 +291,13 @@ def get_mdx_engine(
     direct_table_or_file,
     columns,
     measures,
+    cubes_memory_limit=None,
+    snapshot_cache=False,
+    categorical_levels=False,
+    normalized_star_schema=False,
+    rolap=False,
+    refresh_column=None,
+    partition_level=None,
 ):
     sqla_engine = None
     if sql_alchemy_uri:
@@ -177,10 +320,60 @@ def get_mdx_engine(
             source_type=source_type,
             cube_config=cube_config,
             sqla_engine=sqla_engine,
+            registry=CubeRegistry(
+                max_size=cubes_memory_limit * 1024**2 if cubes_memory_limit else None
+            ),
+            snapshot_cache=snapshot_cache,
+            categorical_levels=categorical_levels,
+            normalized_star_schema=normalized_star_schema,
+            rolap=rolap,
+            refresh_column=refresh_column,
+            partition_level=partition_level,
         )
     return executor
 
 
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    """WSGI server handling each request in a new thread."""
+
+    daemon_threads = True
+    # listen backlog (5 by default), concurrent clients are refused beyond it
+    request_queue_size = 128
+
+
+if hasattr(socketserver, "ForkingMixIn"):
+
+    class ForkingWSGIServer(socketserver.ForkingMixIn, WSGIServer):
+        """WSGI server handling each request in a new (forked) process."""
+
+        request_queue_size = 128
+
+
+SERVER_MODES = ["single", "threads", "processes"]
+
+
+def get_server(host, port, wsgi_application, server_mode="single"):
+    """Create the WSGI server.
+
+    :param host: host ip address
+    :param port: host port
+    :param wsgi_application: wsgi application, see :func:`get_wsgi_application`
+    :param server_mode: **single** (one request at a time), **threads** (one
+        thread per request) or **processes** (one forked process per request,
+        cubes loaded by a request are not kept)
+    :return: WSGIServer instance
+    """
+    if server_mode == "threads":
+        server_class = ThreadingWSGIServer
+    elif server_mode == "processes":
+        if not hasattr(socketserver, "ForkingMixIn"):
+            raise ValueError("processes server mode is not supported on this platform")
+        server_class = ForkingWSGIServer
+    else:
+        server_class = WSGIServer
+    return make_server(host, port, wsgi_application, server_class=server_class)
+
+
 def get_spyne_app(discover_request_hanlder, execute_request_hanlder):
     """
     :return: spyne  Application
@@ -209,7 +402,49 @@ def get_wsgi_application(mdx_engine):
     # validator='soft' or nothing, this is important because spyne doesn't
     # support encodingStyle until now !!!!
 
-    return WsgiApplication(application)
+    return XmlaStreamingMiddleware(WsgiApplication(application))
+
+
+def start_refresh_thread(executor, refresh_interval):
+    """Refresh the current cube of executor every refresh_interval seconds,
+    in a daemon thread, see :func:`MdxEngine.refresh_cube`.
+
+    :param executor: MdxEngine instance
+    :param refresh_interval: seconds between refreshes
+    :return: the refresh thread
+    """
+
+    def refresh():
+        while True:
+            time.sleep(refresh_interval)
+            try:
+                if executor.cube:
+                    rows_count = executor.refresh_cube()
+                    logging.info(
+                        "%s refreshed (%s new facts rows)", executor.cube, rows_count
+                    )
+            except Exception:
+                logging.exception("unable to refresh %s", executor.cube)
+
+    thread = threading.Thread(target=refresh, name="olapy-refresh", daemon=True)
+    thread.start()
+    return thread
+
+
+def load_default_cube(wsgi_application):
+    """Load the default cube (the cube config one, else the first cube found)
+    if no cube is loaded yet.
+
+    :param wsgi_application: wsgi application, see :func:`get_wsgi_application`
+    """
+    discover_request_hanlder = wsgi_application.app.config["discover_request_hanlder"]
+    executor = discover_request_hanlder.executor
+    if executor.cube:
+        return
+    if executor.cube_config:
+        discover_request_hanlder.change_cube(executor.cube_config["name"])
+    elif discover_request_hanlder.cubes:
+        discover_request_hanlder.change_cube(discover_request_hanlder.cubes[0])
 
 
 @click.command()
@@ -277,6 +512,73 @@ def get_wsgi_application(mdx_engine):
     default=None,
     help="To explicitly specify measures if (construct cube from a single file)",
 )
+@click.option(
+    "--server_mode",
+    "-sm",
+    default="single",
+    type=click.Choice(SERVER_MODES),
+    help="Serve requests one at a time (single), in threads (threads) or in forked processes (processes), "
+    "with processes the default cube is loaded before serving, DEFAULT : single",
+)
+@click.option(
+    "--cubes_memory_limit",
+    "-cml",
+    default=0,
+    help="Memory (MB) used by the loaded cubes kept for all sessions, least recently used cubes "
+    "are unloaded beyond it, DEFAULT : 0 (no limit)",
+)
+@click.option(
+    "--snapshot_cache",
+    "-sc",
+    is_flag=True,
+    default=False,
+    help="Cache loaded cubes as snapshots under olapy-data, cubes whose source didn't change are "
+    "loaded from their snapshot",
+)
+@click.option(
+    "--categorical_levels",
+    "-cl",
+    is_flag=True,
+    default=False,
+    help="Dictionary encode cubes levels columns as categories (less memory, faster filters and group by)",
+)
+@click.option(
+    "--normalized_star_schema",
+    "-ns",
+    is_flag=True,
+    default=False,
+    help="Keep facts and dimensions tables instead of the denormalized star schema, dimensions columns "
+    "are joined when queries use them",
+)
+@click.option(
+    "--rolap",
+    "-r",
+    is_flag=True,
+    default=False,
+    help="Execute queries on database cubes in the database (one SQL query per MDX query) instead of "
+    "the loaded star schema",
+)
+@click.option(
+    "--refresh_interval",
+    "-ri",
+    default=0,
+    help="Seconds between refreshes of the loaded cube with facts rows appended to its source (new "
+    "facts part files, facts rows above --refresh_column), DEFAULT : 0 (no refresh)",
+)
+@click.option(
+    "--refresh_column",
+    "-rc",
+    default=None,
+    help="Facts table column of database cubes (auto incremented id, insertion date...) used to "
+    "find new facts rows when refreshing cubes",
+)
+@click.option(
+    "--partition_level",
+    "-pl",
+    default=None,
+    help="Level column (year, month...) to partition the loaded facts rows on, queries filtering this "
+    "level are executed on their partitions rows only",
+)
 def runserver(
     host,
     port,
@@ -290,6 +592,15 @@ def runserver(
     direct_table_or_file,
     columns,
     measures,
+    server_mode,
+    cubes_memory_limit,
+    snapshot_cache,
+    categorical_levels,
+    normalized_star_schema,
+    rolap,
+    refresh_interval,
+    refresh_column,
+    partition_level,
 ):
     """Start the xmla server."""
     try:
@@ -322,10 +633,25 @@ def runserver(
         direct_table_or_file=direct_table_or_file,
         columns=columns,
         measures=measures,
+        cubes_memory_limit=cubes_memory_limit,
+        snapshot_cache=snapshot_cache,
+        categorical_levels=categorical_levels,
+        normalized_star_schema=normalized_star_schema,
+        rolap=rolap,
+        refresh_column=refresh_column,
+        partition_level=partition_level,
     )
 
     wsgi_application = get_wsgi_application(mdx_engine)
 
+    if server_mode == "processes":
+        # forked processes don't share loaded cubes, load the default one once
+        load_default_cube(wsgi_application)
+
+    if refresh_interval and not direct_table_or_file:
+        # forked processes (server_mode processes) get the refreshed cube
+        start_refresh_thread(mdx_engine, refresh_interval)
+
     # log to the console
     # logging.basicConfig(level=logging.DEBUG")
     # log to the file
@@ -339,5 +665,5 @@ def runserver(
     logging.getLogger("spyne.protocol.xml").setLevel(logging.DEBUG)
     logging.info("listening to http://127.0.0.1:8000/xmla")
     logging.info("wsdl is at: http://localhost:8000/xmla?wsdl")
-    server = make_server(host, port, wsgi_application)
+    server = get_server(host, port, wsgi_application, server_mode=server_mode)
     server.serve_forever()
@@ -66,23 +66,77 @@ class XmlaDiscoverReqHandler(DictDiscoverReqHandler):
         :param new_cube: cube name
         :return: new instance of MdxEngine with new star_schema_DataFrame and other variables
         """
-        if self.selected_cube != new_cube:
-            if (
-                self.executor.cube_config
-                and new_cube == self.executor.cube_config["name"]
-            ):
-                facts = self.executor.cube_config["facts"]["table_name"]
-            else:
-                facts = "Facts"
-
-            self.selected_cube = new_cube
-            if "db" in self.executor.source_type:
-                new_sql_alchemy_uri = self._change_db_uri(
-                    self.sql_alchemy_uri, new_cube
+        # cubes are loaded once, even by concurrent requests
+        with self.executor.load_lock:
+            if self.selected_cube != new_cube:
+                self.selected_cube = new_cube
+                # cubes already loaded (by any session) are kept in the registry
+                if self.executor.cube != new_cube and not self.executor.select_cube(
+                    new_cube
+                ):
+                    if "db" in self.executor.source_type:
+                        new_sql_alchemy_uri = self._change_db_uri(
+                            self.sql_alchemy_uri, new_cube
+                        )
+                        self.executor.sqla_engine = create_engine(new_sql_alchemy_uri)
+                    self.executor.load_cube(
+                        new_cube,
+                        fact_table_name=self.executor.get_facts_table_name(new_cube),
+                    )
+
+    @staticmethod
+    def get_request_key(request):
+        """Hashable key of a Discover request: its request type,
+        restrictions, and the properties read by responses.
+
+        :param request: :class:`DiscoverRequest` object
+        :return: tuple
+        """
+        restriction_list = request.Restrictions and request.Restrictions.RestrictionList
+        property_list = request.Properties and request.Properties.PropertyList
+        restrictions = vars(restriction_list) if restriction_list else {}
+        return (
+            request.RequestType,
+            tuple(
+                sorted(
+                    (name, value)
+                    for name, value in restrictions.items()
+                    if value is not None
                 )
-                self.executor.sqla_engine = create_engine(new_sql_alchemy_uri)
-            if self.executor.cube != new_cube:
-                self.executor.load_cube(new_cube, fact_table_name=facts)
+            ),
+            tuple(
+                getattr(property_list, name, None)
+                for name in ("Catalog", "Content", "Format")
+            ),
+        )
+
+    def generate_response(self, request):
+        """Generate the xmla response of a Discover request, or get it from the
+        executor result cache.
+
+        Responses only depend on the request and on the selected cube, they
+        are cached per cube until it is reloaded or refreshed (Excel sends
+        the same Discover requests on each connection and pivot table refresh).
+        The cache key and the response are both computed from the per request
+        handler (see :func:`for_request`), the cube it selects can't change in
+        the meantime.
+
+        :param request: :class:`DiscoverRequest` object
+        :return: XML Discover response as string
+        """
+        request_handler = self.for_request(cube_name=self.get_request_catalog(request))
+        executor = request_handler.executor
+        cache_key = (
+            "xmla_discover",
+            executor.cube,
+            request_handler.selected_cube,
+            self.get_request_key(request),
+        )
+        response = executor.result_cache.get(cache_key)
+        if response is None:
+            response = request_handler.get_response(request)
+            executor.result_cache.set(cache_key, response)
+        return response
 
     @staticmethod
     def discover_datasources_response():
@@ -5,13 +5,249 @@ requests and responses."""
 import itertools
 from datetime import datetime
 from typing import List, Text
+from xml.sax.saxutils import escape, quoteattr
 
 import numpy as np
+import pandas as pd
 import xmlwitch
 
+from ..mdx.executor.cache import normalize_query
 from .dict_execute_request_handler import DictExecuteReqHandler
 from .xmla_execute_xsds import execute_xsd
 
+# cells generated per CellData chunk of streamed responses
+CELLS_CHUNK_SIZE = 1000
+
+# responses with more CellData (in characters) are not cached, so that one big
+# response doesn't evict all other cached results
+MAX_CACHED_CELL_DATA_SIZE = 16 * 1024 * 1024
+
+CELL_TEMPLATE = '<Cell CellOrdinal="{}">\n  <Value xsi:type="%s">{}</Value>\n</Cell>'
+
+
+def get_xsi_type(dtype):
+    """XML schema type of cells values.
+
+    :param dtype: result column dtype
+    :return: xsi:long, xsi:double or xsi:string
+    """
+    if pd.api.types.is_integer_dtype(dtype):
+        return "xsi:long"
+    if pd.api.types.is_float_dtype(dtype):
+        return "xsi:double"
+    return "xsi:string"
+
+
+def format_cells(values, ordinals):
+    """Format Cell elements of a result column, like xmlwitch does, but in
+    batches: values and ordinals are converted to strings by one map call.
+
+    Empty (NaN) cells are skipped, as allowed by XMLA (cells missing from
+    CellData are empty).
+
+    :param values: column values array
+    :param ordinals: cells ordinals array
+    :return: array of Cell elements strings, None for empty cells
+    """
+    xsi_type = get_xsi_type(values.dtype)
+    cells = np.full(len(values), None, dtype=object)
+    filled = ~pd.isna(values)
+    texts = map(str, values[filled].tolist())
+    if xsi_type == "xsi:string":
+        texts = map(escape, texts)
+    cells[filled] = list(
+        map((CELL_TEMPLATE % xsi_type).format, ordinals[filled].tolist(), texts)
+    )
+    return cells
+
+
+def format_element(name, text):
+    """Format a child element of an axis tuple Member, like xmlwitch does.
+
+    :param name: element name
+    :param text: element text
+    :return: element string
+    """
+    if text:
+        return f"\n        <{name}>{escape(text)}</{name}>"
+    return f"\n        <{name} />"
+
+
+def format_member(hierarchy, elements):
+    """Format a Member element of an axis Tuple, like xmlwitch does.
+
+    :param hierarchy: member hierarchy
+    :param elements: list of (element name, text)
+    :return: Member element string
+    """
+    children = "".join(format_element(name, text) for name, text in elements)
+    return (
+        f"\n      <Member Hierarchy={quoteattr(hierarchy)}>{children}\n      </Member>"
+    )
+
+
+class AxisTemplates:
+    """Plan of an axis tuples generation, see
+    :func:`XmlaExecuteReqHandler.tuples_2_xs0`.
+
+    Hierarchies, levels names and query flags are computed once per axis, and
+    each Member element is formatted once, then reused by all tuples of the
+    axis (a member is repeated in many tuples of a crossjoin).
+
+    :param execute_request_handler: XmlaExecuteReqHandler instance
+    :param splitted_df: splitted dataframes (with split_dataframe() function)
+    :param first_att: tuple first attribut
+    """
+
+    def __init__(self, execute_request_handler, splitted_df, first_att):
+        executor = execute_request_handler.executor
+        mdx_query = execute_request_handler.mdx_query
+        self.executor = executor
+        self.mdx_query = mdx_query
+        self.splitted_df = splitted_df
+        self.first_att = first_att
+        self.measures = set(executor.measures)
+        self.many_measures = len(executor.selected_measures) > 1
+        self.hierarchized = executor.parser.hierarchized_tuples()
+        self.parent_unique_name = "PARENT_UNIQUE_NAME" in mdx_query.upper()
+        self.hierarchy_unique_name = "HIERARCHY_UNIQUE_NAME" in mdx_query.upper()
+        self.measures_hierarchy_unique_name = "HIERARCHY_UNIQUE_NAME" in mdx_query
+        self._used_levels = None
+        self._dimensions = {}
+        self._levels = {}
+        self._members = {}
+
+    def get_used_levels(self):
+        """Levels of the query tuples, by dimension.
+
+        :return: dict of dimension and levels
+        """
+        if self._used_levels is None:
+            self._used_levels = {}
+            for tupl in self.executor.parser.parse(self.mdx_query).all:
+                if not tupl[0].upper() == "MEASURES":
+                    self._used_levels.setdefault(tupl[0], []).append(tupl[2])
+        return self._used_levels
+
+    def get_dimension(self, dimension):
+        """Hierarchy and levels names of a dimension.
+
+        :param dimension: dimension name
+        :return: hierarchy, levels names, and True if members unique names
+            contain the level name
+        """
+        if dimension not in self._dimensions:
+            # [Geography].[Geography].[Continent]  -> first_lvlname : Country
+            # [Geography].[Geography].[Europe]     -> first_lvlname : Europe
+            self._dimensions[dimension] = (
+                "[{0}].[{0}]".format(dimension),
+                list(self.splitted_df[dimension].columns),
+                all(
+                    used_column in self.executor.tables_loaded[dimension].columns
+                    for used_column in self.get_used_levels()[dimension]
+                ),
+            )
+        return self._dimensions[dimension]
+
+    def get_level_template(self, dimension, lnum):
+        """Parts of the Member elements of a level which are the same for all
+        its members (all but UName, Caption and PARENT_UNIQUE_NAME).
+
+        :param dimension: dimension name
+        :param lnum: level number
+        :return: Member start, middle (after Caption) and end strings
+        """
+        key = (dimension, lnum)
+        if key not in self._levels:
+            hierarchy, levels, _ = self.get_dimension(dimension)
+            end = "\n      </Member>"
+            if self.hierarchy_unique_name:
+                end = format_element("HIERARCHY_UNIQUE_NAME", hierarchy) + end
+            self._levels[key] = (
+                f"\n      <Member Hierarchy={quoteattr(hierarchy)}>",
+                format_element("LName", f"{hierarchy}.[{levels[lnum]}]")
+                + format_element("LNum", str(lnum))
+                + format_element("DisplayInfo", "131076"),
+                end,
+            )
+        return self._levels[key]
+
+    def format_measure(self, measure):
+        """:return: Member element of a measure"""
+        key = ("Measures", measure)
+        if key not in self._members:
+            elements = [
+                ("UName", f"[Measures].[{measure}]"),
+                ("Caption", f"{measure}"),
+                ("LName", "[Measures]"),
+                ("LNum", "0"),
+                ("DisplayInfo", "0"),
+            ]
+            if self.measures_hierarchy_unique_name:
+                elements.append(("HIERARCHY_UNIQUE_NAME", "[Measures]"))
+            self._members[key] = format_member("[Measures]", elements)
+        return self._members[key]
+
+    def format_member(self, tupl):
+        """:return: Member element of a dimension tuple (as list)"""
+        tupl = DictExecuteReqHandler.get_tuple_without_nan(tupl)
+        key = tuple(tupl)
+        if key in self._members:
+            return self._members[key]
+
+        hierarchy, levels, uname_with_level = self.get_dimension(tupl[0])
+        lnum = len(tupl) - self.first_att
+        start, middle, end = self.get_level_template(tupl[0], lnum)
+        members_names = ["[" + str(value) + "]" for value in tupl[self.first_att - 1 :]]
+        if uname_with_level:
+            uname = f"{hierarchy}.[{levels[lnum]}].{'.'.join(members_names)}"
+        else:
+            uname = f"{hierarchy}.{'.'.join(members_names)}"
+        member = (
+            start
+            + format_element("UName", uname)
+            + format_element("Caption", str(tupl[-1]))
+            + middle
+        )
+        if self.parent_unique_name:
+            # for hierarchical rowset, the tuple parent
+            parent = "".join("." + name for name in members_names[:-1])
+            member += format_element(
+                "PARENT_UNIQUE_NAME", f"{hierarchy}.[{levels[0]}]{parent}"
+            )
+        self._members[key] = member + end
+        return self._members[key]
+
+    def format_tuple(self, tupls):
+        """:return: Tuple element of the dimensions tuples of an axis tuple"""
+        members = []
+        if tupls[0][1] in self.measures and self.many_measures:
+            members.append(self.format_measure(tupls[0][1]))
+            if tupls[0][-1] in self.measures:
+                return f"\n    <Tuple>{''.join(members)}\n    </Tuple>"
+        members.extend(map(self.format_member, tupls))
+        # Hierarchize'
+        if not self.hierarchized:
+            members.append(self.format_measure(tupls[0][1]))
+        return f"\n    <Tuple>{''.join(members)}\n    </Tuple>"
+
+
+class ChunksStream:
+    """xmlwitch.Builder stream keeping the written xml until it is popped, to
+    send a document chunk by chunk."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, content):
+        self._chunks.append(content)
+
+    def pop(self):
+        """:return: xml written since the last pop, as string"""
+        content = b"".join(self._chunks)
+        self._chunks = []
+        return content.decode("utf-8")
+
 
 class XmlaExecuteReqHandler(DictExecuteReqHandler):
     """The Execute method executes XMLA commands provided in the Command
@@ -37,114 +273,6 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
         </Execute>
     """
 
-    def _gen_measures_xs0(self, xml, tuples):
-        """add elements representing measures to axis 0 element.
-
-        :param xml: axis 0 tu update, in xml format
-        :param tuples: mdx query tuples
-        """
-        with xml.Member(Hierarchy="[Measures]"):
-            xml.UName(f"[Measures].[{tuples[0][1]}]")
-            xml.Caption(f"{tuples[0][1]}")
-            xml.LName("[Measures]")
-            xml.LNum("0")
-            xml.DisplayInfo("0")
-            if "HIERARCHY_UNIQUE_NAME" in self.mdx_query:
-                xml.HIERARCHY_UNIQUE_NAME("[Measures]")
-
-    def _gen_xs0_parent(self, xml, tuple, splitted_df, first_att):
-        """For hierarchical rowset, we need to add the tuple ( mdx query
-        contains PARENT_UNIQUE_NAME keyword)
-
-        :param xml: axis 0 tu update, in xml format
-        :param tuple: tuple that you want to add his parent
-        :param splitted_df: spllited dataframes (with split_dataframe() function)
-        :param first_att: tuple first attribut
-        :return:
-        """
-
-        parent = ".".join(map(lambda x: "[" + str(x) + "]", tuple[first_att - 1 : -1]))
-        if parent:
-            parent = "." + parent
-        xml.PARENT_UNIQUE_NAME(
-            "[{0}].[{0}].[{1}]{2}".format(
-                tuple[0], splitted_df[tuple[0]].columns[0], parent
-            )
-        )
-
-    def _get_lvl_column_by_dimension(self, all_tuples):
-        """TODO.
-
-        :param all_tuples:
-        :return:
-        """
-        used_levels = {}
-        for tupl in all_tuples:
-            if not tupl[0].upper() == "MEASURES":
-                used_levels[tupl[0]] = list(used_levels.get(tupl[0], [])) + [tupl[2]]
-        return used_levels
-
-    def _gen_xs0_tuples(self, xml, tuples, **kwargs):
-        first_att = kwargs.get("first_att")
-        split_df = kwargs.get("split_df")
-        all_tuples = self.executor.parser.decorticate_query(self.mdx_query)["all"]
-        # [Geography].[Geography].[Continent]  -> first_lvlname : Country
-        # [Geography].[Geography].[Europe]     -> first_lvlname : Europe
-        all_level_columns = self._get_lvl_column_by_dimension(all_tuples)
-        for tupl in tuples:
-            tuple_without_minus_1 = self.get_tuple_without_nan(tupl)
-            current_lvl_name = split_df[tuple_without_minus_1[0]].columns[
-                len(tuple_without_minus_1) - first_att
-            ]
-            current_dimension = tuple_without_minus_1[0]
-            if all(
-                used_column in self.executor.tables_loaded[current_dimension].columns
-                for used_column in all_level_columns[current_dimension]
-            ):
-                uname = "[{0}].[{0}].[{1}].{2}".format(
-                    current_dimension,
-                    current_lvl_name,
-                    ".".join(
-                        [
-                            "[" + str(tuple_value) + "]"
-                            for tuple_value in tuple_without_minus_1[first_att - 1 :]
-                        ]
-                    ),
-                )
-            else:
-                uname = "[{0}].[{0}].{1}".format(
-                    current_dimension,
-                    ".".join(
-                        [
-                            "[" + str(tuple_value) + "]"
-                            for tuple_value in tuple_without_minus_1[first_att - 1 :]
-                        ]
-                    ),
-                )
-
-            with xml.Member(Hierarchy="[{0}].[{0}]".format(tuple_without_minus_1[0])):
-                xml.UName(uname)
-                xml.Caption(str(tuple_without_minus_1[-1]))
-                xml.LName(
-                    "[{0}].[{0}].[{1}]".format(
-                        tuple_without_minus_1[0], current_lvl_name
-                    )
-                )
-                xml.LNum(str(len(tuple_without_minus_1) - first_att))
-                xml.DisplayInfo("131076")
-
-                if "PARENT_UNIQUE_NAME" in self.mdx_query.upper():
-                    self._gen_xs0_parent(
-                        xml,
-                        tuple=tuple_without_minus_1,
-                        splitted_df=split_df,
-                        first_att=first_att,
-                    )
-                if "HIERARCHY_UNIQUE_NAME" in self.mdx_query.upper():
-                    xml.HIERARCHY_UNIQUE_NAME(
-                        "[{0}].[{0}]".format(tuple_without_minus_1[0])
-                    )
-
     def tuples_2_xs0(self, tuples, splitted_df, first_att, axis):
         """transform mdx query tuples (list) to xmla xs0.
 
@@ -154,24 +282,13 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
         :param axis: xs0 | xs1
         :return: tuples axis in xml
         """
+        templates = AxisTemplates(self, splitted_df, first_att)
         xml = xmlwitch.Builder()
         with xml.Axis(name=axis):
             with xml.Tuples:
-                for tupls in itertools.chain(*tuples):
-                    with xml.Tuple:
-                        if (
-                            tupls[0][1] in self.executor.measures
-                            and len(self.executor.selected_measures) > 1
-                        ):
-                            self._gen_measures_xs0(xml, tupls)
-                            if tupls[0][-1] in self.executor.measures:
-                                continue
-                        self._gen_xs0_tuples(
-                            xml, tupls, split_df=splitted_df, first_att=first_att
-                        )
-                        # Hierarchize'
-                        if not self.executor.parser.hierarchized_tuples():
-                            self._gen_measures_xs0(xml, tupls)
+                xml.write(
+                    "".join(map(templates.format_tuple, itertools.chain(*tuples)))
+                )
         return xml
 
     def _gen_xs0_grouped_tuples(self, axis, tuples_groups):
@@ -392,40 +509,63 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
 
         :return: CellData as string
         """
+        return "".join(self.iter_cell_data())
+
+    def iter_cell_data(self):
+        """Generate Cell elements by chunks of :data:`CELLS_CHUNK_SIZE` cells,
+        see :func:`generate_cell_data`.
+
+        :return: generator of CellData strings
+        """
 
         if self.convert2formulas:
-            return self._generate_cells_data_convert2formulas()
+            yield self._generate_cells_data_convert2formulas()
+            return
+
+        separator = ""
+        for cells in self._iter_cells_blocks():
+            # empty cells are None
+            cells = "\n".join(filter(None, cells.tolist()))
+            if cells:
+                yield separator + cells
+                separator = "\n"
+
+    def _iter_cells_blocks(self):
+        """Format cells of the result by blocks of about
+        :data:`CELLS_CHUNK_SIZE` cells, see :func:`format_cells`.
+
+        :return: generator of arrays of Cell elements strings, in cells ordinals
+            order
+        """
+        result = self.mdx_execution_result["result"]
+        columns = [result.iloc[:, index].to_numpy() for index in range(result.shape[1])]
+        rows_count = len(result)
 
         if (
             len(self.columns_desc["columns"].keys()) == 0
             or len(self.columns_desc["rows"].keys()) == 0
         ) and self.executor.facts in self.columns_desc["all"].keys():
-            # iterate DataFrame horizontally
-            columns_loop = itertools.chain(
-                *[
-                    self.mdx_execution_result["result"][measure]
-                    for measure in self.mdx_execution_result["result"].columns
-                ]
-            )
-
-        else:
-            # iterate DataFrame vertically
-            columns_loop = itertools.chain(
-                *list(self.mdx_execution_result["result"].itertuples(index=False))
-            )
-
-        xml = xmlwitch.Builder()
-        index = 0
-
-        for value in columns_loop:
-            if np.isnan(value):
-                value = ""
-            with xml.Cell(CellOrdinal=str(index)):
-                xml.Value(str(value), **{"xsi:type": "xsi:long"})
-
-            index += 1
+            # iterate DataFrame horizontally (column after column)
+            for index, values in enumerate(columns):
+                for start in range(0, rows_count, CELLS_CHUNK_SIZE):
+                    stop = min(start + CELLS_CHUNK_SIZE, rows_count)
+                    yield format_cells(
+                        values[start:stop],
+                        np.arange(start, stop) + index * rows_count,
+                    )
 
-        return str(xml)
+        elif columns:
+            # iterate DataFrame vertically (row after row)
+            rows_chunk_size = max(CELLS_CHUNK_SIZE // len(columns), 1)
+            for start in range(0, rows_count, rows_chunk_size):
+                stop = min(start + rows_chunk_size, rows_count)
+                cells = np.empty((stop - start, len(columns)), dtype=object)
+                for index, values in enumerate(columns):
+                    cells[:, index] = format_cells(
+                        values[start:stop],
+                        np.arange(start, stop) * len(columns) + index,
+                    )
+                yield cells.ravel()
 
     def _generate_axes_info_slicer_convert2formulas(self):
         """generate Slicer Axes for convert formulas query.
@@ -835,49 +975,125 @@ class XmlaExecuteReqHandler(DictExecuteReqHandler):
 
         :return: xmla response as string
         """
+        return "".join(self.iter_response())
+
+    def iter_response(self):
+        """Generate the xmla response chunk by chunk (OlapInfo and Axes, then
+        CellData chunks, see :func:`iter_cell_data`), so the response can be
+        sent while cells are generated, without building the whole document.
+
+        example::
+
+            for chunk in execute_request_hanlder.iter_response():
+                stream.write(chunk.encode("utf-8"))
+
+        :return: generator of xmla response strings
+        """
+        stream = ChunksStream()
+        xml = xmlwitch.Builder(stream=stream)
 
         if self.mdx_query == "":
             # check if command contains a query
-            xml = xmlwitch.Builder()
             with xml["return"]:
                 xml.root(xmlns="urn:schemas-microsoft-com:xml-analysis:empty")
 
-            return str(xml)
-
-        else:
+            yield stream.pop()
+            return
 
-            xml = xmlwitch.Builder()
+        # only the response body is cached, timestamps are regenerated
+        cache_key, body = self._get_cached_response_body()
 
-            with xml["return"]:
-                with xml.root(
-                    xmlns="urn:schemas-microsoft-com:xml-analysis:mddataset",
-                    **{
-                        "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
-                        "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
-                    },
-                ):
-                    xml.write(execute_xsd)
-                    with xml.OlapInfo:
-                        with xml.CubeInfo:
-                            with xml.Cube:
-                                xml.CubeName("Sales")
-                                xml.LastDataUpdate(
-                                    datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                                    xmlns="http://schemas.microsoft.com/analysisservices/2003/engine",
-                                )
-                                xml.LastSchemaUpdate(
-                                    datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                                    xmlns="http://schemas.microsoft.com/analysisservices/2003/engine",
-                                )
-                        xml.write(self.generate_cell_info())
-                        with xml.AxesInfo:
-                            xml.write(self.generate_axes_info())
-                            xml.write(self.generate_axes_info_slicer())
-
-                    with xml.Axes:
-                        xml.write(self.generate_xs0())
-                        xml.write(self.generate_slicer_axis())
-
-                    with xml.CellData:
-                        xml.write(self.generate_cell_data())
-            return str(xml)
+        with xml["return"]:
+            with xml.root(
+                xmlns="urn:schemas-microsoft-com:xml-analysis:mddataset",
+                **{
+                    "xmlns:xsd": "http://www.w3.org/2001/XMLSchema",
+                    "xmlns:xsi": "http://www.w3.org/2001/XMLSchema-instance",
+                },
+            ):
+                xml.write(execute_xsd)
+                with xml.OlapInfo:
+                    with xml.CubeInfo:
+                        with xml.Cube:
+                            xml.CubeName("Sales")
+                            xml.LastDataUpdate(
+                                datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+                                xmlns="http://schemas.microsoft.com/analysisservices/2003/engine",
+                            )
+                            xml.LastSchemaUpdate(
+                                datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+                                xmlns="http://schemas.microsoft.com/analysisservices/2003/engine",
+                            )
+                    xml.write(body["cell_info"])
+                    with xml.AxesInfo:
+                        xml.write(body["axes_info"])
+                        xml.write(body["axes_info_slicer"])
+
+                with xml.Axes:
+                    xml.write(body["xs0"])
+                    xml.write(body["slicer_axis"])
+
+                with xml.CellData:
+                    # axes are sent before cells are generated
+                    yield stream.pop()
+                    for cells in self._iter_cached_cell_data(cache_key, body):
+                        xml.write(cells)
+                        yield stream.pop()
+
+        yield stream.pop()
+
+    def _get_cached_response_body(self):
+        """Get the generated parts of the xmla response from the executor
+        result cache, or generate them (they are cached with the cell data, see
+        :func:`_iter_cached_cell_data`).
+
+        :return: cache key, and dict of xml strings (cell_info, axes_info,
+            axes_info_slicer, xs0, slicer_axis, and cell_data chunks if cached)
+        """
+        cache_key = (
+            "xmla_execute",
+            self.executor.cube,
+            normalize_query(self.mdx_query),
+            self.convert2formulas,
+            tuple(self.executor.selected_measures or ()),
+        )
+        body = self.executor.result_cache.get(cache_key)
+        if body is None:
+            body = {
+                "cell_info": self.generate_cell_info(),
+                "axes_info": self.generate_axes_info(),
+                "axes_info_slicer": self.generate_axes_info_slicer(),
+                "xs0": self.generate_xs0(),
+                "slicer_axis": self.generate_slicer_axis(),
+            }
+        return cache_key, body
+
+    def _iter_cached_cell_data(self, cache_key, body):
+        """Iterate CellData chunks of a cached response body, or generate them
+        and cache the response body with them, unless they are bigger than
+        MAX_CACHED_CELL_DATA_SIZE or the result cache (they aren't kept while
+        they are sent then).
+
+        :param cache_key: response cache key
+        :param body: response body, see :func:`_get_cached_response_body`
+        :return: generator of CellData strings
+        """
+        if "cell_data" in body:
+            yield from body["cell_data"]
+            return
+
+        max_size = min(MAX_CACHED_CELL_DATA_SIZE, self.executor.result_cache.max_size)
+        cell_data, size = [], 0
+        for cells in self.iter_cell_data():
+            if cell_data is not None:
+                size += len(cells)
+                if size > max_size:
+                    cell_data = None
+                else:
+                    cell_data.append(cells)
+            yield cells
+
+        if cell_data is not None:
+            self.executor.result_cache.set(
+                cache_key, dict(body, cell_data=tuple(cell_data))
+            )
@@ -33,13 +33,7 @@ class XmlaProviderLib:
         :param request: :class:`DiscoverRequest` object
         :return: XML Discover response as string
         """
-        method_name = request.RequestType.lower() + "_response"
-        method = getattr(self.discover_request_hanlder, method_name)
-
-        if request.RequestType == "DISCOVER_DATASOURCES":
-            return method()
-
-        return method(request)
+        return self.discover_request_hanlder.generate_response(request)
 
     def Execute(self, request):
         """Send xmla commands to an instance of MdxEngine.
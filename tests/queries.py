@@ -279,3 +279,11 @@ custom_query1 = """
     WHERE ([Measures].[supply_time])
     CELL PROPERTIES VALUE, FORMAT_STRING, LANGUAGE, BACK_COLOR, FORE_COLOR, FONT_FLAGS
 """
+
+custom_query2 = """
+    SELECT
+    Hierarchize({[store].[store].[store_type].Members}) ON COLUMNS,
+    Hierarchize({[warehouse].[warehouse].[warehouse_name].Members}) ON ROWS
+    FROM [main]
+    WHERE ([Measures].[units_ordered])
+"""
@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+import pytest
+import sqlalchemy
+from pandas.util.testing import assert_frame_equal
+
+from olapy.core.mdx.executor import MdxEngine
+from olapy.core.mdx.executor.cube_loader_columnar import (
+    MANIFEST_FILE_NAME,
+    convert_csv_cube,
+)
+
+from .db_creation_utils import create_insert
+from .queries import query1, query7
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture(scope="module")
+def olapy_data(tmp_path_factory):
+    """olapy-data folder with the test database tables as csv cube 'main',
+    and its conversion as cube 'main_parquet'."""
+    olapy_data = tmp_path_factory.mktemp("olapy-data")
+    csv_cube_path = olapy_data / "cubes" / "main"
+    csv_cube_path.mkdir(parents=True)
+    engine = sqlalchemy.create_engine("sqlite://")
+    create_insert(engine)
+    for table_name in sqlalchemy.inspect(engine).get_table_names():
+        pd.read_sql_table(table_name, engine).to_csv(
+            csv_cube_path / f"{table_name}.csv", sep=";", index=False
+        )
+    convert_csv_cube(str(csv_cube_path), str(olapy_data / "cubes" / "main_parquet"))
+    return str(olapy_data)
+
+
+def load(olapy_data, cube_name):
+    executor = MdxEngine(olapy_data_location=olapy_data)
+    executor.load_cube(cube_name, fact_table_name="facts")
+    return executor
+
+
+def test_columnar_cube(olapy_data):
+    assert os.path.isfile(
+        os.path.join(olapy_data, "cubes", "main_parquet", MANIFEST_FILE_NAME)
+    )
+    csv_executor = load(olapy_data, "main")
+    columnar_executor = load(olapy_data, "main_parquet")
+
+    assert list(columnar_executor.tables_loaded) == list(csv_executor.tables_loaded)
+    assert columnar_executor.measures == csv_executor.measures
+    assert_frame_equal(
+        columnar_executor.star_schema_dataframe, csv_executor.star_schema_dataframe
+    )
+    for query in (query1, query7):
+        assert_frame_equal(
+            columnar_executor.execute_mdx(query)["result"],
+            csv_executor.execute_mdx(query)["result"],
+        )
@@ -0,0 +1,120 @@
+import os
+
+import pandas as pd
+import sqlalchemy
+from pandas.util.testing import assert_frame_equal
+from sqlalchemy import inspect
+
+from olapy.core.mdx.executor import cube_loader_db
+from olapy.core.mdx.executor.cube_loader import (
+    CATEGORIES_RATIO,
+    get_csv_files,
+    read_csv_file,
+)
+from olapy.core.mdx.executor.cube_loader_db import CubeLoaderDB
+
+from .db_creation_utils import create_insert
+
+
+def test_read_csv_file(tmp_path):
+    csv_file = tmp_path / "Facts.csv"
+    csv_file.write_text(
+        "\n".join(
+            [
+                "city;licence;amount",
+                "Paris;A;1 349",
+                "Lyon;B;12",
+                "Paris;A;1 000",
+                "Lille;A;3",
+                "Paris;B;2",
+                "Lyon;C;4 000",
+            ]
+        )
+    )
+    # string columns are read as objects by default
+    df = read_csv_file(str(csv_file), clean_numbers=True, chunksize=2)
+    assert df["city"].dtype == object
+    assert list(df["amount"]) == [1349.0, 12.0, 1000.0, 3.0, 2.0, 4000.0]
+
+    # categories of each chunk are merged
+    df = read_csv_file(
+        str(csv_file),
+        clean_numbers=True,
+        chunksize=2,
+        categories_ratio=CATEGORIES_RATIO,
+    )
+
+    assert isinstance(df["city"].dtype, pd.CategoricalDtype)
+    assert list(df["city"].cat.categories) == ["Lille", "Lyon", "Paris"]
+    assert isinstance(df["licence"].dtype, pd.CategoricalDtype)
+    assert list(df["amount"]) == [1349.0, 12.0, 1000.0, 3.0, 2.0, 4000.0]
+    assert_frame_equal(
+        df.astype({"city": object, "licence": object}),
+        pd.read_csv(str(csv_file), sep=";").assign(
+            amount=[1349.0, 12.0, 1000.0, 3.0, 2.0, 4000.0]
+        ),
+    )
+
+
+def test_read_csv_file_not_numbers(tmp_path):
+    csv_file = tmp_path / "Facts.csv"
+    csv_file.write_text(
+        "\n".join(["city;amount", "Paris;1 349", "Lyon;12", "Lille;3", "Paris;unknown"])
+    )
+    # like MdxEngine.clean_data, a column with a value which is not a number
+    # (after the sample rows) isn't cleaned
+    df = read_csv_file(str(csv_file), clean_numbers=True, chunksize=2, sample_size=2)
+    assert list(df["amount"]) == ["1 349", "12", "3", "unknown"]
+
+
+def test_cube_loader_db_read_tables(tmp_path, monkeypatch):
+    # tables are read by many batches
+    monkeypatch.setattr(cube_loader_db, "FETCH_SIZE", 3)
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'sales.db'}")
+    create_insert(engine)
+    cube_loader = CubeLoaderDB(engine, max_workers=2)
+    # sqlite file database, tables are read by many threads
+    assert cube_loader.get_max_workers() == 2
+
+    tables = cube_loader.read_tables()
+    assert list(tables) == inspect(engine).get_table_names()
+    for table_name, df in tables.items():
+        assert_frame_equal(df, pd.read_sql_query(f"SELECT * FROM {table_name}", engine))
+    # tables are read once
+    assert cube_loader.read_tables() is tables
+    assert "amount" in cube_loader.construct_star_schema("facts").columns
+    # pandas loader, even if the package CubeLoader is SparkCubeLoader
+    assert "amount" in cube_loader.load_tables()["facts"].columns
+
+    # in memory database, one connection shared by all threads
+    assert CubeLoaderDB(sqlalchemy.create_engine("sqlite://")).get_max_workers() == 1
+
+
+def test_get_csv_files(tmp_path):
+    for file in [
+        "Facts.csv",
+        "Facts.2024-02.csv",
+        "Time.csv",
+        "notes.txt",
+        "my.table.csv",
+        "Sales.2019.csv",
+    ]:
+        (tmp_path / file).write_text("")
+    (tmp_path / "Geography").mkdir()
+    for file in ["2024-02.csv", "2024-01.csv"]:
+        (tmp_path / "Geography" / file).write_text("")
+
+    tables_files = get_csv_files(str(tmp_path))
+    # tables names may contain dots, part files need a {table}.csv file
+    assert sorted(tables_files) == [
+        "Facts",
+        "Geography",
+        "Sales.2019",
+        "Time",
+        "my.table",
+    ]
+    assert tables_files["Facts"] == ["Facts.csv", "Facts.2024-02.csv"]
+    assert tables_files["Geography"] == [
+        os.path.join("Geography", "2024-01.csv"),
+        os.path.join("Geography", "2024-02.csv"),
+    ]
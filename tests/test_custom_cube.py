@@ -1,6 +1,9 @@
 import pytest
+from pandas.util.testing import assert_frame_equal
 
-from .queries import custom_query1
+from olapy.core.mdx.executor import MdxEngine
+
+from .queries import custom_query1, custom_query2
 
 # pytest.importorskip("sqlalchemy")
 
@@ -9,3 +12,22 @@ from .queries import custom_query1
 def test_execution_query1(executor):
     result = executor.execute_mdx(custom_query1)
     assert result["result"]["supply_time"][0] == 24
+
+
+@pytest.mark.parametrize("executor", [True], indirect=True)
+def test_rolap(executor):
+    rolap_executor = MdxEngine(
+        sqla_engine=executor.sqla_engine,
+        source_type="db",
+        cube_config=executor.cube_config,
+        rolap=True,
+    )
+    rolap_executor.load_cube(executor.cube, fact_table_name="facts")
+    assert rolap_executor.rolap_schema is not None
+
+    for query in [custom_query1, custom_query2]:
+        assert_frame_equal(
+            rolap_executor.execute_mdx(query)["result"],
+            executor.execute_mdx(query)["result"],
+            check_dtype=False,
+        )
@@ -1,5 +1,16 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 from pandas.util.testing import assert_frame_equal
+from sqlalchemy import event
+
+from olapy.core.mdx.executor import MdxEngine
+from olapy.core.mdx.executor.aggregates import AggregateStore
+from olapy.core.mdx.executor.context import Cube, QueryContext
+from olapy.core.mdx.executor.registry import CubeRegistry
+from olapy.core.mdx.executor.star_join import StarJoin
 
 from .queries import (
     query1,
@@ -505,3 +516,313 @@ def test_execution_query16(executor):
     )
 
     assert_frame_equal(df, test_df)
+
+
+def test_members_index(executor):
+    geography_index = executor.members_index["geography"]
+    # columns of each member, no rows positions
+    assert geography_index["Europe"] == ("continent",)
+    assert geography_index["France"] == ("country",)
+    assert executor._get_column_name_from_value("time", 2010) == "year"
+    assert executor._get_column_name_from_value("geography", "Atlantis") is None
+
+
+def test_concat_dataframes():
+    continents = pd.DataFrame({"continent": ["Europe"], "amount": [41239]})
+    countries = pd.DataFrame(
+        {"continent": ["America"], "country": ["United States"], "amount": [35150]}
+    )
+    assert MdxEngine.concat_dataframes([continents]) is continents
+
+    df = MdxEngine.concat_dataframes([continents, countries, continents])
+    # union of all columns, in order of appearance, missing ones filled with -1
+    assert list(df.columns) == ["continent", "amount", "country"]
+    assert df["country"].tolist() == [-1, "United States", -1]
+    assert df["amount"].tolist() == [41239, 35150, 41239]
+    assert df["amount"].dtype == np.int64
+    assert list(continents.columns) == ["continent", "amount"]
+
+    # repeated column names are aligned by position
+    first = pd.DataFrame([["Europe", "France", 1]], columns=["geo", "geo", "amount"])
+    second = pd.DataFrame(
+        [["America", 2020, "United States", 2]],
+        columns=["geo", "year", "geo", "amount"],
+    )
+    df = MdxEngine.concat_dataframes([first, first])
+    assert list(df.columns) == ["geo", "geo", "amount"]
+    assert df.values.tolist() == [["Europe", "France", 1]] * 2
+
+    df = MdxEngine.concat_dataframes([first, second])
+    assert list(df.columns) == ["geo", "geo", "amount", "year"]
+    assert df.values.tolist() == [
+        ["Europe", "France", 1, -1],
+        ["America", "United States", 2, 2020],
+    ]
+
+
+def test_execution_on_cuboids(executor):
+    expected_df = executor.execute_mdx(query_posgres1)["result"]
+    try:
+        executor.aggregates = AggregateStore(cuboids=[["continent", "country"]])
+        executor.aggregates.build(executor.star_schema_dataframe, executor.measures)
+        executor.result_cache.clear()
+        assert executor.aggregates.find({"country"}, ["amount"]) is not None
+        assert_frame_equal(executor.execute_mdx(query_posgres1)["result"], expected_df)
+
+        # lazy cuboids
+        executor.aggregates = AggregateStore(lazy_threshold=2)
+        executor.aggregates.build(executor.star_schema_dataframe, executor.measures)
+        executor.result_cache.clear()
+        executor.execute_mdx(query_posgres1)
+        assert not executor.aggregates.materialized
+        executor.result_cache.clear()
+        df = executor.execute_mdx(query_posgres1)["result"]
+        assert list(executor.aggregates.materialized) == [frozenset(["country"])]
+        assert_frame_equal(df, expected_df)
+    finally:
+        executor.aggregates = AggregateStore()
+
+
+def test_cuboid_not_found(executor):
+    executor.execute_mdx(query_posgres1)
+    tuples = [["geography", "geography", "country"]]
+    try:
+        executor.aggregates = AggregateStore(cuboids=[["year"]])
+        executor.aggregates.build(executor.star_schema_dataframe, executor.measures)
+        columns_to_keep = OrderedDict()
+        assert executor._get_cuboid_dataframe(tuples, columns_to_keep) is None
+        # the star schema fallback starts from unchanged columns_to_keep
+        assert columns_to_keep == OrderedDict()
+        assert executor.aggregates.find({"year"}, None) is None
+
+        executor.aggregates = AggregateStore(cuboids=[["country"]])
+        executor.aggregates.build(executor.star_schema_dataframe, executor.measures)
+        assert executor._get_cuboid_dataframe(tuples, columns_to_keep) is not None
+        assert list(columns_to_keep) == ["geography"]
+    finally:
+        executor.aggregates = AggregateStore()
+
+
+def test_lazy_cuboids_concurrent_requests(executor):
+    store = AggregateStore(lazy_threshold=3)
+    store.build(executor.star_schema_dataframe, executor.measures)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: store.record({"country"}), range(20)))
+    assert store.requests_count[frozenset(["country"])] == 20
+    assert list(store.materialized) == [frozenset(["country"])]
+
+
+def test_execution_result_cache(executor):
+    executor.result_cache.clear()
+    expected_df = executor.execute_mdx(query_posgres1)["result"]
+    assert len(executor.result_cache) == 1
+    # same query, different whitespaces
+    cached_df = executor.execute_mdx(" ".join(query_posgres1.split()))["result"]
+    assert cached_df is expected_df
+    assert len(executor.result_cache) == 1
+    executor.result_cache.clear()
+    assert_frame_equal(executor.execute_mdx(query_posgres1)["result"], expected_df)
+
+
+def test_execution_for_request(executor):
+    request_executor = executor.for_request()
+    assert request_executor.star_schema_dataframe is executor.star_schema_dataframe
+    assert request_executor.parser is not executor.parser
+
+    selected_measures = list(executor.selected_measures)
+    request_executor.execute_mdx(query_posgres1.replace("amount", "count"))
+    assert request_executor.selected_measures == ["count"]
+    assert request_executor.parser.mdx_query != executor.parser.mdx_query
+    assert executor.selected_measures == selected_measures
+
+    # the context is kept between queries of the same request
+    context = QueryContext(selected_measures=["count"])
+    executor.for_request(context).execute_mdx(query_posgres1)
+    assert context.selected_measures == ["amount"]
+    assert context.parser.mdx_query
+
+
+def test_publish_cube(executor):
+    cube = executor.loaded_cube
+    assert cube.name == executor.cube
+    assert cube.star_schema_dataframe is executor.star_schema_dataframe
+    assert list(cube.default_measures) == executor.selected_measures
+    # engines for requests keep using the cube published when they were created
+    request_executor = executor.for_request()
+    executor.load_cube(cube_name=executor.cube, fact_table_name=executor.facts)
+    assert executor.loaded_cube is not cube
+    assert request_executor.star_schema_dataframe is cube.star_schema_dataframe
+    assert request_executor.aggregates is cube.aggregates
+
+
+def test_cube_registry(executor):
+    assert executor.registry.get(executor.cube) is executor.loaded_cube
+    assert not executor.select_cube("unknown_cube")
+    assert executor.select_cube(executor.cube)
+
+    registry = CubeRegistry(max_size=1)
+    for name in ["cube1", "cube2"]:
+        registry.add(
+            Cube(
+                name=name,
+                facts="facts",
+                tables_loaded={},
+                star_schema_dataframe=executor.star_schema_dataframe,
+            )
+        )
+    # least recently used cube is evicted, the last added cube is kept
+    assert "cube1" not in registry
+    assert registry.get("cube2").name == "cube2"
+
+
+def test_categorical_levels(executor):
+    categorical_executor = MdxEngine(
+        sqla_engine=executor.sqla_engine, source_type="db", categorical_levels=True
+    )
+    categorical_executor.load_cube(executor.cube, fact_table_name=executor.facts)
+
+    star_schema_df = categorical_executor.star_schema_dataframe
+    assert isinstance(star_schema_df["country"].dtype, pd.CategoricalDtype)
+    # same categories in the star schema and in the dimension table
+    assert (
+        star_schema_df["country"].dtype
+        == categorical_executor.tables_loaded["geography"]["country"].dtype
+    )
+    assert (
+        star_schema_df["amount"].dtype == executor.star_schema_dataframe["amount"].dtype
+    )
+
+    for query in [query1, query7, query16, query_posgres1, query_posgres2]:
+        expected_df = executor.execute_mdx(query)["result"].reset_index()
+        df = categorical_executor.execute_mdx(query)["result"].reset_index()
+        assert_frame_equal(df.astype(expected_df.dtypes), expected_df)
+
+
+def test_normalized_star_schema(executor):
+    normalized_executor = MdxEngine(
+        sqla_engine=executor.sqla_engine, source_type="db", normalized_star_schema=True
+    )
+    normalized_executor.load_cube(executor.cube, fact_table_name=executor.facts)
+
+    star_join = normalized_executor.star_schema_dataframe
+    assert isinstance(star_join, StarJoin)
+    star_schema_df = executor.star_schema_dataframe
+    assert list(star_join.columns) == list(star_schema_df.columns)
+    assert_frame_equal(star_join[list(star_join.columns)], star_schema_df)
+
+    normalized_executor.aggregates.add_cuboid(["year", "country"])
+    for query in [query1, query7, query16, query_posgres1, query_posgres2]:
+        assert_frame_equal(
+            normalized_executor.execute_mdx(query)["result"],
+            executor.execute_mdx(query)["result"],
+        )
+
+
+def test_rolap(executor):
+    rolap_executor = MdxEngine(
+        sqla_engine=executor.sqla_engine, source_type="db", rolap=True
+    )
+    rolap_executor.load_cube(executor.cube, fact_table_name=executor.facts)
+    assert rolap_executor.rolap_schema is not None
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(executor.sqla_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        for query in [query1, query_posgres1]:
+            statements.clear()
+            assert_frame_equal(
+                rolap_executor.execute_mdx(query)["result"],
+                executor.execute_mdx(query)["result"],
+                check_dtype=False,
+            )
+            # executed in the database
+            assert len(statements) == 1
+            assert "sum(facts.amount)" in statements[0]
+    finally:
+        event.remove(
+            executor.sqla_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+    # groups of non hierarchized queries are in order of appearance, like the
+    # star schema groupby
+    query = """
+    SELECT
+    {[geography].[geography].[country].Members} ON COLUMNS,
+    {[product].[product].[company].Members} ON ROWS
+    FROM [sales] WHERE ([Measures].[amount])
+    """
+    expected_df = executor.execute_mdx(query)["result"]
+    assert not expected_df.index.is_monotonic_increasing
+    assert_frame_equal(
+        rolap_executor.execute_mdx(query)["result"], expected_df, check_dtype=False
+    )
+
+    # tuples of the same dimension are executed on the star schema
+    for query in [query7, query16, query_posgres2]:
+        assert_frame_equal(
+            rolap_executor.execute_mdx(query)["result"],
+            executor.execute_mdx(query)["result"],
+        )
+
+    # queries which can't be executed in the database don't change columns_to_keep
+    columns_to_keep = OrderedDict()
+    assert (
+        rolap_executor._get_rolap_dataframe(
+            [["geography", "geography", "unknown_level"]], columns_to_keep
+        )
+        is None
+    )
+    assert columns_to_keep == OrderedDict()
+
+
+def test_factorize_levels(executor):
+    level_codes = executor.level_codes
+    codes, members = level_codes["country"]
+    assert codes.dtype == np.int8
+    assert len(members) == executor.star_schema_dataframe["country"].nunique()
+
+    executor_without_codes = MdxEngine(
+        sqla_engine=executor.sqla_engine, source_type="db", factorize_levels=False
+    )
+    executor_without_codes.load_cube(executor.cube, fact_table_name=executor.facts)
+    assert executor_without_codes.level_codes is None
+    for query in [query1, query7, query8, query9, query16, query_posgres2]:
+        assert_frame_equal(
+            executor_without_codes.execute_mdx(query)["result"],
+            executor.execute_mdx(query)["result"],
+        )
+
+    # queries executed in the database don't use codes
+    rolap_executor = MdxEngine(
+        sqla_engine=executor.sqla_engine, source_type="db", rolap=True
+    )
+    rolap_executor.load_cube(executor.cube, fact_table_name=executor.facts)
+    assert rolap_executor.level_codes is None
+
+
+def test_partitions(executor):
+    partitioned_executor = MdxEngine(
+        sqla_engine=executor.sqla_engine, source_type="db", partition_level="continent"
+    )
+    partitioned_executor.load_cube(executor.cube, fact_table_name=executor.facts)
+
+    star_schema_df = executor.star_schema_dataframe
+    partitions = partitioned_executor.partitions
+    assert {member: len(rows) for member, rows in partitions.rows.items()} == (
+        star_schema_df["continent"].value_counts().to_dict()
+    )
+    assert list(partitions.get_rows([("continent", "Europe")])) == list(
+        np.flatnonzero(star_schema_df["continent"] == "Europe")
+    )
+    assert partitions.get_rows([("country", "France")]) is None
+
+    # query7 and query16 tuples filter continents
+    for query in [query1, query7, query16, query_posgres1, query_posgres2]:
+        assert_frame_equal(
+            partitioned_executor.execute_mdx(query)["result"],
+            executor.execute_mdx(query)["result"],
+        )
@@ -1,6 +1,16 @@
 from pytest import fixture
 
 from olapy.core.mdx.parser import MdxParser
+from olapy.core.mdx.parser.grammar import (
+    Axis,
+    FunctionCall,
+    MemberPath,
+    SetExpression,
+    TupleExpression,
+    UnaryOperation,
+    parse_mdx,
+    tokenize,
+)
 
 from .queries import query1, query2, query3, query4, query5, query6, where
 
@@ -171,3 +181,101 @@ def test_parsing_query6(parser):
         ["time", "time", "quarter", "2010", "Q2 2010"],
         ["time", "time", "month", "2010", "Q2 2010", "May 2010"],
     ]
+
+
+def test_parsed_query_is_memoized(parser):
+    parsed_query = parser.parse(query1 + "\n" + where)
+    assert parser.parse(query1 + "\n" + where) is parsed_query
+    assert parsed_query.where == (("time", "calendar", "day", "May 12,2010"),)
+    # decorticate_query results can be modified without altering the cache
+    parser.decorticate_query(query1)["all"].append(["Measures", "count"])
+    assert parser.decorticate_query(query1)["all"] == [["Measures", "amount"]]
+
+
+def test_tokenize():
+    tokens = tokenize("SELECT {[Measures].[amount]} ON 0 -- comment")
+    assert [(token.kind, token.value) for token in tokens] == [
+        ("IDENTIFIER", "SELECT"),
+        ("PUNCTUATION", "{"),
+        ("MEMBER", "[Measures].[amount]"),
+        ("PUNCTUATION", "}"),
+        ("IDENTIFIER", "ON"),
+        ("NUMBER", "0"),
+    ]
+
+
+def test_parsing_ast():
+    query = parse_mdx(query3)
+    assert query.axes == (
+        Axis(
+            number=0,
+            expression=FunctionCall(
+                "Hierarchize",
+                (
+                    UnaryOperation(
+                        "NON EMPTY",
+                        SetExpression(
+                            (
+                                FunctionCall(
+                                    "Members",
+                                    (MemberPath(("geography", "geo", "country")),),
+                                    method=True,
+                                ),
+                            )
+                        ),
+                    ),
+                ),
+            ),
+        ),
+        Axis(
+            number=1,
+            expression=FunctionCall(
+                "Hierarchize", (SetExpression((MemberPath(("Measures", "amount")),)),)
+            ),
+        ),
+    )
+    assert query.cube == MemberPath(("sales",))
+    assert query.where is None
+
+    query = parse_mdx(
+        """
+        WITH MEMBER [Measures].[double] AS '[Measures].[amount] * 2', SOLVE_ORDER = 1
+        SELECT {[Measures].[double]} ON ROWS
+        FROM (SELECT {[geography].[geo].[country].[France]} ON COLUMNS FROM [sales])
+        WHERE ([time].[calendar].[day].[May 12,2010])
+        """
+    )
+    assert query.with_members[0].name == MemberPath(("Measures", "double"))
+    assert query.get_axis(0) is None
+    assert query.get_axis(1).expression == SetExpression(
+        (MemberPath(("Measures", "double")),)
+    )
+    assert query.cube.axes[0].number == 0
+    assert query.where == TupleExpression(
+        (MemberPath(("time", "calendar", "day", "May 12,2010")),)
+    )
+
+
+def test_parsing_with_grammar(parser):
+    parsed_query = parser.parse(
+        """
+        WITH MEMBER [Measures].[double] AS '[Measures].[amount] * 2'
+        SELECT {[Measures].[double]} ON ROWS, {[geography].[geo].[country].Members} ON 0
+        FROM [sales]
+        WHERE ([time].[calendar].[day].[May 12,2010])
+        """
+    )
+    assert parsed_query.ast is not None
+    assert parsed_query.all == (
+        ("Measures", "double"),
+        ("Measures", "amount"),
+        ("Measures", "double"),
+        ("geography", "geo", "country"),
+        ("time", "calendar", "day", "May 12,2010"),
+    )
+    assert parsed_query.rows == (("Measures", "double"),)
+    assert parsed_query.columns == (("geography", "geo", "country"),)
+    assert parsed_query.where == (("time", "calendar", "day", "May 12,2010"),)
+
+    # not valid MDX (WHERE after CELL PROPERTIES), parsed with the regex
+    assert parser.parse(query6 + "\n" + where).ast is None
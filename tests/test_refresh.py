@@ -0,0 +1,90 @@
+import pandas as pd
+import sqlalchemy
+from pandas.util.testing import assert_frame_equal
+
+from olapy.core.mdx.executor import MdxEngine
+
+from .db_creation_utils import create_insert
+from .queries import query1, query7, query16, query_posgres1, query_posgres2
+
+QUERIES = [query1, query7, query16, query_posgres1, query_posgres2]
+
+
+def assert_same_results(executor, expected_executor):
+    for query in QUERIES:
+        expected_df = expected_executor.execute_mdx(query)["result"].reset_index()
+        df = executor.execute_mdx(query)["result"].reset_index()
+        columns = list(expected_df.columns)
+        assert_frame_equal(
+            df.sort_values(columns).reset_index(drop=True),
+            expected_df.sort_values(columns).reset_index(drop=True),
+        )
+
+
+def test_refresh_csv_cube(tmp_path):
+    cube_path = tmp_path / "cubes" / "main"
+    cube_path.mkdir(parents=True)
+    engine = sqlalchemy.create_engine("sqlite://")
+    create_insert(engine)
+    for table_name in sqlalchemy.inspect(engine).get_table_names():
+        pd.read_sql_table(table_name, engine).to_csv(
+            cube_path / f"{table_name}.csv", sep=";", index=False
+        )
+
+    executor = MdxEngine(olapy_data_location=str(tmp_path))
+    executor.load_cube("main", fact_table_name="facts")
+    executor.aggregates.add_cuboid(["year", "country"])
+    executor.execute_mdx(query_posgres1)
+    assert executor.refresh_cube() == 0
+
+    new_facts = pd.read_csv(cube_path / "facts.csv", sep=";").head(5)
+    new_facts["amount"] *= 10
+    new_facts.to_csv(cube_path / "facts.2.csv", sep=";", index=False)
+    assert executor.refresh_cube() == 5
+    assert executor.refresh_cube() == 0
+
+    # part files are read when the cube is loaded
+    expected_executor = MdxEngine(olapy_data_location=str(tmp_path))
+    expected_executor.load_cube("main", fact_table_name="facts")
+    assert len(executor.star_schema_dataframe) == len(
+        expected_executor.star_schema_dataframe
+    )
+    assert_same_results(executor, expected_executor)
+    # the cuboid is updated
+    expected_executor.aggregates.add_cuboid(["year", "country"])
+    assert_frame_equal(
+        executor.aggregates.find(["year", "country"], ["amount"]),
+        expected_executor.aggregates.find(["year", "country"], ["amount"]),
+    )
+
+
+def test_refresh_db_cube(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'sales.db'}")
+    create_insert(engine)
+    engine.execute("ALTER TABLE facts ADD COLUMN facts_id integer")
+    engine.execute("UPDATE facts SET facts_id = rowid")
+
+    def load_cube():
+        executor = MdxEngine(
+            sqla_engine=engine, source_type="db", refresh_column="facts_id"
+        )
+        # sqlite database cube name is the database file name
+        executor.load_cube("sales.db", fact_table_name="facts")
+        return executor
+
+    executor = load_cube()
+    assert (
+        executor.facts_source.high_water_mark == executor.star_schema_dataframe.shape[0]
+    )
+    engine.execute(
+        """
+        INSERT INTO facts (day, city, licence, amount, count, facts_id)
+        SELECT day, city, licence, amount * 10, count, facts_id + 1000
+        FROM facts WHERE facts_id <= 5
+        """
+    )
+    assert executor.refresh_cube() == 5
+    assert executor.refresh_cube() == 0
+    assert executor.facts_source.high_water_mark == 1005
+
+    assert_same_results(executor, load_cube())
@@ -0,0 +1,222 @@
+import sqlite3
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import sqlalchemy
+from pandas.util.testing import assert_frame_equal
+
+from olapy.core.mdx.executor import MdxEngine
+from olapy.core.mdx.executor.context import Cube
+from olapy.core.mdx.executor.snapshot import (
+    get_snapshot_source_key,
+    get_tables_signature,
+    load_cube_snapshot,
+    save_cube_snapshot,
+)
+
+from .queries import (
+    query1,
+    query7,
+    query8,
+    query9,
+    query16,
+    query_posgres1,
+    query_posgres2,
+    query_postgres3,
+)
+
+
+def test_cube_snapshot(executor, tmp_path):
+    executor.save_snapshot(str(tmp_path / "snapshots" / executor.cube))
+    snapshot_executor = MdxEngine(
+        sqla_engine=executor.sqla_engine,
+        source_type="db",
+        olapy_data_location=str(tmp_path),
+    )
+    snapshot_executor.load_cube(executor.cube, fact_table_name="facts")
+
+    star_schema = snapshot_executor.star_schema_dataframe
+    # columns are memory mapped, not copied
+    assert isinstance(star_schema["amount"].values, np.memmap)
+    assert isinstance(star_schema["country"].dtype, pd.CategoricalDtype)
+    assert snapshot_executor.measures == executor.measures
+    assert snapshot_executor.selected_measures == executor.selected_measures
+    assert_frame_equal(
+        star_schema.astype(executor.star_schema_dataframe.dtypes),
+        executor.star_schema_dataframe,
+    )
+
+    snapshot_executor.aggregates.add_cuboid(["year", "country"])
+    for query in [
+        query1,
+        query7,
+        query8,
+        query9,
+        query16,
+        query_posgres1,
+        query_posgres2,
+        query_postgres3,
+    ]:
+        expected_df = executor.execute_mdx(query)["result"]
+        df = snapshot_executor.execute_mdx(query)["result"]
+        assert_frame_equal(
+            df.reset_index().astype(expected_df.reset_index().dtypes),
+            expected_df.reset_index(),
+        )
+
+
+def test_datetime_columns_snapshot(tmp_path):
+    df = pd.DataFrame(
+        {
+            # database DATE columns are read as datetime.date objects
+            "day": [date(2023, 1, 1), date(2023, 1, 2), None],
+            "created": [datetime(2023, 1, 1, 10), None, datetime(2023, 1, 2, 8)],
+            "updated": pd.date_range("2023-01-01", periods=3, freq="H"),
+            "updated_tz": pd.date_range(
+                "2023-01-01", periods=3, freq="H", tz="Europe/Paris"
+            ),
+            "amount": [1.0, 2.0, 3.0],
+        }
+    )
+    cube = Cube(
+        name="dates",
+        facts="facts",
+        tables_loaded={"facts": df},
+        star_schema_dataframe=df,
+        measures=["amount"],
+    )
+    save_cube_snapshot(cube, str(tmp_path / "dates"))
+    snapshot_cube = load_cube_snapshot(str(tmp_path / "dates"))
+
+    star_schema = snapshot_cube.star_schema_dataframe
+    # datetime columns are memory mapped, even tz-aware ones
+    for column in ["updated", "updated_tz"]:
+        assert isinstance(star_schema[column].array._ndarray, np.memmap)
+    assert star_schema["updated_tz"].dt.tz is not None
+    assert isinstance(star_schema["day"].dtype, pd.CategoricalDtype)
+    assert star_schema["day"].tolist()[:2] == [date(2023, 1, 1), date(2023, 1, 2)]
+    assert_frame_equal(
+        star_schema.astype({"day": object}),
+        df.astype({"created": "datetime64[ns]"}),
+    )
+
+
+def test_snapshot_cache(executor, tmp_path):
+    def load_cube():
+        cache_executor = MdxEngine(
+            sqla_engine=executor.sqla_engine,
+            source_type="db",
+            olapy_data_location=str(tmp_path),
+            snapshot_cache=True,
+        )
+        cache_executor.load_cube(executor.cube, fact_table_name="facts")
+        return cache_executor
+
+    cache_executor = load_cube()
+    source_key = get_snapshot_source_key(cache_executor.get_snapshot_cache_path())
+    assert source_key
+    assert not isinstance(
+        cache_executor.star_schema_dataframe["amount"].values, np.memmap
+    )
+
+    # source didn't change, the cube is loaded from the cache
+    cache_executor = load_cube()
+    assert isinstance(cache_executor.star_schema_dataframe["amount"].values, np.memmap)
+    expected_df = executor.execute_mdx(query_posgres1)["result"].reset_index()
+    df = cache_executor.execute_mdx(query_posgres1)["result"].reset_index()
+    assert_frame_equal(df.astype(expected_df.dtypes), expected_df)
+
+    executor.sqla_engine.execute("CREATE TABLE snapshot_cache_test (id integer)")
+    try:
+        cache_executor = load_cube()
+    finally:
+        executor.sqla_engine.execute("DROP TABLE snapshot_cache_test")
+    assert not isinstance(
+        cache_executor.star_schema_dataframe["amount"].values, np.memmap
+    )
+    assert (
+        get_snapshot_source_key(cache_executor.get_snapshot_cache_path()) != source_key
+    )
+
+
+def create_dates_cube(tmp_path, columns="", values=""):
+    # DATE columns are read as datetime.date objects (like postgres)
+    engine = sqlalchemy.create_engine(
+        f"sqlite:///{tmp_path / 'dates.db'}",
+        connect_args={"detect_types": sqlite3.PARSE_DECLTYPES},
+    )
+    engine.execute("CREATE TABLE facts (day_id integer, amount integer)")
+    engine.execute("INSERT INTO facts VALUES (1, 10), (2, 20), (2, 5)")
+    engine.execute(f"CREATE TABLE days (day_id integer, day date{columns})")
+    engine.execute(
+        f"INSERT INTO days VALUES (1, '2023-01-01'{values}), (2, '2023-01-02'{values})"
+    )
+    return engine
+
+
+def test_snapshot_cache_dates(tmp_path):
+    engine = create_dates_cube(tmp_path)
+
+    def load_cube():
+        cache_executor = MdxEngine(
+            sqla_engine=engine,
+            source_type="db",
+            olapy_data_location=str(tmp_path),
+            snapshot_cache=True,
+        )
+        cache_executor.load_cube("dates.db", fact_table_name="facts")
+        return cache_executor
+
+    executor = load_cube()
+    assert get_snapshot_source_key(executor.get_snapshot_cache_path())
+    cache_executor = load_cube()
+    star_schema = cache_executor.star_schema_dataframe
+    assert isinstance(star_schema["amount"].values, np.memmap)
+    assert sorted(star_schema["day"].unique()) == [date(2023, 1, 1), date(2023, 1, 2)]
+    assert_frame_equal(
+        star_schema.astype({"day": object}), executor.star_schema_dataframe
+    )
+
+
+def test_snapshot_cache_error(tmp_path):
+    # bytes categories can't be saved, the cube is loaded without cache
+    engine = create_dates_cube(tmp_path, ", picture blob", ", x'00'")
+    executor = MdxEngine(
+        sqla_engine=engine,
+        source_type="db",
+        olapy_data_location=str(tmp_path),
+        snapshot_cache=True,
+    )
+    executor.load_cube("dates.db", fact_table_name="facts")
+    assert executor.star_schema_dataframe["amount"].sum() == 35
+    assert get_snapshot_source_key(executor.get_snapshot_cache_path()) is None
+
+
+def test_tables_signature(tmp_path):
+    engine = create_dates_cube(tmp_path)
+    assert get_tables_signature(engine) == [["days", 2], ["facts", 3]]
+    assert get_tables_signature(engine, ["facts"]) == [["facts", 3]]
+
+
+def test_snapshot_cache_signature_error(tmp_path):
+    # tables can't be counted, the cube is loaded without cache
+    engine = create_dates_cube(tmp_path)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        if "count(" in statement.lower():
+            statement = "SELECT count(*) FROM unknown_table"
+        return statement, parameters
+
+    sqlalchemy.event.listen(
+        engine, "before_cursor_execute", before_cursor_execute, retval=True
+    )
+    executor = MdxEngine(
+        sqla_engine=engine,
+        source_type="db",
+        olapy_data_location=str(tmp_path),
+        snapshot_cache=True,
+    )
+    executor.load_cube("dates.db", fact_table_name="facts")
+    assert executor.star_schema_dataframe["amount"].sum() == 35
+    assert get_snapshot_source_key(executor.get_snapshot_cache_path()) is None
@@ -1,10 +1,43 @@
+import io
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
+from urllib.request import Request, urlopen
 
+import numpy as np
+import pandas as pd
 import pytest
 import xmlwitch
+from lxml import etree
+from pandas.util.testing import assert_frame_equal
 
-from olapy.core.services.xmla_execute_request_handler import XmlaExecuteReqHandler
+from olapy.core.mdx.executor import MdxEngine
+from olapy.core.services import (
+    XmlaDiscoverReqHandler,
+    xmla_discover_request_handler,
+    xmla_execute_request_handler,
+)
+from olapy.core.services.models import (
+    DiscoverRequest,
+    Property,
+    Propertieslist,
+    Restriction,
+    Restrictionlist,
+)
+from olapy.core.services.xmla import (
+    XmlaStreamingMiddleware,
+    get_server,
+    get_wsgi_application,
+    load_default_cube,
+)
+from olapy.core.services.xmla_execute_request_handler import (
+    XmlaExecuteReqHandler,
+    format_cells,
+    format_member,
+)
 
+from .db_creation_utils import create_insert
 from .queries import query11, query12, query14, query15
 
 sqlalchemy = pytest.importorskip("sqlalchemy")
@@ -256,3 +289,341 @@ def test_query15_xs0(executor):
 
     xmla_tools = XmlaExecuteReqHandler(executor, query15, False)
     assert str(xml) == xmla_tools.generate_xs0()
+
+
+def test_split_dataframe(executor):
+    xmla_tools = XmlaExecuteReqHandler(executor, query14, False)
+    result = xmla_tools.mdx_execution_result["result"]
+
+    splitted_df = xmla_tools.split_dataframe()
+    for key, columns in xmla_tools.columns_desc["all"].items():
+        assert_frame_equal(splitted_df[key], result.reset_index()[list(columns)])
+    # views of the result columns, split once per query result
+    assert np.shares_memory(
+        splitted_df[executor.facts]["amount"].to_numpy(), result["amount"].to_numpy()
+    )
+    assert xmla_tools.split_dataframe() is splitted_df
+    xmla_tools.execute_mdx_query(query15)
+    assert xmla_tools.split_dataframe() is not splitted_df
+
+
+def remove_timestamps(response):
+    return re.sub(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}", "", response)
+
+
+def test_iter_response(executor, monkeypatch):
+    monkeypatch.setattr(xmla_execute_request_handler, "CELLS_CHUNK_SIZE", 1)
+    executor.result_cache.clear()
+    xmla_tools = XmlaExecuteReqHandler(executor, query14, False)
+    rows_count = len(xmla_tools.mdx_execution_result["result"])
+
+    chunks = list(xmla_tools.iter_response())
+    # OlapInfo and Axes, one chunk per row (cells of 2 measures), and the end
+    # of the document
+    assert len(chunks) == rows_count + 2
+    assert chunks[0].endswith("<CellData>")
+    assert chunks[1].startswith('<Cell CellOrdinal="0">')
+    assert chunks[2].startswith('\n<Cell CellOrdinal="2">')
+    # cell data is cached with the response body
+    assert remove_timestamps("".join(chunks)) == remove_timestamps(
+        xmla_tools.generate_response()
+    )
+
+
+def test_format_cells():
+    cells = format_cells(np.array([1.5, np.nan, 1e20]), np.array([4, 6, 8]))
+    # empty cells are skipped
+    assert cells[1] is None
+    xml = xmlwitch.Builder()
+    with xml.Cell(CellOrdinal="8"):
+        xml.Value(str(1e20), **{"xsi:type": "xsi:double"})
+    assert cells[2] == str(xml)
+
+    cells = format_cells(np.array(["<empty>", None], dtype=object), np.arange(2))
+    assert list(cells) == [
+        '<Cell CellOrdinal="0">\n  <Value xsi:type="xsi:string">&lt;empty&gt;</Value>\n</Cell>',
+        None,
+    ]
+
+
+def test_format_member():
+    xml = xmlwitch.Builder()
+    with xml.Axis(name="Axis0"):
+        with xml.Tuples:
+            with xml.Tuple:
+                with xml.Member(Hierarchy='[R&D "labs"].[R&D "labs"]'):
+                    xml.UName('[R&D "labs"].[R&D "labs"].[<none>]')
+                    xml.Caption("")
+                    xml.LNum("0")
+    elements = [
+        ("UName", '[R&D "labs"].[R&D "labs"].[<none>]'),
+        ("Caption", ""),
+        ("LNum", "0"),
+    ]
+    member = format_member('[R&D "labs"].[R&D "labs"]', elements)
+    assert str(xml) == (
+        '<Axis name="Axis0">\n  <Tuples>\n    <Tuple>'
+        + member
+        + "\n    </Tuple>\n  </Tuples>\n</Axis>"
+    )
+
+
+def get_execute_environ(mdx_query):
+    body = dedent(
+        f"""\
+        <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+          <soap:Body>
+            <Execute xmlns="urn:schemas-microsoft-com:xml-analysis">
+              <Command><Statement>{mdx_query}</Statement></Command>
+              <Properties><PropertyList><Catalog>main</Catalog></PropertyList></Properties>
+            </Execute>
+          </soap:Body>
+        </soap:Envelope>"""
+    ).encode()
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "CONTENT_TYPE": "text/xml",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "QUERY_STRING": "",
+        "PATH_INFO": "/",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "8000",
+        "wsgi.url_scheme": "http",
+    }
+    return environ
+
+
+def post_execute(wsgi_application, mdx_query):
+    environ = get_execute_environ(mdx_query)
+    statuses = []
+    chunks = list(
+        wsgi_application(environ, lambda status, headers: statuses.append(status))
+    )
+    response = etree.fromstring(b"".join(chunks))
+    for element in response.iter("{*}LastDataUpdate", "{*}LastSchemaUpdate"):
+        element.text = ""
+    execute_response = response.find(".//return")
+    return (
+        statuses[0],
+        chunks,
+        etree.tostring(execute_response, method="c14n", exclusive=True),
+    )
+
+
+def test_streamed_execute_response(executor):
+    wsgi_application = get_wsgi_application(executor)
+
+    status, chunks, response = post_execute(wsgi_application, query14)
+    assert status == "200 OK"
+    # envelope, OlapInfo and Axes, cells, end of the document
+    assert len(chunks) > 3
+    # same response as the spyne application
+    spyne_status, spyne_chunks, spyne_response = post_execute(
+        wsgi_application.wsgi_application, query14
+    )
+    assert spyne_status == "200 OK"
+    assert len(spyne_chunks) == 1
+    assert response == spyne_response
+
+
+def test_execute_fault_response(executor):
+    wsgi_application = get_wsgi_application(executor)
+    spyne_application = wsgi_application.wsgi_application
+
+    def execute_again(environ, start_response):
+        raise AssertionError("Execute request executed twice")
+
+    wsgi_application.wsgi_application = execute_again
+    environ = get_execute_environ(query14.replace("amount", "unknown_measure"))
+    statuses = []
+    fault = b"".join(
+        wsgi_application(environ, lambda status, headers: statuses.append(status))
+    )
+    # same fault as the spyne application
+    environ = get_execute_environ(query14.replace("amount", "unknown_measure"))
+    spyne_fault = b"".join(
+        spyne_application(environ, lambda status, headers: statuses.append(status))
+    )
+    assert statuses == ["500 Internal Server Error"] * 2
+    assert fault == spyne_fault
+
+
+def test_parse_execute_request_entities(tmp_path):
+    secret_path = tmp_path / "secret.txt"
+    secret_path.write_text("secret")
+    body = dedent(
+        f"""\
+        <?xml version="1.0"?>
+        <!DOCTYPE Envelope [<!ENTITY secret SYSTEM "file://{secret_path}">]>
+        <soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+          <soap:Body>
+            <Execute xmlns="urn:schemas-microsoft-com:xml-analysis">
+              <Command><Statement>SELECT &secret;</Statement></Command>
+            </Execute>
+          </soap:Body>
+        </soap:Envelope>"""
+    ).encode()
+    execute_request = XmlaStreamingMiddleware.parse_execute_request(body)
+    assert "secret" not in repr(execute_request)
+
+
+def test_cached_response_size(executor, monkeypatch):
+    monkeypatch.setattr(xmla_execute_request_handler, "MAX_CACHED_CELL_DATA_SIZE", 10)
+    xmla_tools = XmlaExecuteReqHandler(executor, query14, False)
+    executor.result_cache.clear()
+    xmla_tools.generate_response()
+    # the response body isn't cached
+    assert len(executor.result_cache) == 0
+
+
+def test_cached_discover_response(executor, monkeypatch):
+    discover_request_hanlder = XmlaDiscoverReqHandler(executor)
+    request = DiscoverRequest(
+        RequestType="MDSCHEMA_DIMENSIONS",
+        Restrictions=Restrictionlist(
+            RestrictionList=Restriction(CUBE_NAME="main", CATALOG_NAME="main")
+        ),
+        Properties=Propertieslist(PropertyList=Property(Catalog="main")),
+    )
+    response = discover_request_hanlder.generate_response(request)
+    assert "<DIMENSION_UNIQUE_NAME>[Measures]</DIMENSION_UNIQUE_NAME>" in response
+    # the catalog is selected by the per request handler only
+    assert discover_request_hanlder.selected_cube is None
+
+    def get_response(self, request):
+        raise AssertionError("Discover response not cached")
+
+    with monkeypatch.context() as m:
+        m.setattr(
+            xmla_discover_request_handler.DictDiscoverReqHandler,
+            "get_response",
+            get_response,
+        )
+        assert discover_request_hanlder.generate_response(request) == response
+        # other sessions share the executor cache
+        other_request_hanlder = XmlaDiscoverReqHandler(executor)
+        assert other_request_hanlder.generate_response(request) == response
+
+    # responses are invalidated when the cube is reloaded
+    executor.load_cube("main", fact_table_name="facts")
+    assert discover_request_hanlder.generate_response(request) == response
+    assert len(executor.result_cache) == 1
+
+
+def create_csv_cubes(tmp_path, cubes_measures):
+    """Create csv cubes with the test database tables, the facts amount column
+    is renamed to the cube measure.
+
+    :param cubes_measures: dict of cube name and measure
+    """
+    engine = sqlalchemy.create_engine("sqlite://")
+    create_insert(engine)
+    for cube_name, measure in cubes_measures.items():
+        cube_path = tmp_path / "cubes" / cube_name
+        cube_path.mkdir(parents=True)
+        for table_name in sqlalchemy.inspect(engine).get_table_names():
+            df = pd.read_sql_table(table_name, engine)
+            if table_name == "facts":
+                table_name = "Facts"
+                df = df.rename(columns={"amount": measure})
+            df.to_csv(cube_path / f"{table_name}.csv", sep=";", index=False)
+
+
+def measures_request(catalog):
+    return DiscoverRequest(
+        RequestType="MDSCHEMA_MEASURES",
+        Restrictions=Restrictionlist(
+            RestrictionList=Restriction(CUBE_NAME=catalog, CATALOG_NAME=catalog)
+        ),
+        Properties=Propertieslist(PropertyList=Property(Catalog=catalog)),
+    )
+
+
+def test_discover_request_cube(tmp_path):
+    create_csv_cubes(tmp_path, {"sales": "amount", "budget": "budget_amount"})
+    executor = MdxEngine(olapy_data_location=str(tmp_path))
+    discover_request_hanlder = XmlaDiscoverReqHandler(executor)
+    discover_request_hanlder.change_cube("sales")
+
+    response = discover_request_hanlder.generate_response(measures_request("budget"))
+    assert "<MEASURE_NAME>budget_amount</MEASURE_NAME>" in response
+    # the catalog cube is loaded for the request only
+    assert discover_request_hanlder.selected_cube == "sales"
+    assert executor.cube == "sales"
+    assert "budget" in executor.registry
+    response = discover_request_hanlder.generate_response(measures_request("sales"))
+    assert "<MEASURE_NAME>amount</MEASURE_NAME>" in response
+
+    request_executor = executor.for_request(cube_name="budget")
+    assert request_executor.measures[0] == "budget_amount"
+    assert executor.measures[0] == "amount"
+    with pytest.raises(ValueError):
+        executor.for_request(cube_name="unknown_cube")
+
+
+def post_request(url, method, request_body):
+    body = (
+        '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+        f'<soap:Body><{method} xmlns="urn:schemas-microsoft-com:xml-analysis">'
+        f"{request_body}</{method}></soap:Body></soap:Envelope>"
+    )
+    request = Request(url, data=body.encode(), headers={"Content-Type": "text/xml"})
+    with urlopen(request) as response:
+        return response.read().decode()
+
+
+def test_threaded_server_catalogs(tmp_path):
+    cubes_measures = {"sales": "amount", "budget": "budget_amount"}
+    create_csv_cubes(tmp_path, cubes_measures)
+    facts_path = tmp_path / "cubes" / "budget" / "Facts.csv"
+    budget_facts = pd.read_csv(facts_path, sep=";")
+    budget_facts["budget_amount"] *= 10
+    budget_facts.to_csv(facts_path, sep=";", index=False)
+    executor = MdxEngine(olapy_data_location=str(tmp_path))
+    wsgi_application = get_wsgi_application(executor)
+    load_default_cube(wsgi_application)
+    default_cube = executor.cube
+    server = get_server("127.0.0.1", 0, wsgi_application, "threads")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+
+    requests = []
+    for (catalog, measure), total in zip(cubes_measures.items(), [1023, 10230]):
+        properties = (
+            f"<Properties><PropertyList><Catalog>{catalog}</Catalog>"
+            "</PropertyList></Properties>"
+        )
+        requests.append(
+            (
+                "Discover",
+                "<RequestType>MDSCHEMA_MEASURES</RequestType><Restrictions>"
+                f"<RestrictionList><CUBE_NAME>{catalog}</CUBE_NAME>"
+                f"</RestrictionList></Restrictions>{properties}",
+                f"<MEASURE_NAME>{measure}</MEASURE_NAME>",
+            )
+        )
+        requests.append(
+            (
+                "Execute",
+                "<Command><Statement>SELECT {[Measures].["
+                f"{measure}]}} ON COLUMNS FROM [{catalog}]</Statement></Command>"
+                f"{properties}",
+                f'<Value xsi:type="xsi:long">{total}</Value>',
+            )
+        )
+    # concurrent requests on both catalogs (the other cube is loaded by them)
+    requests *= 10
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(
+                pool.map(lambda request: post_request(url, *request[:2]), requests)
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    for (_, _, expected), response in zip(requests, responses):
+        assert expected in response
+    assert len(executor.registry) == 2
+    assert executor.cube == default_cube